@@ -0,0 +1,372 @@
+"""
+Incrementally maintained analytics summary and daily rollup
+Keeps student/record counts, the predicted grade histogram and the sums behind
+the dashboard averages in analytics_summary, and the same figures per day (in
+total and per student) in analytics_daily. Every write route applies its delta
+in the same transaction as the insert or delete, so analytics reads touch a
+few rows instead of scanning performance_records.
+"""
+
+import random
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+
+# Counters are spread over this many rows so concurrent writers rarely wait
+# on the same row lock; reads add them up
+SUMMARY_SLOTS = 16
+
+GRADE_COLUMNS = {'A': 'grade_a', 'B': 'grade_b', 'C': 'grade_c', 'D': 'grade_d',
+                 'F': 'grade_f', None: 'grade_none'}
+
+# Summary column -> performance_records column, in SummaryDelta.sums order
+SUM_COLUMNS = (('sum_study_hours', 'study_hours'),
+               ('sum_previous_score', 'previous_score'),
+               ('sum_attendance', 'attendance_percentage'),
+               ('sum_sleep_hours', 'sleep_hours'))
+
+_COUNT_COLUMNS = ('total_students', 'total_records') + tuple(GRADE_COLUMNS.values())
+
+# Per-bucket figures in analytics_daily, in _Bucket order
+ROLLUP_COLUMNS = (('records',) + tuple(GRADE_COLUMNS.values())
+                  + tuple(column for column, _ in SUM_COLUMNS))
+
+# analytics_daily.student_id of the all-students rows
+ALL_STUDENTS = 0
+
+TIMESERIES_BUCKETS = ('day', 'week', 'month')
+
+
+def create_summary_table(cur):
+    """Create analytics_summary and analytics_daily if they do not exist"""
+    counts = ',\n'.join(f'{column} BIGINT NOT NULL DEFAULT 0' for column in _COUNT_COLUMNS)
+    sums = ',\n'.join(f'{column} DOUBLE NOT NULL DEFAULT 0' for column, _ in SUM_COLUMNS)
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS analytics_summary (
+            slot TINYINT UNSIGNED PRIMARY KEY,
+            {counts},
+            {sums}
+        )
+    """)
+    rollup_counts = ',\n'.join(f'{column} INT NOT NULL DEFAULT 0'
+                               for column in ('records',) + tuple(GRADE_COLUMNS.values()))
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS analytics_daily (
+            student_id INT NOT NULL,
+            day DATE NOT NULL,
+            slot TINYINT UNSIGNED NOT NULL DEFAULT 0,
+            {rollup_counts},
+            {sums},
+            PRIMARY KEY (student_id, day, slot)
+        )
+    """)
+
+
+def _stored(value):
+    # FLOAT columns keep single precision; add exactly what a later delete subtracts
+    return float(np.float32(value))
+
+
+def _day(created_at):
+    if created_at is None or isinstance(created_at, date) and not isinstance(created_at, datetime):
+        return created_at
+    return created_at.date()
+
+
+def _grade(predicted_grade):
+    return predicted_grade if predicted_grade in GRADE_COLUMNS else None
+
+
+class _Bucket:
+    """Record count, grade counts and column sums for one (student, day)"""
+
+    __slots__ = ('records', 'grades', 'sums')
+
+    def __init__(self):
+        self.records = 0
+        self.grades = Counter()
+        self.sums = [0.0] * len(SUM_COLUMNS)
+
+    def values(self):
+        return ([self.records] + [self.grades[grade] for grade in GRADE_COLUMNS]
+                + list(self.sums))
+
+
+class SummaryDelta:
+    """Changes to apply to the summary and daily rollup for one transaction"""
+
+    def __init__(self):
+        self.students = 0
+        self.records = 0
+        self.grades = Counter()
+        self.sums = [0.0] * len(SUM_COLUMNS)
+        # (student_id, day) -> _Bucket; day None means today on the database server
+        self.buckets = defaultdict(_Bucket)
+
+    def add_students(self, count=1):
+        self.students += count
+
+    def add_record(self, student_id, predicted_grade, study_hours, previous_score, attendance,
+                   sleep_hours, created_at=None):
+        values = [_stored(v) for v in (study_hours, previous_score, attendance, sleep_hours)]
+        self._add(student_id, _day(created_at), _grade(predicted_grade), 1, values)
+
+    def _add(self, student_id, day, grade, count, sums):
+        bucket = self.buckets[(student_id, day)]
+        for target in (self, bucket):
+            target.records += count
+            target.grades[grade] += count
+            for i, value in enumerate(sums):
+                target.sums[i] += value
+
+    def apply(self, cur):
+        """Add the delta to a random summary slot and the rollup rows (caller commits)"""
+        if not self.students and not self.records:
+            return
+        assignments = ['total_students = total_students + %s', 'total_records = total_records + %s']
+        params = [self.students, self.records]
+        for grade, count in self.grades.items():
+            column = GRADE_COLUMNS[grade]
+            assignments.append(f'{column} = {column} + %s')
+            params.append(count)
+        for (column, _), value in zip(SUM_COLUMNS, self.sums):
+            assignments.append(f'{column} = {column} + %s')
+            params.append(value)
+        cur.execute(f"UPDATE analytics_summary SET {', '.join(assignments)} WHERE slot = %s",
+                    params + [random.randrange(SUMMARY_SLOTS)])
+
+        if self.buckets:
+            self._apply_rollup(cur)
+
+    def _apply_rollup(self, cur):
+        # Each day's all-students row goes to one random slot, like the summary
+        totals = defaultdict(_Bucket)
+        for (_, day), bucket in self.buckets.items():
+            total = totals[day]
+            total.records += bucket.records
+            total.grades.update(bucket.grades)
+            for i, value in enumerate(bucket.sums):
+                total.sums[i] += value
+
+        slot = random.randrange(SUMMARY_SLOTS)
+        rows = [[student_id, day, 0] + bucket.values()
+                for (student_id, day), bucket in sorted(self.buckets.items(), key=_bucket_order)]
+        rows += [[ALL_STUDENTS, day, slot] + total.values()
+                 for day, total in sorted(totals.items(), key=lambda item: str(item[0]))]
+
+        placeholders = ', '.join(['%s'] * len(ROLLUP_COLUMNS))
+        updates = ', '.join(f'{column} = {column} + VALUES({column})' for column in ROLLUP_COLUMNS)
+        cur.executemany(f"""
+            INSERT INTO analytics_daily (student_id, day, slot, {', '.join(ROLLUP_COLUMNS)})
+            VALUES (%s, COALESCE(%s, CURRENT_DATE), %s, {placeholders})
+            ON DUPLICATE KEY UPDATE {updates}
+        """, rows)
+
+
+def _bucket_order(item):
+    # Touch rows in primary key order so concurrent transactions lock them alike
+    (student_id, day), _ = item
+    return student_id, str(day)
+
+
+def students_added(cur, count=1):
+    """Count newly inserted students (caller commits)"""
+    delta = SummaryDelta()
+    delta.add_students(count)
+    delta.apply(cur)
+
+
+def record_added(cur, student_id, predicted_grade, study_hours, previous_score, attendance,
+                 sleep_hours):
+    """Count one performance record inserted just now (caller commits)"""
+    delta = SummaryDelta()
+    delta.add_record(student_id, predicted_grade, study_hours, previous_score, attendance,
+                     sleep_hours)
+    delta.apply(cur)
+
+
+def _subtract_records(cur, delta, where, params):
+    # Aggregate the rows about to be deleted; they are locked, so the numbers hold
+    sums = ', '.join(f'COALESCE(SUM({record_column}), 0) AS {column}'
+                     for column, record_column in SUM_COLUMNS)
+    cur.execute(f"""
+        SELECT student_id, DATE(created_at) AS day, predicted_grade, COUNT(*) AS count, {sums}
+        FROM performance_records
+        WHERE {where}
+        GROUP BY student_id, DATE(created_at), predicted_grade
+        FOR UPDATE
+    """, params)
+    for row in cur.fetchall():
+        delta._add(row['student_id'], _day(row['day']), _grade(row['predicted_grade']),
+                   -row['count'], [-float(row[column]) for column, _ in SUM_COLUMNS])
+
+
+def delete_student_tracked(cur, student_id):
+    """Delete a student (records cascade) and update the summary; False if not found"""
+    # Locking the student blocks new records for it until this transaction ends
+    cur.execute("SELECT id FROM students WHERE id = %s FOR UPDATE", (student_id,))
+    if not cur.fetchone():
+        return False
+    delta = SummaryDelta()
+    delta.add_students(-1)
+    _subtract_records(cur, delta, 'student_id = %s', (student_id,))
+    cur.execute("DELETE FROM students WHERE id = %s", (student_id,))
+    delta.apply(cur)
+    return True
+
+
+def delete_record_tracked(cur, record_id):
+    """Delete a performance record and update the summary
+
+    Returns the record's student_id, or None if it was not found.
+    """
+    delta = SummaryDelta()
+    _subtract_records(cur, delta, 'id = %s', (record_id,))
+    if not delta.records:
+        return None
+    cur.execute("DELETE FROM performance_records WHERE id = %s", (record_id,))
+    delta.apply(cur)
+    (student_id, _), = delta.buckets
+    return student_id
+
+
+def rebuild_summary(cur):
+    """Recompute the summary and daily rollup from the base tables (caller commits)
+
+    Locks the slot rows first so concurrent writers wait and then apply their
+    deltas on top of the rebuilt totals.
+    """
+    cur.executemany("INSERT IGNORE INTO analytics_summary (slot) VALUES (%s)",
+                    [(slot,) for slot in range(SUMMARY_SLOTS)])
+    cur.execute("SELECT slot FROM analytics_summary FOR UPDATE")
+    cur.fetchall()
+
+    cur.execute("SELECT COUNT(*) AS count FROM students")
+    total_students = cur.fetchone()['count']
+    sums = ', '.join(f'COALESCE(SUM({record_column}), 0) AS {column}'
+                     for column, record_column in SUM_COLUMNS)
+    cur.execute(f"""
+        SELECT predicted_grade, COUNT(*) AS count, {sums}
+        FROM performance_records
+        GROUP BY predicted_grade
+    """)
+    totals = dict.fromkeys(_COUNT_COLUMNS, 0)
+    totals.update(dict.fromkeys((column for column, _ in SUM_COLUMNS), 0.0))
+    totals['total_students'] = total_students
+    for row in cur.fetchall():
+        grade = _grade(row['predicted_grade'])
+        totals['total_records'] += row['count']
+        totals[GRADE_COLUMNS[grade]] += row['count']
+        for column, _ in SUM_COLUMNS:
+            totals[column] += float(row[column])
+
+    columns = list(totals)
+    cur.execute(f"UPDATE analytics_summary SET {', '.join(f'{c} = 0' for c in columns)}")
+    cur.execute(f"UPDATE analytics_summary SET {', '.join(f'{c} = %s' for c in columns)} WHERE slot = 0",
+                [totals[c] for c in columns])
+
+    # COALESCE: a comparison with a NULL grade is NULL, so a group whose grades
+    # are all NULL would sum to NULL in the NOT NULL grade columns
+    grade_counts = ', '.join(
+        f"COALESCE(SUM(predicted_grade = '{grade}'), 0)" if grade else
+        "SUM(predicted_grade IS NULL OR predicted_grade NOT IN ('A', 'B', 'C', 'D', 'F'))"
+        for grade in GRADE_COLUMNS)
+    record_sums = ', '.join(f'SUM({record_column})' for _, record_column in SUM_COLUMNS)
+    cur.execute("DELETE FROM analytics_daily")
+    for student_column in ('student_id', str(ALL_STUDENTS)):
+        group_by = 'student_id, DATE(created_at)' if student_column == 'student_id' else 'DATE(created_at)'
+        cur.execute(f"""
+            INSERT INTO analytics_daily (student_id, day, slot, {', '.join(ROLLUP_COLUMNS)})
+            SELECT {student_column}, DATE(created_at), 0, COUNT(*), {grade_counts}, {record_sums}
+            FROM performance_records
+            GROUP BY {group_by}
+        """)
+    return totals
+
+
+def _averages(records, sums):
+    def average(column):
+        return float(sums[column]) / records if records else None
+
+    return {
+        'avg_study_hours': average('sum_study_hours'),
+        'avg_previous_score': average('sum_previous_score'),
+        'avg_attendance': average('sum_attendance'),
+        'avg_sleep_hours': average('sum_sleep_hours'),
+    }
+
+
+def read_summary(cur):
+    """Return totals, grade distribution and averages in the /api/analytics shape"""
+    columns = _COUNT_COLUMNS + tuple(column for column, _ in SUM_COLUMNS)
+    cur.execute(f"SELECT {', '.join(f'SUM({c}) AS {c}' for c in columns)} FROM analytics_summary")
+    row = cur.fetchone() or {}
+    totals = {column: row.get(column) or 0 for column in columns}
+
+    total_records = int(totals['total_records'])
+    grade_distribution = [
+        {'predicted_grade': grade, 'count': int(totals[column])}
+        for grade, column in GRADE_COLUMNS.items() if totals[column]
+    ]
+
+    return {
+        'total_students': int(totals['total_students']),
+        'total_predictions': total_records,
+        'grade_distribution': grade_distribution,
+        'averages': _averages(total_records, totals),
+    }
+
+
+def bucket_start(day, bucket):
+    """First day of the day/week (Monday)/month bucket containing day"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def read_timeseries(cur, bucket='day', student_id=None, since=None, until=None):
+    """Return per-bucket record counts, grade distributions and averages from the rollup
+
+    `since` is inclusive and `until` exclusive (dates). Reads at most one
+    aggregated row per day in range, never performance_records.
+    """
+    conditions = ['student_id = %s']
+    params = [ALL_STUDENTS if student_id is None else student_id]
+    if since is not None:
+        conditions.append('day >= %s')
+        params.append(since)
+    if until is not None:
+        conditions.append('day < %s')
+        params.append(until)
+    cur.execute(f"""
+        SELECT day, {', '.join(f'SUM({c}) AS {c}' for c in ROLLUP_COLUMNS)}
+        FROM analytics_daily
+        WHERE {' AND '.join(conditions)}
+        GROUP BY day
+        ORDER BY day
+    """, params)
+
+    buckets = {}
+    for row in cur.fetchall():
+        key = bucket_start(_day(row['day']), bucket)
+        totals = buckets.setdefault(key, dict.fromkeys(ROLLUP_COLUMNS, 0))
+        for column in ROLLUP_COLUMNS:
+            totals[column] += row[column] or 0
+
+    series = []
+    for key, totals in buckets.items():
+        records = int(totals['records'])
+        if not records:
+            continue
+        series.append({
+            'bucket': key.isoformat(),
+            'records': records,
+            'grade_distribution': {('None' if grade is None else grade): int(totals[column])
+                                   for grade, column in GRADE_COLUMNS.items() if totals[column]},
+            'averages': _averages(records, totals),
+        })
+    return series
@@ -3,37 +3,207 @@ Student Performance Prediction System with Authentication
 Complete Flask application with Login/Signup functionality
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
-from flask_mysqldb import MySQL
-import pandas as pd
+from flask import (Flask, Response, render_template, request, jsonify, redirect, url_for, flash,
+                   send_file, session)
+from db_pool import PooledMySQL
+from metrics import Metrics, instrument_app
+from profiler import PROFILE_HEADER, ProfilerError, RequestProfiler
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-import pickle
 import os
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
+import click
+import csv
+import sys
+import time
+from model_store import ModelHolder, PredictionBatcher, PredictionCache
+from model_registry import ModelRegistry, RetrainJob
+from forest_engine import forest_path_for
+from features import FEATURE_NAMES, FeatureError
+from pagination import CursorError, fetch_page, parse_limit
+from analytics_summary import (TIMESERIES_BUCKETS, SummaryDelta, delete_record_tracked,
+                               delete_student_tracked, read_summary, read_timeseries,
+                               rebuild_summary, record_added, students_added)
+from migrations import LATEST_VERSION, current_version, migrate
+from response_cache import ResourceVersions, ResponseCache
+from student_cache import StudentCache
+from columnar import ColumnarSnapshot, QueryError, parse_cohort_query
+from exporter import EXPORT_FORMATS, ExportError, export_chunks, iter_records, parse_timestamp
+from importer import (IMPORT_FORMATS, IMPORT_MODES, BulkImportError, ImportReport, detect_format,
+                      import_records, import_students, iter_rows)
+from training import train_from_records, train_synthetic, update_from_records
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key_here_change_in_production'
 
-# MySQL Configuration for XAMPP
-app.config['MYSQL_HOST'] = 'localhost'
-app.config['MYSQL_USER'] = 'root'
-app.config['MYSQL_PASSWORD'] = ''  # Empty for XAMPP default
-app.config['MYSQL_DB'] = 'student_performance_db'
+# MySQL Configuration for XAMPP; the MYSQL_* environment variables override
+# these defaults (e.g. MYSQL_DB=bench_db to serve a seeded benchmark database)
+app.config['MYSQL_HOST'] = os.environ.get('MYSQL_HOST', 'localhost')
+app.config['MYSQL_USER'] = os.environ.get('MYSQL_USER', 'root')
+app.config['MYSQL_PASSWORD'] = os.environ.get('MYSQL_PASSWORD', '')  # Empty for XAMPP default
+app.config['MYSQL_DB'] = os.environ.get('MYSQL_DB', 'student_performance_db')
 app.config['MYSQL_CURSORCLASS'] = 'DictCursor'
 
-mysql = MySQL(app)
+# Connection pool: connections are reused across requests instead of opened per
+# request. Checkouts wait up to MYSQL_POOL_TIMEOUT seconds when all are in use;
+# connections idle longer than the health check interval are pinged first.
+app.config['MYSQL_POOL_MIN_SIZE'] = 1
+app.config['MYSQL_POOL_MAX_SIZE'] = 10
+app.config['MYSQL_POOL_TIMEOUT'] = 5.0
+app.config['MYSQL_POOL_MAX_IDLE'] = 300.0
+app.config['MYSQL_POOL_MAX_LIFETIME'] = 3600.0
+app.config['MYSQL_POOL_HEALTH_CHECK_INTERVAL'] = 5.0
 
-# Create model directory
+# Request latency and phase timing histograms served at /metrics. Each worker
+# writes its totals to METRICS_DIR at most every FLUSH_INTERVAL seconds and
+# /metrics sums all workers' files
+app.config['METRICS_ENABLED'] = True
+app.config['METRICS_DIR'] = 'models/metrics'
+app.config['METRICS_FLUSH_INTERVAL'] = 1.0
+
+# On-demand profiling, off by default. When enabled, requests carrying a valid
+# X-Profile-Token header (see `flask profile-token`) or picked by sampling
+# (POST /api/profiles/sampling) are profiled by a stack sampler running every
+# PROFILING_INTERVAL seconds; the newest PROFILING_KEEP profiles are kept
+app.config['PROFILING_ENABLED'] = False
+app.config['PROFILING_DIR'] = 'models/profiles'
+app.config['PROFILING_INTERVAL'] = 0.001
+app.config['PROFILING_FORMAT'] = 'speedscope'
+app.config['PROFILING_KEEP'] = 100
+
+# How often (seconds) the in-memory model checks the artifact for changes
+app.config['MODEL_RELOAD_INTERVAL'] = 1.0
+
+# Synthetic training set size and parallelism (-1 = all cores)
+app.config['TRAIN_N_SAMPLES'] = 500
+app.config['TRAIN_N_JOBS'] = -1
+
+# Retraining from labeled performance_records: rows read per chunk, minimum
+# labeled rows required, and how many old model versions to keep for rollback
+app.config['RETRAIN_CHUNK_SIZE'] = 10000
+app.config['RETRAIN_MIN_SAMPLES'] = 50
+app.config['MODEL_KEEP_VERSIONS'] = 5
+
+# Incremental updates: trees added per update (fitted on records created since the
+# last update) and oldest trees retired per update (0 keeps them all)
+app.config['RETRAIN_NEW_TREES'] = 10
+app.config['RETRAIN_RETIRE_TREES'] = 0
+
+# Inference backend: 'compiled' (array-backed forest_engine) or 'sklearn'
+app.config['INFERENCE_ENGINE'] = 'compiled'
+
+# Serve the model from the memory-mapped forest artifact (shared between
+# pre-forked workers) instead of unpickling it in every process
+app.config['MODEL_MMAP_ENABLED'] = True
+
+# Maximum number of rows accepted by /api/predict/batch
+app.config['PREDICT_BATCH_MAX_ROWS'] = 10000
+
+# Micro-batching of concurrent single-row predictions: requests arriving within
+# the window (seconds) are scored together, up to the maximum batch size
+app.config['PREDICT_MICROBATCH_ENABLED'] = True
+app.config['PREDICT_MICROBATCH_WINDOW'] = 0.002
+app.config['PREDICT_MICROBATCH_MAX_SIZE'] = 64
+
+# LRU cache of single-row predictions (0 disables). With a quantum set, numeric
+# inputs are rounded to that step so near-identical requests share an entry.
+app.config['PREDICTION_CACHE_SIZE'] = 10000
+app.config['PREDICTION_CACHE_QUANTUM'] = None
+
+# Keyset pagination for list endpoints (/api/students, /api/records)
+app.config['API_PAGE_DEFAULT_LIMIT'] = 100
+app.config['API_PAGE_MAX_LIMIT'] = 1000
+
+# Rows fetched per round trip from the server-side cursor during exports
+app.config['EXPORT_BATCH_SIZE'] = 1000
+
+# Bulk import: rows per multi-row INSERT/commit, and how many rejected rows
+# the HTTP response lists (the CLI report lists all of them)
+app.config['IMPORT_CHUNK_SIZE'] = 1000
+app.config['IMPORT_MAX_REPORTED_REJECTIONS'] = 1000
+
+# In-process columnar copy of the records for /api/analytics/cohorts: new rows
+# are picked up at most every REFRESH_INTERVAL seconds, everything is reloaded
+# after MAX_AGE seconds (or at once when deletes or student edits are seen)
+app.config['COLUMNAR_REFRESH_INTERVAL'] = 2.0
+app.config['COLUMNAR_MAX_AGE'] = 300.0
+app.config['COLUMNAR_CHUNK_SIZE'] = 50000
+
+# Serialized GET responses kept per process for conditional requests (0 keeps
+# only the ETag/304 handling)
+app.config['RESPONSE_CACHE_SIZE'] = 256
+
+# Per-process cache of student rows and their records (lists are cached only
+# for students with at most MAX_RECORDS records); 0 size disables it
+app.config['STUDENT_CACHE_SIZE'] = 10000
+app.config['STUDENT_CACHE_TTL'] = 60.0
+app.config['STUDENT_CACHE_MAX_RECORDS'] = 50
+
+metrics = Metrics(
+    directory=app.config['METRICS_DIR'],
+    flush_interval=app.config['METRICS_FLUSH_INTERVAL'],
+    enabled=app.config['METRICS_ENABLED']
+)
+if metrics.enabled:
+    instrument_app(app, metrics)
+
+mysql = PooledMySQL(app, on_query=metrics.observe_query if metrics.enabled else None)
+
+request_profiler = None
+if app.config['PROFILING_ENABLED']:
+    request_profiler = RequestProfiler(
+        app.config['PROFILING_DIR'],
+        app.secret_key,
+        interval=app.config['PROFILING_INTERVAL'],
+        fmt=app.config['PROFILING_FORMAT'],
+        keep=app.config['PROFILING_KEEP']
+    )
+    # The profile endpoints take the same token; do not profile them
+    request_profiler.install(app, exclude=('api_get_profiles', 'api_get_profile',
+                                           'api_set_profile_sampling'))
+
+# Model artifacts; models/ and the files below are created on first use
 MODEL_PATH = 'models/performance_model.pkl'
-os.makedirs('models', exist_ok=True)
+FOREST_PATH = forest_path_for(MODEL_PATH)
+
+# Every trained model is kept as a version; promoting one replaces MODEL_PATH
+model_registry = ModelRegistry('models/versions', MODEL_PATH,
+                               keep=app.config['MODEL_KEEP_VERSIONS'])
+
+# Background training runs in a child process, never on a request thread
+retrain_job = RetrainJob('models/retrain_status.json')
 
-# Label encoders
-encoders = {}
+# Trained model kept resident in memory, hot-reloaded when MODEL_PATH changes
+model_holder = ModelHolder(
+    MODEL_PATH,
+    check_interval=app.config['MODEL_RELOAD_INTERVAL'],
+    forest_path=FOREST_PATH if app.config['MODEL_MMAP_ENABLED'] else None,
+    on_load=lambda seconds: metrics.observe('app_phase_duration_seconds', seconds,
+                                            phase='model_load')
+)
+
+# Columnar snapshot of performance records for cohort queries
+record_snapshot = ColumnarSnapshot(
+    refresh_interval=app.config['COLUMNAR_REFRESH_INTERVAL'],
+    max_age=app.config['COLUMNAR_MAX_AGE'],
+    chunk_size=app.config['COLUMNAR_CHUNK_SIZE']
+)
+
+# Version counters bumped by write routes (shared by all workers through an
+# mmap'd file) and the ETag-validated cache of read responses built on them
+resource_versions = ResourceVersions('models/resource_versions.bin')
+response_cache = ResponseCache(resource_versions, maxsize=app.config['RESPONSE_CACHE_SIZE'])
+
+# Student rows by id for the predict/records/edit pages and the student API,
+# validated against the same version counters
+student_cache = StudentCache(
+    resource_versions,
+    lambda: mysql.connection,
+    maxsize=app.config['STUDENT_CACHE_SIZE'],
+    ttl=app.config['STUDENT_CACHE_TTL'],
+    max_records=app.config['STUDENT_CACHE_MAX_RECORDS']
+)
 
 # Login required decorator
 def login_required(f):
@@ -46,138 +216,320 @@ def login_required(f):
     return decorated_function
 
 def init_db():
-    """Initialize database tables"""
-    try:
-        cur = mysql.connection.cursor()
-        
-        # Users table for authentication
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                full_name VARCHAR(100) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Students table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS students (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                age INT NOT NULL,
-                gender VARCHAR(10) NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Performance records table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS performance_records (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                student_id INT NOT NULL,
-                study_hours FLOAT NOT NULL,
-                previous_score FLOAT NOT NULL,
-                attendance_percentage FLOAT NOT NULL,
-                extracurricular VARCHAR(10) NOT NULL,
-                sleep_hours FLOAT NOT NULL,
-                tutoring VARCHAR(10) NOT NULL,
-                predicted_grade VARCHAR(5),
-                actual_grade VARCHAR(5),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
-            )
-        """)
-        
-        mysql.connection.commit()
-        cur.close()
-        print("Database initialized successfully!")
-    except Exception as e:
-        print(f"Database initialization error: {e}")
+    """Bring the database schema up to date (no DDL once it is current)"""
+    applied = migrate(mysql.connection)
+    if applied:
+        # Migrations may have rebuilt the analytics summary
+        resource_versions.bump('analytics')
+        print(f"Database migrated: {', '.join(applied)}")
+    else:
+        print("Database schema is up to date")
+    return applied
 
-def train_model():
-    """Train the ML model with sample data"""
-    np.random.seed(42)
-    n_samples = 500
-    
-    data = {
-        'study_hours': np.random.uniform(1, 10, n_samples),
-        'previous_score': np.random.uniform(40, 100, n_samples),
-        'attendance': np.random.uniform(50, 100, n_samples),
-        'extracurricular': np.random.choice(['Yes', 'No'], n_samples),
-        'sleep_hours': np.random.uniform(4, 10, n_samples),
-        'tutoring': np.random.choice(['Yes', 'No'], n_samples)
-    }
+def promote_model(meta):
+    """Make a saved model version live in this process and prune old versions"""
+    model_registry.promote(meta['version_id'])
+    model_registry.prune(meta['digest'])
+    model_holder.reload()
+    prediction_cache.clear()
+
+def train_model(n_samples=None):
+    """Train the ML model with synthetic sample data (blocking; startup and CLI only)"""
+    n_samples = n_samples or app.config['TRAIN_N_SAMPLES']
+    meta = train_synthetic(model_registry, n_samples, n_jobs=app.config['TRAIN_N_JOBS'])
+    promote_model(meta)
     
-    df = pd.DataFrame(data)
+    print("Model trained and saved successfully!")
+    print(f"Trained on {meta['n_samples']} samples in {meta['fit_seconds']}s "
+          f"(data {meta['data_mb']} MB, peak RSS {meta['peak_rss_mb']} MB)")
+    return meta
+
+def db_config():
+    """MySQLdb connection settings for work done outside a request"""
+    return {'host': app.config['MYSQL_HOST'], 'user': app.config['MYSQL_USER'],
+            'passwd': app.config['MYSQL_PASSWORD'], 'db': app.config['MYSQL_DB']}
+
+def db_env():
+    """MYSQL_* environment for training child processes"""
+    return {key: str(app.config[key])
+            for key in ('MYSQL_HOST', 'MYSQL_USER', 'MYSQL_PASSWORD', 'MYSQL_DB')}
+
+TRAINING_COMMANDS = {'records': 'retrain', 'incremental': 'update', 'synthetic': 'synthetic'}
+
+def start_training_job(source='records', new_trees=None, retire=None):
+    """Start background training from 'records', 'incremental' or 'synthetic' data"""
+    args = [TRAINING_COMMANDS[source],
+            '--model-path', MODEL_PATH,
+            '--versions-dir', model_registry.root,
+            '--keep', str(app.config['MODEL_KEEP_VERSIONS']),
+            '--n-jobs', str(app.config['TRAIN_N_JOBS'])]
+    if source == 'synthetic':
+        args += ['--samples', str(app.config['TRAIN_N_SAMPLES'])]
+    else:
+        args += ['--chunk-size', str(app.config['RETRAIN_CHUNK_SIZE']),
+                 '--min-samples', str(app.config['RETRAIN_MIN_SAMPLES'])]
+    if source == 'incremental':
+        args += ['--new-trees', str(new_trees or app.config['RETRAIN_NEW_TREES']),
+                 '--retire', str(retire if retire is not None else app.config['RETRAIN_RETIRE_TREES'])]
+    return retrain_job.start(args, env=db_env())
+
+class ModelNotReady(Exception):
+    """Raised when no model is available yet; one is being trained in the background"""
+
+def load_model():
+    """Return the in-memory model and encoders (reloaded if MODEL_PATH changed)"""
+    return model_holder.get()
+
+def load_pipeline():
+    """Return the FeaturePipeline for the current model
+
+    If there is no model yet, start training one in the background and raise
+    ModelNotReady instead of blocking the request.
+    """
+    snapshot = model_holder.snapshot()
+    if snapshot is None:
+        start_training_job('synthetic')
+        raise ModelNotReady('Model is being trained, please try again shortly')
+    return snapshot.pipeline
+
+def _predict_matrix(features, snapshot=None):
+    """Score a feature matrix with the given (default: current) in-memory model"""
+    snapshot = snapshot or model_holder.snapshot()
+    with metrics.phase('model_predict'):
+        if app.config['INFERENCE_ENGINE'] == 'compiled' or snapshot.model is None:
+            return snapshot.engine.predict(features)
+        return snapshot.model.predict(features)
+
+def _predict_versioned(features):
+    """Score a feature matrix; returns (grade, model version) per row"""
+    snapshot = model_holder.snapshot()
+    return [(grade, snapshot.version) for grade in _predict_matrix(features, snapshot)]
+
+prediction_batcher = PredictionBatcher(
+    _predict_versioned,
+    window=app.config['PREDICT_MICROBATCH_WINDOW'],
+    max_batch_size=app.config['PREDICT_MICROBATCH_MAX_SIZE']
+)
+
+prediction_cache = PredictionCache(
+    maxsize=app.config['PREDICTION_CACHE_SIZE'],
+    quantum=app.config['PREDICTION_CACHE_QUANTUM']
+)
+
+def encode_features(data):
+    """Validate and encode one input row with the current model's pipeline"""
+    pipeline = load_pipeline()
+    with metrics.phase('encode'):
+        return pipeline.transform_one(data)
+
+def predict_grade(features):
+    """Predict the grade for a single feature row, cached and micro-batched when enabled"""
+    with metrics.phase('inference'):
+        use_cache = prediction_cache.maxsize > 0
+        if use_cache:
+            # snapshot() also picks up a changed artifact, which empties the cache
+            version = model_holder.snapshot().version
+            features = prediction_cache.quantize(features)
+            cached = prediction_cache.get(version, features)
+            if cached is not None:
+                return cached
     
-    # IMPROVED GRADE CALCULATION
-    def calculate_grade(row):
-        # Weighted scoring system (more realistic)
-        score = (
-            row['previous_score'] * 0.40 +      # 40% weightage - most important
-            row['attendance'] * 0.25 +          # 25% weightage
-            row['study_hours'] * 3.5 +          # Study hours impact
-            (5 if row['extracurricular'] == 'Yes' else 0) +  # Bonus points
-            row['sleep_hours'] * 1.5 +          # Sleep impact
-            (5 if row['tutoring'] == 'Yes' else 0)  # Tutoring bonus
-        )
-        
-        # More realistic grade thresholds
-        if score >= 85:
-            return 'A'
-        elif score >= 70:
-            return 'B'
-        elif score >= 55:
-            return 'C'
-        elif score >= 40:
-            return 'D'
+        # Cache under the version that actually scored the row
+        if app.config['PREDICT_MICROBATCH_ENABLED']:
+            predicted_grade, version = prediction_batcher.predict(features)
         else:
-            return 'F'
-    
-    df['grade'] = df.apply(calculate_grade, axis=1)
-    
-    # Encode categorical variables
-    le_extra = LabelEncoder()
-    le_tutor = LabelEncoder()
-    
-    df['extracurricular_encoded'] = le_extra.fit_transform(df['extracurricular'])
-    df['tutoring_encoded'] = le_tutor.fit_transform(df['tutoring'])
-    
-    encoders['extracurricular'] = le_extra
-    encoders['tutoring'] = le_tutor
+            predicted_grade, version = _predict_versioned(features.reshape(1, -1))[0]
     
-    # Prepare features and target
-    X = df[['study_hours', 'previous_score', 'attendance', 
-            'extracurricular_encoded', 'sleep_hours', 'tutoring_encoded']]
-    y = df['grade']
-    
-    # Train model
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X, y)
-    
-    # Save model and encoders
-    with open(MODEL_PATH, 'wb') as f:
-        pickle.dump({'model': model, 'encoders': encoders}, f)
-    
-    print("Model trained and saved successfully!")
-    return model
+        if use_cache:
+            prediction_cache.put(version, features, predicted_grade)
+        return predicted_grade
 
-def load_model():
-    """Load the trained model"""
-    if os.path.exists(MODEL_PATH):
-        with open(MODEL_PATH, 'rb') as f:
-            saved_data = pickle.load(f)
-            return saved_data['model'], saved_data['encoders']
-    return None, None
-
-# Initialize database and train model on startup
-with app.app_context():
+@app.cli.command('train-model')
+@click.option('--samples', type=int, default=None, help='Number of synthetic training samples')
+def train_model_command(samples):
+    """Train the model on synthetic data and save it"""
+    train_model(samples)
+
+@app.cli.command('retrain-model')
+def retrain_model_command():
+    """Train on labeled performance_records and promote the new version"""
+    meta = train_from_records(
+        model_registry,
+        db_config(),
+        chunk_size=app.config['RETRAIN_CHUNK_SIZE'],
+        n_jobs=app.config['TRAIN_N_JOBS'],
+        min_samples=app.config['RETRAIN_MIN_SAMPLES']
+    )
+    promote_model(meta)
+    print(f"Promoted model version {meta['version_id']} "
+          f"(holdout accuracy {meta['holdout_accuracy']})")
+
+@app.cli.command('update-model')
+@click.option('--new-trees', type=int, default=None, help='Trees to add')
+@click.option('--retire', type=int, default=None, help='Oldest trees to drop')
+def update_model_command(new_trees, retire):
+    """Add trees fitted on records created since the last update"""
+    meta = update_from_records(
+        model_registry,
+        db_config(),
+        n_new_trees=new_trees or app.config['RETRAIN_NEW_TREES'],
+        retire=retire if retire is not None else app.config['RETRAIN_RETIRE_TREES'],
+        chunk_size=app.config['RETRAIN_CHUNK_SIZE'],
+        n_jobs=app.config['TRAIN_N_JOBS'],
+        min_samples=app.config['RETRAIN_MIN_SAMPLES']
+    )
+    promote_model(meta)
+    print(f"Promoted model version {meta['version_id']} with {meta['n_estimators']} trees "
+          f"(holdout accuracy {meta['holdout_accuracy_before']} -> {meta['holdout_accuracy']})")
+
+@app.cli.command('export-records')
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)), default='ndjson')
+@click.option('--since', default=None, help='Only records created at or after this time')
+@click.option('--until', default=None, help='Only records created before this time')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output')
+@click.option('--output', '-o', default='-', help='Output file (default: stdout)')
+def export_records_command(fmt, since, until, compress, output):
+    """Stream performance records to a file as NDJSON or CSV"""
+    import MySQLdb
+
+    try:
+        since = parse_timestamp(since, 'since')
+        until = parse_timestamp(until, 'until')
+    except ExportError as e:
+        raise click.BadParameter(str(e))
+
+    count = 0
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    conn = MySQLdb.connect(**db_config())
+    out = sys.stdout.buffer if output == '-' else open(output, 'wb')
+    try:
+        rows = counted(iter_records(conn, since, until, app.config['EXPORT_BATCH_SIZE']))
+        for chunk in export_chunks(rows, fmt, compress):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        conn.close()
+    click.echo(f"Exported {count} records", err=True)
+
+def invalidate_after_import(report):
+    """Invalidate what a bulk import may have changed"""
+    if report.inserted or report.updated:
+        resource_versions.bump_all()
+    if report.updated:
+        # Upserted students may have a new age or gender
+        record_snapshot.invalidate()
+
+def _run_import_command(kind, path, fmt, chunk_size, report_path, mode=None):
+    """Shared body of the import-students and import-records commands"""
+    import MySQLdb
+    from MySQLdb import cursors
+
+    try:
+        fmt = detect_format(fmt, filename=path)
+    except BulkImportError as e:
+        raise click.BadParameter(str(e))
+    chunk_size = chunk_size or app.config['IMPORT_CHUNK_SIZE']
+    if kind == 'records':
+        # Unlike load_pipeline(), never start a background training job from the CLI
+        snapshot = model_holder.snapshot()
+        if snapshot is None:
+            raise click.ClickException('No trained model; run `flask init-db` or '
+                                       '`flask train-model` before importing records')
+
+    conn = MySQLdb.connect(cursorclass=cursors.DictCursor, **db_config())
+    report = ImportReport(keep=None)
+    try:
+        with open(path, 'rb') as f:
+            rows = iter_rows(f, fmt)
+            if kind == 'students':
+                import_students(conn, rows, chunk_size, mode, report)
+            else:
+                import_records(conn, rows, snapshot.pipeline, _predict_matrix, chunk_size, report)
+    finally:
+        conn.close()
+        invalidate_after_import(report)
+
+    print(f"Processed {report.processed} rows: {report.inserted} inserted, "
+          f"{report.updated} updated, {report.rejected} rejected")
+    if report_path and report.rejections:
+        with open(report_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['line', 'error'])
+            for rejection in report.rejections:
+                writer.writerow([rejection['line'], rejection['error']])
+        print(f"Rejected rows written to {report_path}")
+    elif report.rejections:
+        for rejection in report.rejections[:20]:
+            print(f"  line {rejection['line']}: {rejection['error']}")
+        if report.rejected > 20:
+            print(f"  ... {report.rejected - 20} more (use --report to save all)")
+
+@app.cli.command('import-students')
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None)
+@click.option('--mode', type=click.Choice(IMPORT_MODES), default='upsert',
+              help='upsert updates students whose email exists, insert rejects them')
+@click.option('--chunk-size', type=int, default=None, help='Rows per INSERT and commit')
+@click.option('--report', 'report_path', default=None, help='Write rejected rows to this CSV')
+def import_students_command(path, fmt, mode, chunk_size, report_path):
+    """Bulk import students from a CSV or NDJSON file"""
+    _run_import_command('students', path, fmt, chunk_size, report_path, mode)
+
+@app.cli.command('import-records')
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None)
+@click.option('--chunk-size', type=int, default=None, help='Rows per INSERT and commit')
+@click.option('--report', 'report_path', default=None, help='Write rejected rows to this CSV')
+def import_records_command(path, fmt, chunk_size, report_path):
+    """Bulk import performance records from a CSV or NDJSON file"""
+    _run_import_command('records', path, fmt, chunk_size, report_path)
+
+@app.cli.command('migrate-db')
+@click.option('--status', is_flag=True, help='Only show the current schema version')
+def migrate_db_command(status):
+    """Apply pending schema migrations"""
+    if status:
+        cur = mysql.connection.cursor()
+        version = current_version(cur)
+        cur.close()
+        print(f"Schema version {version} of {LATEST_VERSION}")
+        return
+    applied = migrate(mysql.connection)
+    if applied:
+        resource_versions.bump('analytics')
+    print(f"Applied {len(applied)} migration(s)" + (f": {', '.join(applied)}" if applied else ""))
+
+@app.cli.command('profile-token')
+@click.option('--ttl', type=int, default=3600, help='Seconds the token stays valid')
+def profile_token_command(ttl):
+    """Print a signed token for the X-Profile-Token header"""
+    if request_profiler is None:
+        raise click.ClickException('Profiling is disabled (PROFILING_ENABLED)')
+    print(request_profiler.token(ttl))
+
+@app.cli.command('rebuild-analytics')
+def rebuild_analytics_command():
+    """Recompute the analytics summary and daily rollup from the base tables"""
+    cur = mysql.connection.cursor()
+    totals = rebuild_summary(cur)
+    mysql.connection.commit()
+    cur.close()
+    resource_versions.bump('analytics')
+    print(f"Analytics summary rebuilt: {totals['total_students']} students, "
+          f"{totals['total_records']} records")
+
+@app.cli.command('init-db')
+@click.option('--skip-train', is_flag=True, help='Do not train a model when none exists')
+def init_db_command(skip_train):
+    """Migrate the schema and train the first model if none exists"""
     init_db()
-    if not os.path.exists(MODEL_PATH):
+    if not skip_train and not os.path.exists(MODEL_PATH):
         train_model()
 
 # ==================== AUTHENTICATION ROUTES ====================
@@ -270,18 +622,14 @@ def dashboard():
     try:
         cur = mysql.connection.cursor()
         
-        # Get statistics
-        cur.execute("SELECT COUNT(*) as count FROM students")
-        total_students = cur.fetchone()['count']
-        
-        cur.execute("SELECT COUNT(*) as count FROM performance_records")
-        total_predictions = cur.fetchone()['count']
+        # Get statistics from the maintained summary
+        summary = read_summary(cur)
         
         cur.close()
         
         return render_template('dashboard.html', 
-                             total_students=total_students,
-                             total_predictions=total_predictions)
+                             total_students=summary['total_students'],
+                             total_predictions=summary['total_predictions'])
     except Exception as e:
         flash(f'Error: {str(e)}', 'danger')
         return render_template('dashboard.html', 
@@ -320,8 +668,10 @@ def add_student():
                 "INSERT INTO students (name, age, gender, email) VALUES (%s, %s, %s, %s)",
                 (name, age, gender, email)
             )
+            students_added(cur)
             mysql.connection.commit()
             cur.close()
+            resource_versions.bump('students')
             
             flash('Student added successfully!', 'success')
             return redirect(url_for('students'))
@@ -334,10 +684,7 @@ def add_student():
 @login_required
 def predict(student_id):
     """Predict student performance"""
-    cur = mysql.connection.cursor()
-    cur.execute("SELECT * FROM students WHERE id = %s", (student_id,))
-    student = cur.fetchone()
-    cur.close()
+    student = student_cache.get(student_id)
     
     if not student:
         flash('Student not found!', 'danger')
@@ -345,27 +692,15 @@ def predict(student_id):
     
     if request.method == 'POST':
         try:
-            study_hours = float(request.form['study_hours'])
-            previous_score = float(request.form['previous_score'])
-            attendance = float(request.form['attendance'])
+            features = encode_features(request.form)
+            study_hours = float(features[0])
+            previous_score = float(features[1])
+            attendance = float(features[2])
+            sleep_hours = float(features[4])
             extracurricular = request.form['extracurricular']
-            sleep_hours = float(request.form['sleep_hours'])
             tutoring = request.form['tutoring']
             
-            model, encoders = load_model()
-            
-            if model is None:
-                flash('Model not found. Training new model...', 'warning')
-                model = train_model()
-                model, encoders = load_model()
-            
-            extra_encoded = encoders['extracurricular'].transform([extracurricular])[0]
-            tutor_encoded = encoders['tutoring'].transform([tutoring])[0]
-            
-            features = np.array([[study_hours, previous_score, attendance, 
-                                extra_encoded, sleep_hours, tutor_encoded]])
-            
-            predicted_grade = model.predict(features)[0]
+            predicted_grade = predict_grade(features)
             
             cur = mysql.connection.cursor()
             cur.execute("""
@@ -375,13 +710,18 @@ def predict(student_id):
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             """, (student_id, study_hours, previous_score, attendance, 
                   extracurricular, sleep_hours, tutoring, predicted_grade))
+            record_added(cur, student_id, predicted_grade, study_hours, previous_score, attendance,
+                         sleep_hours)
             mysql.connection.commit()
             cur.close()
+            student_cache.revalidate(student_id,
+                                     resource_versions.bump('records', f'student:{student_id}'))
             
             flash(f'Predicted Grade: {predicted_grade}', 'success')
             return redirect(url_for('student_records', student_id=student_id))
         
-            
+        except ModelNotReady as e:
+            flash(f'Model not found. {e}', 'warning')
         except Exception as e:
             flash(f'Prediction error: {str(e)}', 'danger')
     
@@ -392,17 +732,8 @@ def predict(student_id):
 def student_records(student_id):
     """View student's performance records"""
     try:
-        cur = mysql.connection.cursor()
-        cur.execute("SELECT * FROM students WHERE id = %s", (student_id,))
-        student = cur.fetchone()
-        
-        cur.execute("""
-            SELECT * FROM performance_records 
-            WHERE student_id = %s 
-            ORDER BY created_at DESC
-        """, (student_id,))
-        records = cur.fetchall()
-        cur.close()
+        student = student_cache.get(student_id)
+        records = student_cache.records(student_id)
         
         return render_template('student_records.html', student=student, records=records)
     except Exception as e:
@@ -414,8 +745,6 @@ def student_records(student_id):
 @login_required
 def edit_student(student_id):
     """Edit student information"""
-    cur = mysql.connection.cursor()
-    
     if request.method == 'POST':
         try:
             name = request.form['name']
@@ -423,6 +752,7 @@ def edit_student(student_id):
             gender = request.form['gender']
             email = request.form['email']
             
+            cur = mysql.connection.cursor()
             cur.execute("""
                 UPDATE students 
                 SET name = %s, age = %s, gender = %s, email = %s 
@@ -430,6 +760,10 @@ def edit_student(student_id):
             """, (name, age, gender, email, student_id))
             mysql.connection.commit()
             cur.close()
+            record_snapshot.invalidate()
+            student_cache.revalidate(
+                student_id, resource_versions.bump('students', 'records', f'student:{student_id}'),
+                {'name': name, 'age': age, 'gender': gender, 'email': email})
             
             flash('Student updated successfully!', 'success')
             return redirect(url_for('students'))
@@ -437,9 +771,7 @@ def edit_student(student_id):
             flash(f'Error: {str(e)}', 'danger')
     
     # GET request - show form with current data
-    cur.execute("SELECT * FROM students WHERE id = %s", (student_id,))
-    student = cur.fetchone()
-    cur.close()
+    student = student_cache.get(student_id)
     
     if not student:
         flash('Student not found!', 'danger')
@@ -453,26 +785,13 @@ def analytics():
     """View analytics dashboard"""
     try:
         cur = mysql.connection.cursor()
-        
-        cur.execute("SELECT COUNT(*) as count FROM students")
-        total_students = cur.fetchone()['count']
-        
-        cur.execute("SELECT COUNT(*) as count FROM performance_records")
-        total_predictions = cur.fetchone()['count']
-        
-        cur.execute("""
-            SELECT predicted_grade, COUNT(*) as count 
-            FROM performance_records 
-            GROUP BY predicted_grade
-        """)
-        grade_distribution = cur.fetchall()
-        
+        summary = read_summary(cur)
         cur.close()
         
         return render_template('analytics.html', 
-                             total_students=total_students,
-                             total_predictions=total_predictions,
-                             grade_distribution=grade_distribution)
+                             total_students=summary['total_students'],
+                             total_predictions=summary['total_predictions'],
+                             grade_distribution=summary['grade_distribution'])
     except Exception as e:
         flash(f'Error: {str(e)}', 'danger')
         return render_template('analytics.html', 
@@ -512,10 +831,15 @@ def delete_student(student_id):
     """Delete a student"""
     try:
         cur = mysql.connection.cursor()
-        cur.execute("DELETE FROM students WHERE id = %s", (student_id,))
+        deleted = delete_student_tracked(cur, student_id)
         mysql.connection.commit()
         cur.close()
-        flash('Student deleted successfully!', 'success')
+        if deleted:
+            resource_versions.bump('students', 'records', f'student:{student_id}')
+            student_cache.invalidate(student_id)
+            flash('Student deleted successfully!', 'success')
+        else:
+            flash('Student not found!', 'danger')
     except Exception as e:
         flash(f'Error: {str(e)}', 'danger')
     
@@ -528,22 +852,33 @@ def delete_student(student_id):
 # =========================
 
 @app.route('/api/students', methods=['GET'])
+@response_cache.conditional('students')
 def api_get_all_students():
     """
-    REST API: Get all students
-    Returns: JSON array of all students
+    REST API: Get students, newest first, one page at a time
+    Query: limit (default 100), cursor (next_cursor from the previous page)
+    Returns: JSON array of students and the cursor for the next page
     """
     try:
+        limit = parse_limit(request.args.get('limit'), app.config['API_PAGE_DEFAULT_LIMIT'],
+                            app.config['API_PAGE_MAX_LIMIT'])
         cur = mysql.connection.cursor()
-        cur.execute("SELECT * FROM students ORDER BY created_at DESC")
-        students = cur.fetchall()
+        students, next_cursor = fetch_page(cur, "SELECT * FROM students", 'students',
+                                           limit, request.args.get('cursor'))
         cur.close()
         
         return jsonify({
             'success': True,
             'count': len(students),
-            'data': students
+            'data': students,
+            'limit': limit,
+            'next_cursor': next_cursor
         }), 200
+    except CursorError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -552,16 +887,14 @@ def api_get_all_students():
 
 
 @app.route('/api/students/<int:student_id>', methods=['GET'])
+@response_cache.conditional('student:{student_id}')
 def api_get_student(student_id):
     """
     REST API: Get single student by ID
     Returns: JSON object of student
     """
     try:
-        cur = mysql.connection.cursor()
-        cur.execute("SELECT * FROM students WHERE id = %s", (student_id,))
-        student = cur.fetchone()
-        cur.close()
+        student = student_cache.get(student_id)
         
         if student:
             return jsonify({
@@ -607,9 +940,11 @@ def api_create_student():
             "INSERT INTO students (name, age, gender, email) VALUES (%s, %s, %s, %s)",
             (name, age, gender, email)
         )
+        students_added(cur)
         mysql.connection.commit()
         student_id = cur.lastrowid
         cur.close()
+        resource_versions.bump('students')
         
         return jsonify({
             'success': True,
@@ -629,6 +964,66 @@ def api_create_student():
         }), 500
 
 
+def _import_upload(kind):
+    """Shared body of the student and record import endpoints"""
+    try:
+        upload = request.files.get('file')
+        stream = upload.stream if upload else request.stream
+        fmt = detect_format(request.args.get('format'),
+                            filename=upload.filename if upload else None,
+                            content_type=request.content_type)
+        mode = request.args.get('mode', 'upsert')
+        if mode not in IMPORT_MODES:
+            raise BulkImportError(f'mode must be one of: {", ".join(IMPORT_MODES)}')
+        chunk_size = int(request.args.get('chunk_size', app.config['IMPORT_CHUNK_SIZE']))
+        if chunk_size < 1:
+            raise BulkImportError('chunk_size must be at least 1')
+    except (BulkImportError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    try:
+        report = ImportReport(keep=app.config['IMPORT_MAX_REPORTED_REJECTIONS'])
+        rows = iter_rows(stream, fmt)
+        if kind == 'students':
+            import_students(mysql.connection, rows, chunk_size, mode, report)
+        else:
+            try:
+                pipeline = load_pipeline()
+            except ModelNotReady as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 503
+            import_records(mysql.connection, rows, pipeline, _predict_matrix, chunk_size, report)
+        
+        invalidate_after_import(report)
+        written = report.inserted + report.updated
+        return jsonify({
+            'success': written > 0,
+            'message': f'{written} of {report.processed} rows imported',
+            'data': report.as_dict()
+        }), 201 if written else 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/students/import', methods=['POST'])
+def api_import_students():
+    """
+    REST API: Bulk import students from a CSV or NDJSON upload
+    Body: the file itself, or multipart form field "file"
+    Query: format (csv or ndjson), mode (upsert or insert), chunk_size
+    Returns: JSON import report with per-row rejections
+    """
+    return _import_upload('students')
+
+
 @app.route('/api/students/<int:student_id>', methods=['PUT'])
 def api_update_student(student_id):
     """
@@ -651,18 +1046,15 @@ def api_update_student(student_id):
         gender = data['gender']
         email = data['email']
         
-        cur = mysql.connection.cursor()
-        
         # Check if student exists
-        cur.execute("SELECT * FROM students WHERE id = %s", (student_id,))
-        if not cur.fetchone():
-            cur.close()
+        if not student_cache.get(student_id):
             return jsonify({
                 'success': False,
                 'error': 'Student not found'
             }), 404
         
         # Update student
+        cur = mysql.connection.cursor()
         cur.execute("""
             UPDATE students 
             SET name = %s, age = %s, gender = %s, email = %s 
@@ -670,6 +1062,10 @@ def api_update_student(student_id):
         """, (name, age, gender, email, student_id))
         mysql.connection.commit()
         cur.close()
+        record_snapshot.invalidate()
+        student_cache.revalidate(
+            student_id, resource_versions.bump('students', 'records', f'student:{student_id}'),
+            {'name': name, 'age': age, 'gender': gender, 'email': email})
         
         return jsonify({
             'success': True,
@@ -698,19 +1094,17 @@ def api_delete_student(student_id):
     try:
         cur = mysql.connection.cursor()
         
-        # Check if student exists
-        cur.execute("SELECT * FROM students WHERE id = %s", (student_id,))
-        if not cur.fetchone():
+        # Delete student (records cascade) and update the analytics summary
+        if not delete_student_tracked(cur, student_id):
             cur.close()
             return jsonify({
                 'success': False,
                 'error': 'Student not found'
             }), 404
-        
-        # Delete student
-        cur.execute("DELETE FROM students WHERE id = %s", (student_id,))
         mysql.connection.commit()
         cur.close()
+        resource_versions.bump('students', 'records', f'student:{student_id}')
+        student_cache.invalidate(student_id)
         
         return jsonify({
             'success': True,
@@ -728,35 +1122,115 @@ def api_delete_student(student_id):
 # =================================
 
 @app.route('/api/records', methods=['GET'])
+@response_cache.conditional('records', 'students')
 def api_get_all_records():
     """
-    REST API: Get all performance records
-    Returns: JSON array of all records
+    REST API: Get performance records, newest first, one page at a time
+    Query: limit (default 100), cursor (next_cursor from the previous page)
+    Returns: JSON array of records and the cursor for the next page
     """
     try:
+        limit = parse_limit(request.args.get('limit'), app.config['API_PAGE_DEFAULT_LIMIT'],
+                            app.config['API_PAGE_MAX_LIMIT'])
         cur = mysql.connection.cursor()
-        cur.execute("""
+        records, next_cursor = fetch_page(cur, """
             SELECT pr.*, s.name as student_name 
             FROM performance_records pr
             JOIN students s ON pr.student_id = s.id
-            ORDER BY pr.created_at DESC
-        """)
-        records = cur.fetchall()
+        """, 'pr', limit, request.args.get('cursor'))
         cur.close()
         
         return jsonify({
             'success': True,
             'count': len(records),
-            'data': records
+            'data': records,
+            'limit': limit,
+            'next_cursor': next_cursor
         }), 200
+    except CursorError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/records/import', methods=['POST'])
+def api_import_records():
+    """
+    REST API: Bulk import performance records from a CSV or NDJSON upload
+    Body: the file itself, or multipart form field "file"
+    Query: format (csv or ndjson), chunk_size
+    Returns: JSON import report with per-row rejections
+    """
+    return _import_upload('records')
+
+
+@app.route('/api/records/export', methods=['GET'])
+def api_export_records():
+    """
+    REST API: Stream performance records (joined with students) for reporting
+    Query: format (ndjson or csv), since/until (created_at range), gzip=1
+    Returns: streamed NDJSON or CSV file, oldest record first
+    """
+    try:
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            raise ExportError(f'format must be one of: {", ".join(EXPORT_FORMATS)}')
+        since = parse_timestamp(request.args.get('since'), 'since')
+        until = parse_timestamp(request.args.get('until'), 'until')
+        compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    except ExportError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    # The export holds its own connection for the life of the stream, not the
+    # request's: an unbuffered cursor blocks its connection until fully read
+    try:
+        entry = mysql.pool.acquire()
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+    state = {'finished': False, 'released': False}
+
+    def release():
+        if not state['released']:
+            state['released'] = True
+            # A partially read result set leaves the connection unusable
+            mysql.pool.release(entry, discard=not state['finished'])
+
+    def generate():
+        try:
+            rows = iter_records(entry.raw, since, until, app.config['EXPORT_BATCH_SIZE'])
+            yield from export_chunks(rows, fmt, compress)
+            state['finished'] = True
+        except Exception as e:
+            print(f"Export error: {e}")
+            raise
+        finally:
+            release()
+
+    filename = f'performance_records.{"csv" if fmt == "csv" else "ndjson"}'
+    if compress:
+        filename += '.gz'
+    response = Response(generate(),
+                        mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.call_on_close(release)
+    return response
+
 
 @app.route('/api/records/<int:record_id>', methods=['GET'])
+@response_cache.conditional('records', 'students')
 def api_get_record(record_id):
     """
     REST API: Get single performance record by ID
@@ -791,20 +1265,14 @@ def api_get_record(record_id):
 
 
 @app.route('/api/records/student/<int:student_id>', methods=['GET'])
+@response_cache.conditional('student:{student_id}')
 def api_get_student_records(student_id):
     """
     REST API: Get all records for a specific student
     Returns: JSON array of student's records
     """
     try:
-        cur = mysql.connection.cursor()
-        cur.execute("""
-            SELECT * FROM performance_records 
-            WHERE student_id = %s 
-            ORDER BY created_at DESC
-        """, (student_id,))
-        records = cur.fetchall()
-        cur.close()
+        records = student_cache.records(student_id)
         
         return jsonify({
             'success': True,
@@ -839,30 +1307,30 @@ def api_create_prediction():
             }), 400
         
         student_id = int(data['student_id'])
-        study_hours = float(data['study_hours'])
-        previous_score = float(data['previous_score'])
-        attendance = float(data['attendance'])
-        extracurricular = data['extracurricular']
-        sleep_hours = float(data['sleep_hours'])
-        tutoring = data['tutoring']
-        
-        # Load model
-        model, encoders = load_model()
-        
-        if model is None:
-            model = train_model()
-            model, encoders = load_model()
         
-        # Encode categorical variables
-        extra_encoded = encoders['extracurricular'].transform([extracurricular])[0]
-        tutor_encoded = encoders['tutoring'].transform([tutoring])[0]
+        # Validate and encode features
+        try:
+            features = encode_features(data)
+        except FeatureError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        except ModelNotReady as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 503
         
-        # Prepare features
-        features = np.array([[study_hours, previous_score, attendance, 
-                            extra_encoded, sleep_hours, tutor_encoded]])
+        study_hours = float(features[0])
+        previous_score = float(features[1])
+        attendance = float(features[2])
+        extracurricular = data['extracurricular']
+        sleep_hours = float(features[4])
+        tutoring = data['tutoring']
         
-        # Predict
-        predicted_grade = model.predict(features)[0]
+        # Predict (grouped with concurrent requests into one model call)
+        predicted_grade = predict_grade(features)
         
         # Save to database
         cur = mysql.connection.cursor()
@@ -873,9 +1341,13 @@ def api_create_prediction():
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """, (student_id, study_hours, previous_score, attendance, 
               extracurricular, sleep_hours, tutoring, predicted_grade))
+        record_added(cur, student_id, predicted_grade, study_hours, previous_score, attendance,
+                     sleep_hours)
         mysql.connection.commit()
         record_id = cur.lastrowid
         cur.close()
+        student_cache.revalidate(student_id,
+                                 resource_versions.bump('records', f'student:{student_id}'))
         
         return jsonify({
             'success': True,
@@ -899,6 +1371,133 @@ def api_create_prediction():
         }), 500
 
 
+@app.route('/api/predict/batch', methods=['POST'])
+def api_create_predictions_batch():
+    """
+    REST API: Create predictions for many students at once
+    Request Body: JSON array of prediction inputs (or {"records": [...]})
+    Returns: JSON with predicted grades and per-row errors
+    """
+    try:
+        data = request.get_json()
+        rows = data.get('records') if isinstance(data, dict) else data
+        
+        if not isinstance(rows, list) or not rows:
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a non-empty array of records'
+            }), 400
+        
+        max_rows = app.config['PREDICT_BATCH_MAX_ROWS']
+        if len(rows) > max_rows:
+            return jsonify({
+                'success': False,
+                'error': f'Too many records: at most {max_rows} per batch'
+            }), 400
+        
+        n = len(rows)
+        
+        # Validate and encode every row column-wise into one matrix
+        try:
+            pipeline = load_pipeline()
+            with metrics.phase('encode_batch'):
+                X, errors = pipeline.transform(rows)
+        except ModelNotReady as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 503
+        
+        student_ids = np.full(n, -1, dtype=np.int64)
+        for i, row in enumerate(rows):
+            if errors[i] is not None:
+                continue
+            if 'student_id' not in row:
+                errors[i] = 'Missing required fields: student_id'
+                continue
+            try:
+                student_ids[i] = int(row['student_id'])
+            except (TypeError, ValueError):
+                errors[i] = 'Invalid value for student_id'
+        
+        # Reject rows that reference unknown students with one lookup
+        cur = mysql.connection.cursor()
+        candidate_ids = sorted({int(student_ids[i]) for i in range(n) if errors[i] is None})
+        if candidate_ids:
+            placeholders = ', '.join(['%s'] * len(candidate_ids))
+            cur.execute(f"SELECT id FROM students WHERE id IN ({placeholders})", candidate_ids)
+            existing_ids = {row['id'] for row in cur.fetchall()}
+            for i in range(n):
+                if errors[i] is None and int(student_ids[i]) not in existing_ids:
+                    errors[i] = 'Student not found'
+        
+        valid = np.array([i for i in range(n) if errors[i] is None], dtype=np.intp)
+        results = []
+        
+        if len(valid):
+            # Predict the whole matrix in one call
+            predicted_grades = _predict_matrix(X[valid])
+            
+            params = []
+            for i, predicted_grade in zip(valid, predicted_grades):
+                row = rows[i]
+                params.append((int(student_ids[i]), float(X[i, 0]), float(X[i, 1]),
+                               float(X[i, 2]), row['extracurricular'], float(X[i, 4]),
+                               row['tutoring'], str(predicted_grade)))
+                results.append({
+                    'index': int(i),
+                    'student_id': int(student_ids[i]),
+                    'predicted_grade': str(predicted_grade)
+                })
+            
+            # executemany turns this into a single multi-row INSERT
+            try:
+                cur.executemany("""
+                    INSERT INTO performance_records 
+                    (student_id, study_hours, previous_score, attendance_percentage, 
+                    extracurricular, sleep_hours, tutoring, predicted_grade)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """, params)
+                delta = SummaryDelta()
+                for values in params:
+                    delta.add_record(values[0], values[7], values[1], values[2], values[3], values[5])
+                delta.apply(cur)
+                mysql.connection.commit()
+            except Exception:
+                mysql.connection.rollback()
+                raise
+            written_ids = {values[0] for values in params}
+            bumped = resource_versions.bump('records', *(f'student:{i}' for i in written_ids))
+            for student_id in written_ids:
+                student_cache.revalidate(student_id, bumped)
+        
+        cur.close()
+        
+        row_errors = [{'index': i, 'error': error} for i, error in enumerate(errors) if error]
+        
+        if not results:
+            return jsonify({
+                'success': False,
+                'error': 'No valid records in batch',
+                'errors': row_errors
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'message': f'{len(results)} of {n} predictions created successfully',
+            'count': n,
+            'inserted': len(results),
+            'failed': len(row_errors),
+            'data': results,
+            'errors': row_errors
+        }), 201
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/api/records/<int:record_id>', methods=['DELETE'])
 def api_delete_record(record_id):
     """
@@ -908,19 +1507,18 @@ def api_delete_record(record_id):
     try:
         cur = mysql.connection.cursor()
         
-        # Check if record exists
-        cur.execute("SELECT * FROM performance_records WHERE id = %s", (record_id,))
-        if not cur.fetchone():
+        # Delete record and update the analytics summary
+        student_id = delete_record_tracked(cur, record_id)
+        if student_id is None:
             cur.close()
             return jsonify({
                 'success': False,
                 'error': 'Record not found'
             }), 404
-        
-        # Delete record
-        cur.execute("DELETE FROM performance_records WHERE id = %s", (record_id,))
         mysql.connection.commit()
         cur.close()
+        student_cache.revalidate(student_id,
+                                 resource_versions.bump('records', f'student:{student_id}'))
         
         return jsonify({
             'success': True,
@@ -933,11 +1531,410 @@ def api_delete_record(record_id):
         }), 500
 
 
+# ====================
+# API: MODEL ENDPOINTS
+# ====================
+
+@app.route('/api/model', methods=['GET'])
+def api_get_model():
+    """
+    REST API: Get information about the loaded model
+    Returns: JSON with model path, version and load time
+    """
+    model_holder.snapshot()
+    return jsonify({
+        'success': True,
+        'data': model_holder.info()
+    }), 200
+
+
+@app.route('/api/model/reload', methods=['POST'])
+def api_reload_model():
+    """
+    REST API: Force the model to be reloaded from disk
+    Returns: JSON with the newly loaded model version
+    """
+    try:
+        if model_holder.reload() is None:
+            return jsonify({
+                'success': False,
+                'error': 'Model file not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'message': 'Model reloaded successfully',
+            'data': model_holder.info()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/model/retrain', methods=['POST'])
+def api_retrain_model():
+    """
+    REST API: Retrain the model in a background process
+    Request Body: optional JSON with source ("records", "incremental" or "synthetic"),
+                  and new_trees / retire for incremental updates
+    Returns: JSON with the job status
+    """
+    data = request.get_json(silent=True) or {}
+    source = data.get('source', 'records')
+    
+    if source not in TRAINING_COMMANDS:
+        return jsonify({
+            'success': False,
+            'error': 'source must be "records", "incremental" or "synthetic"'
+        }), 400
+    
+    try:
+        new_trees = int(data['new_trees']) if 'new_trees' in data else None
+        retire = int(data['retire']) if 'retire' in data else None
+        if (new_trees is not None and new_trees < 1) or (retire is not None and retire < 0):
+            return jsonify({
+                'success': False,
+                'error': 'new_trees must be at least 1 and retire at least 0'
+            }), 400
+        
+        if not start_training_job(source, new_trees, retire):
+            return jsonify({
+                'success': False,
+                'error': 'A training job is already running',
+                'data': retrain_job.status()
+            }), 409
+        
+        return jsonify({
+            'success': True,
+            'message': 'Training started',
+            'data': retrain_job.status()
+        }), 202
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/model/retrain', methods=['GET'])
+def api_get_retrain_status():
+    """
+    REST API: Get the status of the current or last training job
+    Returns: JSON with job state and the resulting version
+    """
+    return jsonify({
+        'success': True,
+        'data': retrain_job.status()
+    }), 200
+
+
+@app.route('/api/model/versions', methods=['GET'])
+def api_get_model_versions():
+    """
+    REST API: List saved model versions, newest first
+    Returns: JSON array of version metadata
+    """
+    try:
+        current = model_holder.version
+        versions = model_registry.versions()
+        for meta in versions:
+            meta['current'] = meta['digest'] == current
+        
+        return jsonify({
+            'success': True,
+            'count': len(versions),
+            'data': versions
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/model/versions/<version_id>/promote', methods=['POST'])
+def api_promote_model_version(version_id):
+    """
+    REST API: Make a saved model version live (also used to roll back)
+    Returns: JSON with the loaded model info
+    """
+    try:
+        meta = model_registry.get(version_id)
+        if meta is None:
+            return jsonify({
+                'success': False,
+                'error': 'Model version not found'
+            }), 404
+        
+        promote_model(meta)
+        
+        return jsonify({
+            'success': True,
+            'message': f'Model version {version_id} promoted successfully',
+            'data': model_holder.info()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/model/cache', methods=['GET'])
+def api_get_prediction_cache():
+    """
+    REST API: Get prediction cache statistics
+    Returns: JSON with cache size, hits, misses and evictions
+    """
+    return jsonify({
+        'success': True,
+        'data': prediction_cache.stats()
+    }), 200
+
+
+@app.route('/api/cache', methods=['GET'])
+def api_get_caches():
+    """
+    REST API: Get response and student cache statistics for this worker
+    Returns: JSON with entries, hits and misses for each cache
+    """
+    return jsonify({
+        'success': True,
+        'data': {
+            'responses': response_cache.stats(),
+            'students': student_cache.stats()
+        }
+    }), 200
+
+
+# =====================
+# API: DATABASE ENDPOINT
+# =====================
+
+@app.route('/api/db/pool', methods=['GET'])
+def api_get_db_pool():
+    """
+    REST API: Get connection pool statistics
+    Returns: JSON with connections in use, idle, waiting and checkout wait times
+    """
+    return jsonify({
+        'success': True,
+        'data': mysql.pool.stats()
+    }), 200
+
+
+# ======================
+# API: READINESS
+# ======================
+
+# Model version this process has already run a prediction with
+_warm_model_version = None
+
+def _warm_model():
+    """Load the model and run one prediction, so the first request does not pay for it"""
+    global _warm_model_version
+    started = time.perf_counter()
+    try:
+        load_pipeline()
+    except ModelNotReady as e:
+        return {'ready': False, 'error': str(e)}
+    snapshot = model_holder.snapshot()
+    if snapshot.version != _warm_model_version:
+        # Touches the mapped tree arrays (or imports sklearn for a pickled model)
+        _predict_matrix(np.zeros((1, len(FEATURE_NAMES))))
+        _warm_model_version = snapshot.version
+    return {
+        'ready': True,
+        'version': snapshot.version,
+        'source': snapshot.source,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+def _check_database():
+    """Check out a pooled connection and compare the schema version with the code's"""
+    try:
+        cur = mysql.connection.cursor()
+        version = current_version(cur)
+        cur.close()
+    except Exception as e:
+        return {'ready': False, 'error': str(e)}
+    check = {'ready': version >= LATEST_VERSION, 'schema_version': version,
+             'latest_version': LATEST_VERSION}
+    if not check['ready']:
+        check['error'] = 'Schema is out of date; run `flask init-db`'
+    return check
+
+def warm_up():
+    """Load the model and connect to the database in this process
+
+    Returns (ready, checks). Cheap once warm: a repeated call costs one query.
+    Needs an app context, e.g. from a WSGI server's post-fork hook.
+    """
+    checks = {'model': _warm_model(), 'database': _check_database()}
+    return all(check['ready'] for check in checks.values()), checks
+
+
+@app.route('/api/ready', methods=['GET'])
+def api_ready():
+    """
+    REST API: Warm up this worker and report whether it can take traffic
+    Returns: 200 when the model is loaded and the database schema is current, 503 otherwise
+    """
+    ready, checks = warm_up()
+    return jsonify({
+        'success': ready,
+        'ready': ready,
+        'checks': checks
+    }), 200 if ready else 503
+
+
+# ======================
+# API: PROFILING ENDPOINTS
+# ======================
+
+def _profiling_denied():
+    """Error response unless profiling is enabled and the request carries a valid token"""
+    if request_profiler is None:
+        return jsonify({
+            'success': False,
+            'error': 'Profiling is disabled (PROFILING_ENABLED)'
+        }), 404
+    if not request_profiler.verify(request.headers.get(PROFILE_HEADER)):
+        return jsonify({
+            'success': False,
+            'error': f'A valid {PROFILE_HEADER} header is required'
+        }), 403
+    return None
+
+@app.route('/api/profiles', methods=['GET'])
+def api_get_profiles():
+    """
+    REST API: List captured request profiles, newest first
+    Headers: X-Profile-Token
+    Returns: JSON array of profile metadata (endpoint, status, duration, file)
+    """
+    denied = _profiling_denied()
+    if denied:
+        return denied
+    profiles = request_profiler.profiles()
+    return jsonify({
+        'success': True,
+        'count': len(profiles),
+        'data': profiles,
+        'sampling': request_profiler.sampling()
+    }), 200
+
+@app.route('/api/profiles/<filename>', methods=['GET'])
+def api_get_profile(filename):
+    """
+    REST API: Download one profile file (open .speedscope.json in speedscope.app,
+    or feed .collapsed to flamegraph.pl)
+    Headers: X-Profile-Token
+    Returns: the profile file
+    """
+    denied = _profiling_denied()
+    if denied:
+        return denied
+    try:
+        path = request_profiler.path_for(filename)
+    except ProfilerError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=filename)
+
+@app.route('/api/profiles/sampling', methods=['POST'])
+def api_set_profile_sampling():
+    """
+    REST API: Profile a share of requests for a while (all workers)
+    Headers: X-Profile-Token
+    Request Body: JSON with sample_rate (0-1, 0 turns sampling off), optional
+    endpoint (e.g. api_get_all_records) and duration in seconds (default 600)
+    Returns: JSON with the active sampling settings
+    """
+    denied = _profiling_denied()
+    if denied:
+        return denied
+    try:
+        data = request.get_json() or {}
+        settings = request_profiler.set_sampling(
+            float(data.get('sample_rate', 0)),
+            endpoint=data.get('endpoint'),
+            duration=float(data.get('duration', 600))
+        )
+    except (ProfilerError, TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    return jsonify({
+        'success': True,
+        'data': settings
+    }), 200
+
+
+# =================
+# METRICS ENDPOINT
+# =================
+
+def _metrics_gauges():
+    """Current pool usage of this process, summed over live workers by /metrics"""
+    pool = mysql.pool.stats()
+    return {
+        'db_pool_connections': ('Open pooled connections', pool['size']),
+        'db_pool_connections_in_use': ('Pooled connections checked out', pool['in_use']),
+        'db_pool_connections_idle': ('Pooled connections idle', pool['idle']),
+        'db_pool_waiting': ('Requests waiting for a connection', pool['waiting']),
+    }
+
+def _metrics_counters():
+    """Cumulative pool and cache counts of this process, summed over all workers by /metrics"""
+    pool = mysql.pool.stats()
+    responses = response_cache.stats()
+    students = student_cache.stats()
+    predictions = prediction_cache.stats()
+    return {
+        'db_pool_acquires_total': ('Connection checkouts', pool['acquires']),
+        'db_pool_timeouts_total': ('Checkouts that timed out', pool['timeouts']),
+        'db_pool_wait_seconds_total': ('Total time spent waiting for a connection',
+                                       pool['wait_seconds_total']),
+        'response_cache_hits_total': ('Responses served from the response cache',
+                                      responses['hits']),
+        'response_cache_misses_total': ('Responses rendered by the view', responses['misses']),
+        'response_cache_not_modified_total': ('304 answers to If-None-Match',
+                                              responses['not_modified']),
+        'student_cache_hits_total': ('Student cache hits', students['hits']),
+        'student_cache_misses_total': ('Student cache misses', students['misses']),
+        'prediction_cache_hits_total': ('Prediction cache hits', predictions['hits']),
+        'prediction_cache_misses_total': ('Prediction cache misses', predictions['misses']),
+    }
+
+metrics.gauges = _metrics_gauges
+metrics.counters = _metrics_counters
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint
+    Returns: request latency and phase histograms plus pool and cache counters
+    """
+    if not metrics.enabled:
+        return jsonify({
+            'success': False,
+            'error': 'Metrics are disabled (METRICS_ENABLED)'
+        }), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 # =======================
 # API: ANALYTICS ENDPOINT
 # =======================
 
 @app.route('/api/analytics', methods=['GET'])
+@response_cache.conditional('students', 'records', 'analytics')
 def api_get_analytics():
     """
     REST API: Get analytics data
@@ -946,43 +1943,94 @@ def api_get_analytics():
     try:
         cur = mysql.connection.cursor()
         
-        # Total students
-        cur.execute("SELECT COUNT(*) as count FROM students")
-        total_students = cur.fetchone()['count']
+        # Counts, grade distribution and averages from the maintained summary
+        summary = read_summary(cur)
         
-        # Total predictions
-        cur.execute("SELECT COUNT(*) as count FROM performance_records")
-        total_predictions = cur.fetchone()['count']
-        
-        # Grade distribution
-        cur.execute("""
-            SELECT predicted_grade, COUNT(*) as count 
-            FROM performance_records 
-            GROUP BY predicted_grade
-        """)
-        grade_distribution = cur.fetchall()
+        cur.close()
         
-        # Average scores
-        cur.execute("""
-            SELECT 
-                AVG(study_hours) as avg_study_hours,
-                AVG(previous_score) as avg_previous_score,
-                AVG(attendance_percentage) as avg_attendance,
-                AVG(sleep_hours) as avg_sleep_hours
-            FROM performance_records
-        """)
-        averages = cur.fetchone()
+        return jsonify({
+            'success': True,
+            'data': summary
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/analytics/timeseries', methods=['GET'])
+@response_cache.conditional('records', 'analytics')
+def api_get_analytics_timeseries():
+    """
+    REST API: Get grade distribution and averages over time
+    Query: bucket (day, week or month), student_id, since/until (created_at dates)
+    Returns: JSON array of buckets, oldest first
+    """
+    try:
+        bucket = request.args.get('bucket', 'day')
+        if bucket not in TIMESERIES_BUCKETS:
+            raise ExportError(f'bucket must be one of: {", ".join(TIMESERIES_BUCKETS)}')
+        since = parse_timestamp(request.args.get('since'), 'since')
+        until = parse_timestamp(request.args.get('until'), 'until')
+        student_id = request.args.get('student_id', type=int)
+    except ExportError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    try:
+        cur = mysql.connection.cursor()
+        series = read_timeseries(cur, bucket, student_id,
+                                 since.date() if since else None,
+                                 until.date() if until else None)
+        cur.close()
         
+        return jsonify({
+            'success': True,
+            'bucket': bucket,
+            'student_id': student_id,
+            'count': len(series),
+            'data': series
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/analytics/cohorts', methods=['GET'])
+def api_get_analytics_cohorts():
+    """
+    REST API: Ad-hoc cohort analytics over all performance records
+    Query: group_by (e.g. gender,age_band), metrics (e.g. median:attendance,p90:study_hours),
+           filters (<category>=A,B  <column>_min/_max  student_id  since/until)
+    Returns: JSON array of groups with their count and requested metrics
+    """
+    try:
+        query = parse_cohort_query(request.args, parse_timestamp)
+    except (QueryError, ExportError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    try:
+        # The summary count, read in the same transaction, reveals deleted records
+        cur = mysql.connection.cursor()
+        expected_rows = read_summary(cur)['total_predictions']
         cur.close()
+        record_snapshot.maybe_refresh(mysql.connection, expected_rows)
         
+        groups, matched = record_snapshot.query(**query)
         return jsonify({
             'success': True,
-            'data': {
-                'total_students': total_students,
-                'total_predictions': total_predictions,
-                'grade_distribution': grade_distribution,
-                'averages': averages
-            }
+            'count': len(groups),
+            'matched': matched,
+            'data': groups,
+            'snapshot': record_snapshot.info()
         }), 200
     except Exception as e:
         return jsonify({
@@ -1006,24 +2054,59 @@ def api_test():
         'message': 'API is working!',
         'endpoints': {
             'students': {
-                'GET /api/students': 'Get all students',
+                'GET /api/students': 'Get students (paginated: limit, cursor)',
                 'GET /api/students/<id>': 'Get single student',
                 'POST /api/students': 'Create student',
+                'POST /api/students/import': 'Bulk import students from CSV or NDJSON',
                 'PUT /api/students/<id>': 'Update student',
                 'DELETE /api/students/<id>': 'Delete student'
             },
             'records': {
-                'GET /api/records': 'Get all records',
+                'GET /api/records': 'Get records (paginated: limit, cursor)',
                 'GET /api/records/<id>': 'Get single record',
                 'GET /api/records/student/<id>': 'Get student records',
+                'GET /api/records/export': 'Stream records as NDJSON or CSV',
+                'POST /api/records/import': 'Bulk import records from CSV or NDJSON',
                 'POST /api/predict': 'Create prediction',
+                'POST /api/predict/batch': 'Create predictions in bulk',
                 'DELETE /api/records/<id>': 'Delete record'
             },
+            'model': {
+                'GET /api/model': 'Get loaded model info',
+                'POST /api/model/reload': 'Reload model from disk',
+                'GET /api/model/cache': 'Get prediction cache statistics',
+                'GET /api/cache': 'Get response and student cache statistics',
+                'GET /metrics': 'Prometheus metrics: latency histograms, pool and cache counters',
+                'GET /api/profiles': 'List captured request profiles (X-Profile-Token)',
+                'GET /api/profiles/<file>': 'Download a profile file (X-Profile-Token)',
+                'POST /api/profiles/sampling': 'Profile a share of requests for a while',
+                'POST /api/model/retrain': 'Retrain model in the background',
+                'GET /api/model/retrain': 'Get training job status',
+                'GET /api/model/versions': 'List model versions',
+                'POST /api/model/versions/<id>/promote': 'Promote or roll back a model version'
+            },
+            'database': {
+                'GET /api/db/pool': 'Get connection pool statistics'
+            },
+            'health': {
+                'GET /api/ready': 'Warm up this worker; 200 once model and database are ready'
+            },
             'analytics': {
-                'GET /api/analytics': 'Get analytics data'
+                'GET /api/analytics': 'Get analytics data',
+                'GET /api/analytics/timeseries': 'Get grades and averages per day, week or month',
+                'GET /api/analytics/cohorts': 'Group, filter and percentile queries over all records'
             }
         }
     }), 200
 
 if __name__ == '__main__':
+    # Development server only: set up the schema and model first. Importing the
+    # module (WSGI servers, `flask` commands) does neither; see `flask init-db`.
+    with app.app_context():
+        try:
+            init_db()
+        except Exception as e:
+            print(f"Database initialization error: {e}")
+        if not os.path.exists(MODEL_PATH):
+            train_model()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,416 @@
+"""
+HTTP load test for the REST API against a local database
+Seeds the database to a fixed size, drives the main endpoints with a number
+of concurrent keep-alive clients and writes latency percentiles and
+throughput as JSON; two result files can be compared to spot regressions
+
+    python bench_api.py seed --database bench_db --students 10000 --records 1000000
+    MYSQL_DB=bench_db flask --app app run      # in another shell, from the app directory
+    python bench_api.py run --concurrency 16 --duration 30 --output before.json
+    python bench_api.py compare before.json after.json --threshold 0.10
+Connection settings come from MYSQL_HOST, MYSQL_USER and MYSQL_PASSWORD; seed
+only writes to the database named with --database.
+"""
+
+import argparse
+import http.client
+import json
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from training import db_config_from_env, generate_training_data
+
+
+SCENARIOS = ('predict', 'records', 'students', 'analytics')
+
+# The application's own database, which seed never wipes
+APP_DATABASE = 'student_performance_db'
+
+# The app's shared version counters, relative to the directory the app runs in
+VERSIONS_FILE = 'models/resource_versions.bin'
+
+_ER_NO_SUCH_TABLE = 1146
+
+# Metrics compared by `compare`; True means higher is better
+COMPARED = (('p50_ms', False), ('p95_ms', False), ('p99_ms', False), ('throughput_rps', True))
+
+
+# ---- seeding ----
+
+class SeedRefused(Exception):
+    """Raised when seed would wipe a database that is not a scratch database"""
+
+
+def _row_count(cur, table):
+    try:
+        cur.execute(f"SELECT COUNT(*) AS count FROM {table}")
+    except Exception as e:
+        if e.args[:1] == (_ER_NO_SUCH_TABLE,):
+            return 0
+        raise
+    return cur.fetchone()['count']
+
+
+def check_scratch_database(cur, database, wipe=False):
+    """Raise SeedRefused unless database may be wiped
+
+    The application's database is always refused; one that already holds
+    students or records only with wipe=True.
+    """
+    if database == APP_DATABASE:
+        raise SeedRefused(f'{database} is the application database; seed a scratch database')
+    rows = sum(_row_count(cur, table) for table in ('students', 'performance_records'))
+    if rows and not wipe:
+        raise SeedRefused(f'{database} already holds {rows} students and records; '
+                          'pass --yes-wipe to delete them')
+
+
+def seed(database, students, records, batch_size=5000, days=365, seed=42, wipe=False,
+         versions_file=VERSIONS_FILE):
+    """Replace all students and records in database with a deterministic synthetic data set
+
+    versions_file is the app's resource_versions.bin; every counter in it is
+    bumped so a running app drops the responses it cached before the seed.
+    """
+    import MySQLdb
+    from MySQLdb import cursors
+
+    from analytics_summary import rebuild_summary
+    from migrations import migrate
+    from response_cache import ResourceVersions
+
+    rng = np.random.RandomState(seed)
+    config = dict(db_config_from_env(), db=database)
+    conn = MySQLdb.connect(cursorclass=cursors.DictCursor, **config)
+    try:
+        cur = conn.cursor()
+        check_scratch_database(cur, database, wipe)
+        cur.close()
+        migrate(conn)
+        cur = conn.cursor()
+        # Records go with their students through ON DELETE CASCADE
+        cur.execute("DELETE FROM students")
+        cur.execute("ALTER TABLE students AUTO_INCREMENT = 1")
+        cur.execute("ALTER TABLE performance_records AUTO_INCREMENT = 1")
+        conn.commit()
+
+        genders = np.array(['Male', 'Female', 'Other'])
+        now = datetime.now().replace(microsecond=0)
+        start = time.perf_counter()
+        for offset in range(0, students, batch_size):
+            n = min(batch_size, students - offset)
+            ages = rng.randint(15, 25, n)
+            picks = genders[rng.randint(0, 3, n)]
+            cur.executemany(
+                "INSERT INTO students (name, age, gender, email, created_at) VALUES (%s, %s, %s, %s, %s)",
+                [(f'Student {offset + i + 1}', int(ages[i]), str(picks[i]),
+                  f'student{offset + i + 1}@bench.local',
+                  now - timedelta(seconds=int(days * 86400 * (students - offset - i) / students)))
+                 for i in range(n)])
+            conn.commit()
+        print(f"Inserted {students} students in {time.perf_counter() - start:.1f}s")
+
+        yes_no = np.array(['No', 'Yes'])
+        start = time.perf_counter()
+        for offset in range(0, records, batch_size):
+            n = min(batch_size, records - offset)
+            X, grades = generate_training_data(n, seed=seed + 1 + offset // batch_size)
+            student_ids = rng.randint(1, students + 1, n)
+            ages = rng.randint(0, days * 86400, n)
+            cur.executemany("""
+                INSERT INTO performance_records
+                (student_id, study_hours, previous_score, attendance_percentage,
+                extracurricular, sleep_hours, tutoring, predicted_grade, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, [(int(student_ids[i]), float(X[i, 0]), float(X[i, 1]), float(X[i, 2]),
+                   str(yes_no[int(X[i, 3])]), float(X[i, 4]), str(yes_no[int(X[i, 5])]),
+                   str(grades[i]), now - timedelta(seconds=int(ages[i])))
+                  for i in range(n)])
+            conn.commit()
+            if (offset // batch_size) % 20 == 0:
+                print(f"  {offset + n}/{records} records")
+        print(f"Inserted {records} records in {time.perf_counter() - start:.1f}s")
+
+        rebuild_summary(cur)
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+
+    # The data changed behind the app's back: invalidate every cached response
+    ResourceVersions(versions_file).bump_all()
+
+
+# ---- load generation ----
+
+class Client:
+    """One keep-alive HTTP connection issuing requests for one scenario"""
+
+    def __init__(self, base_url, scenario, student_ids, rng, page_limit, pages):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.scenario = scenario
+        self.student_ids = student_ids
+        self.rng = rng
+        self.page_limit = page_limit
+        self.pages = pages
+        self.cursor = None
+        self.page = 0
+        self.conn = None
+
+    def _request(self, method, path, body=None):
+        headers = {'Connection': 'keep-alive'}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.conn.request(method, self.prefix + path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError):
+                # Server closed the keep-alive connection; reconnect once
+                self.conn.close()
+                self.conn = None
+                if attempt == 2:
+                    raise
+
+    def _page(self, collection):
+        # Walk `pages` pages along next_cursor, then start again from the top
+        path = f'/api/{collection}?limit={self.page_limit}'
+        if self.cursor:
+            path += f'&cursor={self.cursor}'
+        status, body = self._request('GET', path)
+        self.page += 1
+        self.cursor = None
+        if status == 200 and self.page < self.pages:
+            self.cursor = json.loads(body).get('next_cursor')
+        if not self.cursor:
+            self.page = 0
+        return status
+
+    def step(self):
+        """Issue one request and return its status code"""
+        if self.scenario == 'predict':
+            rng = self.rng
+            status, _ = self._request('POST', '/api/predict', {
+                'student_id': int(self.student_ids[rng.randint(len(self.student_ids))]),
+                'study_hours': round(rng.uniform(1, 10), 1),
+                'previous_score': round(rng.uniform(40, 100), 1),
+                'attendance': round(rng.uniform(50, 100), 1),
+                'extracurricular': 'Yes' if rng.randint(2) else 'No',
+                'sleep_hours': round(rng.uniform(4, 10), 1),
+                'tutoring': 'Yes' if rng.randint(2) else 'No',
+            })
+            return status
+        if self.scenario in ('records', 'students'):
+            return self._page(self.scenario)
+        status, _ = self._request('GET', '/api/analytics')
+        return status
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+
+def run_scenario(base_url, scenario, concurrency, duration, warmup, student_ids,
+                 page_limit=100, pages=10, seed=42):
+    """Drive one scenario with `concurrency` clients; return its latency summary"""
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    phase = {'measure_from': time.perf_counter() + warmup}
+    phase['stop_at'] = phase['measure_from'] + duration
+
+    def worker(index):
+        client = Client(base_url, scenario, student_ids, np.random.RandomState(seed + index),
+                        page_limit, pages)
+        try:
+            while True:
+                started = time.perf_counter()
+                if started >= phase['stop_at']:
+                    break
+                try:
+                    ok = client.step() < 400
+                except (http.client.HTTPException, OSError):
+                    ok = False
+                if started >= phase['measure_from']:
+                    if ok:
+                        latencies[index].append(time.perf_counter() - started)
+                    else:
+                        errors[index] += 1
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    samples = np.array([value for values in latencies for value in values]) * 1000
+    count = len(samples)
+    summary = {
+        'requests': count,
+        'errors': sum(errors),
+        'throughput_rps': round(count / duration, 2),
+    }
+    if count:
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        summary.update(p50_ms=round(p50, 3), p95_ms=round(p95, 3), p99_ms=round(p99, 3),
+                       mean_ms=round(float(samples.mean()), 3), max_ms=round(float(samples.max()), 3))
+    return summary
+
+
+def _student_ids(base_url, limit=1000):
+    client = Client(base_url, 'students', None, None, limit, 1)
+    try:
+        status, body = client._request('GET', f'/api/students?limit={limit}')
+    finally:
+        client.close()
+    if status != 200:
+        raise RuntimeError(f'GET /api/students returned {status}')
+    ids = [row['id'] for row in json.loads(body)['data']]
+    if not ids:
+        raise RuntimeError('No students found; run the seed command first')
+    return np.array(ids)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(base_url, scenarios, concurrency, duration, warmup, page_limit, pages, seed=42):
+    student_ids = _student_ids(base_url) if 'predict' in scenarios else None
+    results = {}
+    for scenario in scenarios:
+        print(f"{scenario}: {concurrency} clients, {warmup}s warm-up, {duration}s measured",
+              file=sys.stderr)
+        results[scenario] = run_scenario(base_url, scenario, concurrency, duration, warmup,
+                                         student_ids, page_limit, pages, seed)
+    return {
+        'benchmark': 'api',
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'config': {'base_url': base_url, 'concurrency': concurrency, 'duration': duration,
+                   'warmup': warmup, 'page_limit': page_limit, 'pages': pages, 'seed': seed},
+        'scenarios': results,
+    }
+
+
+# ---- comparison ----
+
+def compare(base, new, threshold=0.10):
+    """Return (report lines, regressions) for two run results"""
+    lines = [f"{'scenario':<10} {'metric':<15} {'base':>10} {'new':>10} {'change':>8}"]
+    regressions = []
+    for scenario, before in base['scenarios'].items():
+        after = new['scenarios'].get(scenario)
+        if after is None:
+            continue
+        for metric, higher_is_better in COMPARED:
+            if before.get(metric) is None or after.get(metric) is None:
+                continue
+            change = (after[metric] - before[metric]) / before[metric] if before[metric] else 0.0
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions.append((scenario, metric, change))
+            lines.append(f"{scenario:<10} {metric:<15} {before[metric]:>10} {after[metric]:>10} "
+                         f"{change:>+7.1%}{flag}")
+        if after.get('errors', 0) > before.get('errors', 0):
+            lines.append(f"{scenario:<10} errors          {before['errors']:>10} {after['errors']:>10}")
+    return lines, regressions
+
+
+def _main(argv):
+    parser = argparse.ArgumentParser(description='Load test the REST API')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help='fill a scratch database with synthetic data')
+    seed_parser.add_argument('--database', required=True,
+                             help=f'scratch database to fill (never {APP_DATABASE})')
+    seed_parser.add_argument('--yes-wipe', action='store_true',
+                             help='delete the students and records the database already holds')
+    seed_parser.add_argument('--students', type=int, default=10000)
+    seed_parser.add_argument('--records', type=int, default=1000000)
+    seed_parser.add_argument('--batch-size', type=int, default=5000, help='rows per INSERT')
+    seed_parser.add_argument('--days', type=int, default=365, help='spread created_at over this many days')
+    seed_parser.add_argument('--seed', type=int, default=42)
+    seed_parser.add_argument('--versions-file', default=VERSIONS_FILE,
+                             help="the app's resource_versions.bin; relative paths resolve from "
+                                  "the current directory, as the app resolves them from its own")
+
+    run_parser = commands.add_parser('run', help='drive the API and report latencies')
+    run_parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    run_parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f'comma-separated subset of {",".join(SCENARIOS)}')
+    run_parser.add_argument('--concurrency', type=int, default=16)
+    run_parser.add_argument('--duration', type=float, default=30.0, help='measured seconds per scenario')
+    run_parser.add_argument('--warmup', type=float, default=5.0, help='unmeasured seconds per scenario')
+    run_parser.add_argument('--page-limit', type=int, default=100, help='limit for list endpoints')
+    run_parser.add_argument('--pages', type=int, default=10, help='cursor pages walked per pass')
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--output', '-o', default=None, help='write the JSON result here')
+
+    compare_parser = commands.add_parser('compare', help='compare two run results')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='relative change that counts as a regression')
+    args = parser.parse_args(argv)
+
+    if args.command == 'seed':
+        try:
+            seed(args.database, args.students, args.records, args.batch_size, args.days,
+                 args.seed, args.yes_wipe, args.versions_file)
+        except SeedRefused as e:
+            print(f"Refusing to seed: {e}", file=sys.stderr)
+            return 2
+        return 0
+
+    if args.command == 'run':
+        scenarios = [name for name in args.scenarios.split(',') if name]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+        result = run(args.base_url, scenarios, args.concurrency, args.duration, args.warmup,
+                     args.page_limit, args.pages, args.seed)
+        output = json.dumps(result, indent=2, sort_keys=True)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(output + '\n')
+        print(output)
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    lines, regressions = compare(base, new, args.threshold)
+    print('\n'.join(lines))
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,349 @@
+"""
+Microbenchmarks for the ML path: training, serialization and inference
+Every case runs in a freshly spawned interpreter, so its peak RSS is its own,
+with fixed seeds; results are written as JSON keyed by a stable case id and
+two result files can be compared commit to commit
+
+    python bench_ml.py run --output before.json
+    python bench_ml.py run --model-path models/performance_model.pkl
+    python bench_ml.py compare before.json after.json --threshold 0.10
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from bench_api import git_commit
+from training import peak_rss_mb
+
+
+STAGES = ('train', 'pickle_dump', 'pickle_load', 'forest_load', 'encode',
+          'predict_sklearn', 'predict_compiled')
+
+TRAIN_SIZES = (500, 5000, 50000)
+BATCH_SIZES = (1, 10, 100, 1000, 10000, 100000)
+
+# Metrics compared by `compare`; all of them are lower-is-better
+COMPARED = ('seconds', 'peak_rss_mb', 'artifact_bytes')
+
+
+def _current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf('SC_PAGE_SIZE') / 2**20, 1)
+
+
+def _time(fn, repeat, min_seconds):
+    """Run fn at least `repeat` times and for at least min_seconds; return the timings"""
+    timings = []
+    total = 0.0
+    while len(timings) < repeat or total < min_seconds:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        total += elapsed
+    return timings
+
+
+def _input_rows(n, seed):
+    """n prediction inputs as the API receives them, in the ranges of the training data"""
+    rng = np.random.RandomState(seed)
+    yes_no = np.array(['No', 'Yes'])
+    return [{
+        'study_hours': float(study), 'previous_score': float(score), 'attendance': float(attendance),
+        'extracurricular': str(extra), 'sleep_hours': float(sleep), 'tutoring': str(tutoring),
+    } for study, score, attendance, extra, sleep, tutoring in zip(
+        rng.uniform(1, 10, n).round(1), rng.uniform(40, 100, n).round(1),
+        rng.uniform(50, 100, n).round(1), yes_no[rng.randint(0, 2, n)],
+        rng.uniform(4, 10, n).round(1), yes_no[rng.randint(0, 2, n)])]
+
+
+# ---- cases, each run in its own process ----
+
+def _case_train(params, config, workdir):
+    from model_registry import ModelRegistry
+    from training import train_synthetic
+
+    registry = ModelRegistry(os.path.join(workdir, f'registry-{os.getpid()}'),
+                             os.path.join(workdir, 'unused.pkl'))
+    baseline = _current_rss_mb()
+    start = time.perf_counter()
+    meta = train_synthetic(registry, params['n_samples'], n_jobs=config['n_jobs'])
+    seconds = time.perf_counter() - start
+    version_dir = os.path.join(registry.root, meta['version_id'])
+    return {
+        'seconds': seconds,
+        'baseline_rss_mb': baseline,
+        'artifact_bytes': sum(os.path.getsize(os.path.join(version_dir, name))
+                              for name in ('performance_model.pkl', 'performance_model.forest')),
+    }
+
+
+def _case_pickle_dump(params, config, workdir):
+    from model_store import save_model_atomic
+
+    with open(config['model_path'], 'rb') as f:
+        payload = pickle.load(f)
+    path = os.path.join(workdir, f'dump-{os.getpid()}.pkl')
+    baseline = _current_rss_mb()
+    timings = _time(lambda: save_model_atomic(path, payload), config['repeat'], config['min_seconds'])
+    return {'timings': timings, 'baseline_rss_mb': baseline, 'artifact_bytes': os.path.getsize(path)}
+
+
+def _case_pickle_load(params, config, workdir):
+    # As ModelHolder does it: read the bytes, then unpickle them
+    def load():
+        with open(config['model_path'], 'rb') as f:
+            return pickle.loads(f.read())
+
+    baseline = _current_rss_mb()
+    timings = _time(load, config['repeat'], config['min_seconds'])
+    return {'timings': timings, 'baseline_rss_mb': baseline,
+            'artifact_bytes': os.path.getsize(config['model_path'])}
+
+
+def _case_forest_load(params, config, workdir):
+    from forest_engine import load_forest
+
+    baseline = _current_rss_mb()
+    timings = _time(lambda: load_forest(config['forest_path']), config['repeat'], config['min_seconds'])
+    return {'timings': timings, 'baseline_rss_mb': baseline,
+            'artifact_bytes': os.path.getsize(config['forest_path'])}
+
+
+def _case_encode(params, config, workdir):
+    from features import FeaturePipeline
+
+    with open(config['model_path'], 'rb') as f:
+        pipeline = FeaturePipeline(pickle.load(f)['encoders'])
+    rows = _input_rows(params['batch_size'], config['seed'])
+    baseline = _current_rss_mb()
+    timings = _time(lambda: pipeline.transform(rows), config['repeat'], config['min_seconds'])
+    return {'timings': timings, 'baseline_rss_mb': baseline}
+
+
+def _predict_inputs(params, config):
+    from features import FeaturePipeline
+
+    with open(config['model_path'], 'rb') as f:
+        saved = pickle.load(f)
+    X, _ = FeaturePipeline(saved['encoders']).transform(
+        _input_rows(params['batch_size'], config['seed']))
+    return saved['model'], X
+
+
+def _case_predict_sklearn(params, config, workdir):
+    model, X = _predict_inputs(params, config)
+    baseline = _current_rss_mb()
+    timings = _time(lambda: model.predict(X), config['repeat'], config['min_seconds'])
+    return {'timings': timings, 'baseline_rss_mb': baseline}
+
+
+def _case_predict_compiled(params, config, workdir):
+    from forest_engine import load_forest
+
+    _, X = _predict_inputs(params, config)
+    engine, _ = load_forest(config['forest_path'])
+    baseline = _current_rss_mb()
+    timings = _time(lambda: engine.predict(X), config['repeat'], config['min_seconds'])
+    return {'timings': timings, 'baseline_rss_mb': baseline}
+
+
+_CASES = {
+    'train': _case_train,
+    'pickle_dump': _case_pickle_dump,
+    'pickle_load': _case_pickle_load,
+    'forest_load': _case_forest_load,
+    'encode': _case_encode,
+    'predict_sklearn': _case_predict_sklearn,
+    'predict_compiled': _case_predict_compiled,
+}
+
+
+def _run_case(stage, params, config, workdir):
+    np.random.seed(config['seed'])
+    result = _CASES[stage](params, config, workdir)
+    timings = result.pop('timings', None)
+    if timings is None:
+        result['repeat'] = 1
+    else:
+        result.update(seconds=statistics.median(timings), min_seconds=min(timings),
+                      repeat=len(timings))
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def case_id(stage, params):
+    """Stable key of one case, e.g. 'predict_sklearn[batch_size=1000]'"""
+    if not params:
+        return stage
+    return f"{stage}[{','.join(f'{key}={value}' for key, value in sorted(params.items()))}]"
+
+
+def plan(stages, train_sizes, batch_sizes):
+    """(stage, params) for every case, in run order"""
+    cases = []
+    for stage in stages:
+        if stage == 'train':
+            cases.extend((stage, {'n_samples': n}) for n in train_sizes)
+        elif stage in ('encode', 'predict_sklearn', 'predict_compiled'):
+            cases.extend((stage, {'batch_size': n}) for n in batch_sizes)
+        else:
+            cases.append((stage, {}))
+    return cases
+
+
+def _reference_model(workdir, n_samples, n_jobs):
+    """Train the model the app trains by default; return its (pickle, forest) paths"""
+    from model_registry import ModelRegistry
+    from training import train_synthetic
+
+    registry = ModelRegistry(os.path.join(workdir, 'reference'), os.path.join(workdir, 'unused.pkl'))
+    meta = train_synthetic(registry, n_samples, n_jobs=n_jobs)
+    version_dir = os.path.join(registry.root, meta['version_id'])
+    return (os.path.join(version_dir, 'performance_model.pkl'),
+            os.path.join(version_dir, 'performance_model.forest'))
+
+
+def run(stages, train_sizes, batch_sizes, model_path=None, model_samples=500, n_jobs=-1,
+        repeat=5, min_seconds=0.2, seed=42):
+    """Run every case in a spawned process and return the result document"""
+    from forest_engine import export_forest, forest_path_for
+
+    import sklearn
+
+    with tempfile.TemporaryDirectory(prefix='bench_ml-') as workdir:
+        if model_path:
+            artifact, forest_path = model_path, forest_path_for(model_path)
+            if not os.path.exists(forest_path):
+                forest_path = export_forest(model_path, os.path.join(workdir, 'model.forest'))
+        else:
+            artifact, forest_path = _reference_model(workdir, model_samples, n_jobs)
+
+        config = {'model_path': artifact, 'forest_path': forest_path, 'n_jobs': n_jobs,
+                  'repeat': repeat, 'min_seconds': min_seconds, 'seed': seed}
+        results = {}
+        context = multiprocessing.get_context('spawn')
+        for stage, params in plan(stages, train_sizes, batch_sizes):
+            key = case_id(stage, params)
+            print(f"{key} ...", file=sys.stderr)
+            with context.Pool(1) as pool:
+                result = pool.apply(_run_case, (stage, params, config, workdir))
+            result.update(stage=stage, params=params)
+            results[key] = {name: round(value, 6) if isinstance(value, float) else value
+                            for name, value in result.items()}
+
+    return {
+        'benchmark': 'ml',
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'host': platform.node(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'config': {'model': model_path or 'synthetic',
+                   'model_samples': model_samples, 'n_jobs': n_jobs, 'repeat': repeat,
+                   'min_seconds': min_seconds, 'seed': seed},
+        'results': results,
+    }
+
+
+# ---- comparison ----
+
+def compare(base, new, threshold=0.10):
+    """Return (report lines, regressions) for two run results"""
+    lines = [f"{'case':<40} {'metric':<15} {'base':>12} {'new':>12} {'change':>8}"]
+    regressions = []
+    for key, before in base['results'].items():
+        after = new['results'].get(key)
+        if after is None:
+            continue
+        for metric in COMPARED:
+            if before.get(metric) is None or after.get(metric) is None:
+                continue
+            change = (after[metric] - before[metric]) / before[metric] if before[metric] else 0.0
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressions.append((key, metric, change))
+            lines.append(f"{key:<40} {metric:<15} {before[metric]:>12} {after[metric]:>12} "
+                         f"{change:>+7.1%}{flag}")
+    return lines, regressions
+
+
+def _sizes(value):
+    return tuple(int(size) for size in value.split(',') if size)
+
+
+def _main(argv):
+    parser = argparse.ArgumentParser(description='Benchmark training, serialization and inference')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--stages', default=','.join(STAGES),
+                            help=f'comma-separated subset of {",".join(STAGES)}')
+    run_parser.add_argument('--train-sizes', type=_sizes, default=TRAIN_SIZES,
+                            help='n_samples values for train (comma-separated)')
+    run_parser.add_argument('--batch-sizes', type=_sizes, default=BATCH_SIZES,
+                            help='batch sizes for encode and predict (comma-separated)')
+    run_parser.add_argument('--model-path', default=None,
+                            help='benchmark this artifact instead of a freshly trained one')
+    run_parser.add_argument('--model-samples', type=int, default=500,
+                            help='n_samples of the freshly trained model')
+    run_parser.add_argument('--n-jobs', type=int, default=-1, help='training processes')
+    run_parser.add_argument('--repeat', type=int, default=5, help='minimum timed runs per case')
+    run_parser.add_argument('--min-seconds', type=float, default=0.2,
+                            help='minimum timed seconds per case')
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--output', '-o', default=None, help='write the JSON result here')
+
+    compare_parser = commands.add_parser('compare', help='compare two run results')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='relative increase that counts as a regression')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        stages = [name for name in args.stages.split(',') if name]
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            parser.error(f'unknown stages: {", ".join(sorted(unknown))}')
+        result = run(stages, args.train_sizes, args.batch_sizes, args.model_path,
+                     args.model_samples, args.n_jobs, args.repeat, args.min_seconds, args.seed)
+        output = json.dumps(result, indent=2, sort_keys=True)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(output + '\n')
+        print(output)
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    lines, regressions = compare(base, new, args.threshold)
+    print('\n'.join(lines))
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv[1:]))
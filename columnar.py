@@ -0,0 +1,343 @@
+"""
+In-memory columnar snapshot of performance records for cohort analytics
+Holds one NumPy array per column of the records/students join, with
+categorical columns dictionary-encoded, refreshed incrementally by record id.
+Group-by, percentile and filter queries then run vectorized in process.
+"""
+
+import re
+import threading
+import time
+
+import numpy as np
+
+
+NUMERIC_COLUMNS = ('study_hours', 'previous_score', 'attendance', 'sleep_hours', 'age')
+CATEGORICAL_COLUMNS = ('predicted_grade', 'actual_grade', 'extracurricular', 'tutoring', 'gender')
+DIMENSIONS = CATEGORICAL_COLUMNS + ('age_band', 'month')
+AGGREGATES = ('count', 'sum', 'mean', 'median', 'min', 'max')  # plus p0..p100
+
+_MAX_GROUP_BY = 4
+_PERCENTILE = re.compile(r'^p(\d{1,3})$')
+
+# Query column -> SELECT expression, in load order
+_SELECT = (('id', 'pr.id'), ('student_id', 'pr.student_id'),
+           ('study_hours', 'pr.study_hours'), ('previous_score', 'pr.previous_score'),
+           ('attendance', 'pr.attendance_percentage'), ('sleep_hours', 'pr.sleep_hours'),
+           ('age', 's.age'), ('created_at', 'pr.created_at'),
+           ('predicted_grade', 'pr.predicted_grade'), ('actual_grade', 'pr.actual_grade'),
+           ('extracurricular', 'pr.extracurricular'), ('tutoring', 'pr.tutoring'),
+           ('gender', 's.gender'))
+
+_DTYPES = dict({'id': np.int64, 'student_id': np.int32, 'created_at': 'datetime64[s]'},
+               **{name: np.float32 for name in NUMERIC_COLUMNS},
+               **{name: np.int16 for name in CATEGORICAL_COLUMNS})
+
+
+class QueryError(ValueError):
+    """Raised when a cohort query is invalid"""
+
+
+class _Dictionary:
+    """Append-only label <-> code mapping for one categorical column"""
+
+    def __init__(self):
+        self.labels = []
+        self.codes = {}
+
+    def encode(self, values):
+        codes = np.empty(len(values), dtype=np.int16)
+        for i, value in enumerate(values):
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.labels)
+                self.labels.append(value)
+            codes[i] = code
+        return codes
+
+
+class _Columns:
+    """Growable column arrays; rows [0, n) are immutable once appended"""
+
+    def __init__(self, capacity=1024):
+        self.n = 0
+        self.arrays = {name: np.empty(capacity, dtype=dtype) for name, dtype in _DTYPES.items()}
+        self.dictionaries = {name: _Dictionary() for name in CATEGORICAL_COLUMNS}
+
+    def append(self, rows):
+        count = len(rows)
+        end = self.n + count
+        capacity = len(self.arrays['id'])
+        if end > capacity:
+            # Readers keep views of the old buffers, so grow into new ones
+            capacity = max(end, capacity * 2)
+            for name, array in self.arrays.items():
+                grown = np.empty(capacity, dtype=array.dtype)
+                grown[:self.n] = array[:self.n]
+                self.arrays[name] = grown
+
+        columns = list(zip(*rows))
+        for (name, _), values in zip(_SELECT, columns):
+            target = self.arrays[name][self.n:end]
+            if name in self.dictionaries:
+                target[:] = self.dictionaries[name].encode(values)
+            else:
+                target[:] = np.array(values, dtype=target.dtype)
+        self.n = end
+
+    def view(self):
+        arrays = {name: array[:self.n] for name, array in self.arrays.items()}
+        labels = {name: list(d.labels) for name, d in self.dictionaries.items()}
+        return self.n, arrays, labels
+
+
+class ColumnarSnapshot:
+    """Per-process columnar copy of performance_records joined with students
+
+    maybe_refresh() appends rows with an id above the watermark at most every
+    `refresh_interval` seconds. Deleted records are noticed by comparing the
+    row count with analytics_summary in the same transaction, and edited
+    students by invalidate() or `max_age`; either triggers a full reload.
+    """
+
+    def __init__(self, refresh_interval=2.0, max_age=300.0, chunk_size=50000):
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.chunk_size = chunk_size
+        self._columns = None
+        self._view = None
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._loaded_at = 0.0
+        self._refreshed_at = None
+        self._invalidated = True
+
+    def invalidate(self):
+        """Force a full reload on the next refresh"""
+        self._invalidated = True
+        self._last_check = 0.0
+
+    def maybe_refresh(self, conn, expected_rows=None):
+        """Refresh from the database if the last check is older than refresh_interval
+
+        `expected_rows` is the current record count (from the analytics summary,
+        read in the same transaction); a mismatch means rows were deleted.
+        """
+        if time.monotonic() - self._last_check < self.refresh_interval and self._view is not None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_check < self.refresh_interval and self._view is not None:
+                return
+            if self._invalidated or now - self._loaded_at > self.max_age:
+                self._reload(conn)
+            else:
+                self._load(conn, self._columns)
+                if expected_rows is not None and self._columns.n != expected_rows:
+                    self._reload(conn)
+            self._view = self._columns.view()
+            self._last_check = time.monotonic()
+            self._refreshed_at = time.time()
+
+    def _reload(self, conn):
+        columns = _Columns()
+        self._load(conn, columns)
+        self._columns = columns
+        self._loaded_at = time.monotonic()
+        self._invalidated = False
+
+    def _load(self, conn, columns):
+        from MySQLdb import cursors
+
+        select = ', '.join(expression for _, expression in _SELECT)
+        watermark = int(columns.arrays['id'][columns.n - 1]) if columns.n else 0
+        cur = conn.cursor(cursors.Cursor)
+        try:
+            while True:
+                cur.execute(f"""
+                    SELECT {select}
+                    FROM performance_records pr
+                    JOIN students s ON pr.student_id = s.id
+                    WHERE pr.id > %s
+                    ORDER BY pr.id
+                    LIMIT %s
+                """, (watermark, self.chunk_size))
+                rows = cur.fetchall()
+                if not rows:
+                    break
+                columns.append(rows)
+                watermark = rows[-1][0]
+        finally:
+            cur.close()
+
+    def info(self):
+        n = self._view[0] if self._view else 0
+        return {
+            'rows': n,
+            'watermark': int(self._view[1]['id'][n - 1]) if n else 0,
+            'refreshed_at': self._refreshed_at,
+            'bytes': sum(array.nbytes for array in self._view[1].values()) if self._view else 0,
+        }
+
+    def query(self, group_by=(), metrics=(), filters=None, age_band_width=5):
+        """Run a cohort query against the current snapshot
+
+        group_by: dimension names; metrics: (aggregate, column) pairs;
+        filters: {'categorical': {column: [labels]}, 'ranges': {column: (low, high)},
+        'student_id': [ids], 'since': datetime, 'until': datetime}.
+        Returns (groups, matched_rows).
+        """
+        if self._view is None:
+            return [], 0
+        n, arrays, labels = self._view
+        filters = filters or {}
+
+        mask = np.ones(n, dtype=bool)
+        for column, wanted in filters.get('categorical', {}).items():
+            allowed = [code for code, label in enumerate(labels[column]) if label in wanted]
+            mask &= np.isin(arrays[column], allowed)
+        for column, (low, high) in filters.get('ranges', {}).items():
+            if low is not None:
+                mask &= arrays[column] >= low
+            if high is not None:
+                mask &= arrays[column] <= high
+        if filters.get('student_id'):
+            mask &= np.isin(arrays['student_id'], filters['student_id'])
+        if filters.get('since') is not None:
+            mask &= arrays['created_at'] >= np.datetime64(filters['since'], 's')
+        if filters.get('until') is not None:
+            mask &= arrays['created_at'] < np.datetime64(filters['until'], 's')
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return [], 0
+
+        # Mixed-radix group key over the dimension codes
+        keys = np.zeros(len(rows), dtype=np.int64)
+        decoders = []
+        for dimension in group_by:
+            codes, size, decode = _dimension(dimension, arrays, labels, rows, age_band_width)
+            keys = keys * size + codes
+            decoders.append((dimension, size, decode))
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+
+        groups = [{} for _ in unique_keys]
+        remaining = unique_keys.copy()
+        for dimension, size, decode in reversed(decoders):
+            codes = remaining % size
+            remaining //= size
+            for group, code in zip(groups, codes):
+                group[dimension] = decode(int(code))
+        for group, count in zip(groups, counts):
+            group['count'] = int(count)
+
+        sorted_columns = {}
+        for aggregate, column in metrics:
+            if aggregate == 'count':
+                continue
+            values = arrays[column][rows].astype(np.float64)
+            if aggregate in ('sum', 'mean'):
+                result = np.bincount(inverse, weights=values, minlength=len(counts))
+                if aggregate == 'mean':
+                    result = result / counts
+            else:
+                if column not in sorted_columns:
+                    # Sort by (group, value) once per column; groups become contiguous runs
+                    permutation = np.lexsort((values, inverse))
+                    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+                    sorted_columns[column] = (values[permutation], starts)
+                ordered, starts = sorted_columns[column]
+                result = _order_statistic(aggregate, ordered, starts, counts)
+            name = f'{aggregate}_{column}'
+            for group, value in zip(groups, result):
+                group[name] = round(float(value), 4)
+
+        return groups, len(rows)
+
+
+def _dimension(name, arrays, labels, rows, age_band_width):
+    """Return (codes, size, decode) for one group-by dimension over rows"""
+    if name in CATEGORICAL_COLUMNS:
+        names = labels[name]
+        return arrays[name][rows].astype(np.int64), max(len(names), 1), names.__getitem__
+    if name == 'age_band':
+        bands = (arrays['age'][rows] // age_band_width).astype(np.int64)
+        low = int(bands.min())
+        return (bands - low, int(bands.max()) - low + 1,
+                lambda code: f'{(code + low) * age_band_width}-{(code + low + 1) * age_band_width - 1}')
+    months = arrays['created_at'][rows].astype('datetime64[M]').astype(np.int64)
+    low = int(months.min())
+    return (months - low, int(months.max()) - low + 1,
+            lambda code: str(np.datetime64(code + low, 'M')))
+
+
+def _order_statistic(aggregate, ordered, starts, counts):
+    """min/max/median/pNN per group from values sorted within contiguous groups"""
+    if aggregate == 'min':
+        return ordered[starts]
+    if aggregate == 'max':
+        return ordered[starts + counts - 1]
+    q = 50 if aggregate == 'median' else int(aggregate[1:])
+    # Linear interpolation, as numpy.percentile does by default
+    position = starts + (counts - 1) * (q / 100.0)
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def parse_cohort_query(args, parse_timestamp):
+    """Turn request.args into keyword arguments for ColumnarSnapshot.query
+
+    group_by=gender,age_band  metrics=median:attendance,p90:study_hours
+    <categorical>=A,B  <numeric>_min=  <numeric>_max=  student_id=1,2
+    since=/until=  age_band_width=5
+    """
+    group_by = [name for name in args.get('group_by', '').split(',') if name]
+    for name in group_by:
+        if name not in DIMENSIONS:
+            raise QueryError(f'group_by must be among: {", ".join(DIMENSIONS)}')
+    if len(group_by) > _MAX_GROUP_BY or len(set(group_by)) != len(group_by):
+        raise QueryError(f'group_by takes up to {_MAX_GROUP_BY} distinct dimensions')
+
+    metrics = []
+    for spec in (spec for spec in args.get('metrics', '').split(',') if spec):
+        aggregate, _, column = spec.partition(':')
+        percentile = _PERCENTILE.match(aggregate)
+        if aggregate not in AGGREGATES and not (percentile and int(percentile.group(1)) <= 100):
+            raise QueryError(f'Unknown aggregate {aggregate!r}: use {", ".join(AGGREGATES)} or p0-p100')
+        if aggregate != 'count' and column not in NUMERIC_COLUMNS:
+            raise QueryError(f'{aggregate} needs a column among: {", ".join(NUMERIC_COLUMNS)}')
+        metrics.append((aggregate, column))
+
+    filters = {'categorical': {}, 'ranges': {}}
+    for column in CATEGORICAL_COLUMNS:
+        if args.get(column):
+            filters['categorical'][column] = [None if value == 'null' else value
+                                              for value in args[column].split(',')]
+    for column in NUMERIC_COLUMNS:
+        bounds = []
+        for suffix in ('_min', '_max'):
+            value = args.get(column + suffix)
+            try:
+                bounds.append(float(value) if value not in (None, '') else None)
+            except ValueError:
+                raise QueryError(f'{column}{suffix} must be a number')
+        if bounds != [None, None]:
+            filters['ranges'][column] = tuple(bounds)
+    if args.get('student_id'):
+        try:
+            filters['student_id'] = [int(value) for value in args['student_id'].split(',')]
+        except ValueError:
+            raise QueryError('student_id must be a comma-separated list of integers')
+    filters['since'] = parse_timestamp(args.get('since'), 'since')
+    filters['until'] = parse_timestamp(args.get('until'), 'until')
+
+    try:
+        age_band_width = int(args.get('age_band_width', 5))
+    except ValueError:
+        raise QueryError('age_band_width must be an integer')
+    if age_band_width < 1:
+        raise QueryError('age_band_width must be at least 1')
+
+    return {'group_by': group_by, 'metrics': metrics, 'filters': filters,
+            'age_band_width': age_band_width}
@@ -88,10 +88,66 @@ COMMENT='Stores student performance predictions and historical data';
 CREATE INDEX idx_student_grade ON performance_records(student_id, predicted_grade);
 CREATE INDEX idx_date_range ON performance_records(created_at, student_id);
 
+-- Keyset pagination on (created_at, id) for /api/students and /api/records
+CREATE INDEX idx_students_created_id ON students(created_at, id);
+CREATE INDEX idx_records_created_id ON performance_records(created_at, id);
+
+-- ============================================
+-- TABLE 4: analytics_summary
+-- Purpose: Running totals for the analytics pages, updated by the application
+-- in the same transaction as each insert/delete. Spread over 16 slot rows;
+-- readers SUM all rows. Rebuild with: flask rebuild-analytics
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS analytics_summary (
+    slot TINYINT UNSIGNED PRIMARY KEY COMMENT 'Counter shard (0-15)',
+    total_students BIGINT NOT NULL DEFAULT 0,
+    total_records BIGINT NOT NULL DEFAULT 0,
+    grade_a BIGINT NOT NULL DEFAULT 0,
+    grade_b BIGINT NOT NULL DEFAULT 0,
+    grade_c BIGINT NOT NULL DEFAULT 0,
+    grade_d BIGINT NOT NULL DEFAULT 0,
+    grade_f BIGINT NOT NULL DEFAULT 0,
+    grade_none BIGINT NOT NULL DEFAULT 0,
+    sum_study_hours DOUBLE NOT NULL DEFAULT 0,
+    sum_previous_score DOUBLE NOT NULL DEFAULT 0,
+    sum_attendance DOUBLE NOT NULL DEFAULT 0,
+    sum_sleep_hours DOUBLE NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Incrementally maintained analytics totals';
+
+INSERT IGNORE INTO analytics_summary (slot) VALUES
+    (0), (1), (2), (3), (4), (5), (6), (7), (8), (9), (10), (11), (12), (13), (14), (15);
+
+-- ============================================
+-- TABLE 5: analytics_daily
+-- Purpose: Per-day rollup behind /api/analytics/timeseries, updated with
+-- analytics_summary. student_id 0 holds all-students totals (spread over slots)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS analytics_daily (
+    student_id INT NOT NULL COMMENT 'Student ID, or 0 for all students',
+    day DATE NOT NULL COMMENT 'DATE(created_at) of the records',
+    slot TINYINT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Counter shard for student_id 0',
+    records INT NOT NULL DEFAULT 0,
+    grade_a INT NOT NULL DEFAULT 0,
+    grade_b INT NOT NULL DEFAULT 0,
+    grade_c INT NOT NULL DEFAULT 0,
+    grade_d INT NOT NULL DEFAULT 0,
+    grade_f INT NOT NULL DEFAULT 0,
+    grade_none INT NOT NULL DEFAULT 0,
+    sum_study_hours DOUBLE NOT NULL DEFAULT 0,
+    sum_previous_score DOUBLE NOT NULL DEFAULT 0,
+    sum_attendance DOUBLE NOT NULL DEFAULT 0,
+    sum_sleep_hours DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_id, day, slot)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Daily analytics rollup, total and per student';
+
 -- ============================================
 -- Success message
 -- ============================================
 
 SELECT 'Database schema created successfully!' AS Status;
-SELECT 'Tables: users, students, performance_records' AS Tables_Created;
-SELECT 'Ready to use with Flask application!' AS Ready;
\ No newline at end of file
+SELECT 'Tables: users, students, performance_records, analytics_summary, analytics_daily' AS Tables_Created;
+SELECT 'Ready to use with Flask application!' AS Ready;
\ No newline at end of file
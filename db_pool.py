@@ -0,0 +1,368 @@
+"""
+MySQL connection pool for the Student Performance Prediction System
+Replaces flask_mysqldb's connect-per-request with pooled connections while
+keeping the same `mysql.connection` interface used by the routes
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from flask import g
+
+
+class PoolExhausted(Exception):
+    """Raised when no connection becomes available within the pool timeout"""
+
+
+class _PooledConnection:
+    """A raw connection plus the bookkeeping the pool needs"""
+
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """Thread-safe pool of DB-API connections
+
+    - opens `min_size` connections on first use, never trims idle ones below that,
+      and keeps at most `max_size` connections open
+    - pings a connection on checkout if it has been idle for `health_check_interval`
+      seconds and replaces it if the ping fails
+    - closes connections idle for more than `max_idle` seconds (above min_size)
+      and any connection older than `max_lifetime` seconds
+    - raises PoolExhausted if a checkout waits more than `timeout` seconds
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=5.0, max_idle=300.0,
+                 max_lifetime=3600.0, health_check_interval=5.0):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._filled = False
+        self._cond = threading.Condition()
+
+        self.acquires = 0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def acquire(self, timeout=None):
+        """Check out a healthy connection, waiting up to `timeout` seconds"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        if not self._filled:
+            self._fill()
+
+        while True:
+            entry = None
+            create = False
+            with self._cond:
+                expired = self._recycle_idle()
+            for old in expired:
+                self._close(old)
+
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolExhausted(
+                            f'No database connection available after {timeout:.1f}s '
+                            f'({self._in_use} of {self.max_size} in use)')
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    # Reserve the slot now, connect outside the lock
+                    self._size += 1
+                    create = True
+                self._in_use += 1
+
+            try:
+                if create:
+                    entry = _PooledConnection(self._connect())
+                    with self._cond:
+                        self.created += 1
+                elif not self._healthy(entry):
+                    self._close(entry)
+                    with self._cond:
+                        self.discarded += 1
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    continue
+            except Exception:
+                with self._cond:
+                    if create:
+                        self._size -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self.acquires += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            return entry
+
+    def release(self, entry, discard=False):
+        """Return a checked-out connection to the pool (or close it if discard)
+
+        A connection that is kept is rolled back first, so no transaction (and
+        no REPEATABLE READ snapshot) outlives its checkout; one that cannot be
+        rolled back is discarded.
+        """
+        now = time.monotonic()
+        if not discard and now - entry.created_at > self.max_lifetime:
+            discard = True
+        if not discard:
+            try:
+                entry.raw.rollback()
+            except Exception:
+                discard = True
+        if discard:
+            self._close(entry)
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self.discarded += 1
+                self._size -= 1
+            else:
+                entry.last_used = now
+                self._idle.append(entry)
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close when released)"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self.discarded += len(idle)
+        for entry in idle:
+            self._close(entry)
+
+    def stats(self):
+        """Return a JSON-serializable snapshot of pool usage and wait times"""
+        with self._cond:
+            return {
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'acquires': self.acquires,
+                'timeouts': self.timeouts,
+                'created': self.created,
+                'discarded': self.discarded,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'wait_seconds_avg': round(self.wait_seconds_total / self.acquires, 6)
+                                    if self.acquires else 0.0,
+            }
+
+    def _healthy(self, entry):
+        if time.monotonic() - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            entry.raw.ping()
+            return True
+        except Exception:
+            return False
+
+    def _fill(self):
+        # Open the min_size connections once, connecting outside the lock; a
+        # failure is left for the checkout's own connect to report
+        with self._cond:
+            if self._filled:
+                return
+            self._filled = True
+            missing = max(0, min(self.min_size, self.max_size) - self._size)
+            self._size += missing
+        for opened in range(missing):
+            try:
+                entry = _PooledConnection(self._connect())
+            except Exception:
+                with self._cond:
+                    self._size -= missing - opened
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self.created += 1
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def _recycle_idle(self):
+        # Called with the lock held; idle deque is oldest-first. Returns the
+        # expired entries for the caller to close once the lock is released
+        now = time.monotonic()
+        expired = []
+        while self._idle and self._size > self.min_size:
+            entry = self._idle[0]
+            if now - entry.last_used <= self.max_idle and now - entry.created_at <= self.max_lifetime:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self.discarded += 1
+            expired.append(entry)
+        return expired
+
+    def _close(self, entry):
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+
+
+class PooledMySQL:
+    """Drop-in replacement for flask_mysqldb.MySQL backed by a ConnectionPool
+
+    `mysql.connection` checks out one connection per app context (i.e. per
+    request) on first use; it is rolled back and returned to the pool when the
+    context ends. With `on_query`, every execute()/executemany() on cursors of
+    the configured class reports on_query(sql, seconds).
+    """
+
+    def __init__(self, app=None, on_query=None):
+        self.app = None
+        self.on_query = on_query
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('MYSQL_HOST', 'localhost')
+        app.config.setdefault('MYSQL_USER', None)
+        app.config.setdefault('MYSQL_PASSWORD', None)
+        app.config.setdefault('MYSQL_DB', None)
+        app.config.setdefault('MYSQL_PORT', 3306)
+        app.config.setdefault('MYSQL_CHARSET', 'utf8mb4')
+        app.config.setdefault('MYSQL_CURSORCLASS', None)
+        app.config.setdefault('MYSQL_CONNECT_TIMEOUT', 10)
+        app.config.setdefault('MYSQL_POOL_MIN_SIZE', 1)
+        app.config.setdefault('MYSQL_POOL_MAX_SIZE', 10)
+        app.config.setdefault('MYSQL_POOL_TIMEOUT', 5.0)
+        app.config.setdefault('MYSQL_POOL_MAX_IDLE', 300.0)
+        app.config.setdefault('MYSQL_POOL_MAX_LIFETIME', 3600.0)
+        app.config.setdefault('MYSQL_POOL_HEALTH_CHECK_INTERVAL', 5.0)
+        app.teardown_appcontext(self.teardown)
+
+    def _connect(self):
+        import MySQLdb
+        from MySQLdb import cursors
+
+        config = self.app.config
+        kwargs = {
+            'host': config['MYSQL_HOST'],
+            'port': config['MYSQL_PORT'],
+            'charset': config['MYSQL_CHARSET'],
+            'connect_timeout': config['MYSQL_CONNECT_TIMEOUT'],
+        }
+        if config['MYSQL_USER']:
+            kwargs['user'] = config['MYSQL_USER']
+        if config['MYSQL_PASSWORD']:
+            kwargs['passwd'] = config['MYSQL_PASSWORD']
+        if config['MYSQL_DB']:
+            kwargs['db'] = config['MYSQL_DB']
+        cursorclass = cursors.Cursor
+        if config['MYSQL_CURSORCLASS']:
+            cursorclass = getattr(cursors, config['MYSQL_CURSORCLASS'])
+        if self.on_query is not None:
+            cursorclass = _timed_cursor(cursorclass, self.on_query)
+        kwargs['cursorclass'] = cursorclass
+        return MySQLdb.connect(**kwargs)
+
+    @property
+    def pool(self):
+        # Connections must not cross a fork, so each worker process gets its own pool
+        pid = os.getpid()
+        if self._pool is None or self._pool_pid != pid:
+            with self._pool_lock:
+                if self._pool is None or self._pool_pid != pid:
+                    config = self.app.config
+                    self._pool = ConnectionPool(
+                        self._connect,
+                        min_size=config['MYSQL_POOL_MIN_SIZE'],
+                        max_size=config['MYSQL_POOL_MAX_SIZE'],
+                        timeout=config['MYSQL_POOL_TIMEOUT'],
+                        max_idle=config['MYSQL_POOL_MAX_IDLE'],
+                        max_lifetime=config['MYSQL_POOL_MAX_LIFETIME'],
+                        health_check_interval=config['MYSQL_POOL_HEALTH_CHECK_INTERVAL'],
+                    )
+                    self._pool_pid = pid
+        return self._pool
+
+    @property
+    def connection(self):
+        """The pooled connection for the current app context"""
+        entry = g.get('_mysql_pooled')
+        if entry is None:
+            entry = self.pool.acquire()
+            g._mysql_pooled = entry
+        return entry.raw
+
+    def teardown(self, exception):
+        entry = g.pop('_mysql_pooled', None)
+        if entry is None:
+            return
+        # release() rolls back, so the next request never sees an open transaction
+        self.pool.release(entry)
+
+
+@lru_cache(maxsize=None)
+def _timed_cursor(base, on_query):
+    """Subclass of a MySQLdb cursor class that times each statement"""
+
+    class TimedCursor(base):
+        _timing = False
+
+        def execute(self, query, args=None):
+            if self._timing:
+                return super().execute(query, args)
+            start = time.perf_counter()
+            try:
+                return super().execute(query, args)
+            finally:
+                on_query(query, time.perf_counter() - start)
+
+        def executemany(self, query, args):
+            # For non-INSERT statements MySQLdb calls execute() per row; time the whole batch once
+            self._timing = True
+            start = time.perf_counter()
+            try:
+                return super().executemany(query, args)
+            finally:
+                self._timing = False
+                on_query(query, time.perf_counter() - start)
+
+    TimedCursor.__name__ = f'Timed{base.__name__}'
+    return TimedCursor
@@ -0,0 +1,136 @@
+"""
+Streaming export of performance records for reporting
+Rows are read through an unbuffered server-side cursor and written out as
+NDJSON or CSV chunks by generators, so memory stays flat for any export size
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+EXPORT_COLUMNS = ('id', 'student_id', 'student_name', 'student_email', 'study_hours',
+                  'previous_score', 'attendance_percentage', 'extracurricular',
+                  'sleep_hours', 'tutoring', 'predicted_grade', 'actual_grade', 'created_at')
+
+_TIMESTAMP_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d')
+
+
+class ExportError(ValueError):
+    """Raised when export parameters are invalid"""
+
+
+def parse_timestamp(value, name):
+    """Parse a created_at filter ('YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS')"""
+    if value is None or value == '':
+        return None
+    for fmt in _TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ExportError(f'{name} must be a date (YYYY-MM-DD) or timestamp (YYYY-MM-DD HH:MM:SS)')
+
+
+def iter_records(conn, since=None, until=None, batch_size=1000):
+    """Yield performance records joined with their student, oldest first
+
+    `since` is inclusive and `until` exclusive, so passing the previous run's
+    `until` as the next `since` exports every row exactly once. Uses an
+    unbuffered SSDictCursor: rows come off the socket `batch_size` at a time.
+    """
+    from MySQLdb import cursors
+
+    conditions, params = [], []
+    if since is not None:
+        conditions.append("pr.created_at >= %s")
+        params.append(since)
+    if until is not None:
+        conditions.append("pr.created_at < %s")
+        params.append(until)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    cur = conn.cursor(cursors.SSDictCursor)
+    try:
+        cur.execute(f"""
+            SELECT pr.id, pr.student_id, s.name AS student_name, s.email AS student_email,
+                   pr.study_hours, pr.previous_score, pr.attendance_percentage,
+                   pr.extracurricular, pr.sleep_hours, pr.tutoring,
+                   pr.predicted_grade, pr.actual_grade, pr.created_at
+            FROM performance_records pr
+            JOIN students s ON pr.student_id = s.id
+            {where}
+            ORDER BY pr.created_at, pr.id
+        """, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cur.close()
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def ndjson_chunks(rows, chunk_rows=500):
+    """Encode rows as newline-delimited JSON, yielding one string per chunk_rows rows"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({key: _format_value(value) for key, value in row.items()}))
+        if len(lines) >= chunk_rows:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def csv_chunks(rows, columns=EXPORT_COLUMNS, chunk_rows=500):
+    """Encode rows as CSV with a header line, yielding one string per chunk_rows rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow([_format_value(row[column]) for column in columns])
+        count += 1
+        if count >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode_chunks(chunks, compress=False):
+    """Encode text chunks to UTF-8 bytes, optionally as one gzip stream"""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(rows, fmt='ndjson', compress=False):
+    """Return a generator of bytes for rows in the given format"""
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f'format must be one of: {", ".join(EXPORT_FORMATS)}')
+    chunks = ndjson_chunks(rows) if fmt == 'ndjson' else csv_chunks(rows)
+    return encode_chunks(chunks, compress)
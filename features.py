@@ -0,0 +1,120 @@
+"""
+Feature encoding for the Student Performance Prediction System
+Turns prediction inputs into the model's 6-column float64 feature matrix
+with plain dict lookups instead of LabelEncoder.transform
+"""
+
+import numpy as np
+
+
+# Model input columns, in training order
+FEATURE_NAMES = ('study_hours', 'previous_score', 'attendance',
+                 'extracurricular', 'sleep_hours', 'tutoring')
+
+# Valid ranges for numeric inputs (CHECK constraints in database_schema.sql)
+FEATURE_RANGES = {
+    'study_hours': (0, 24),
+    'previous_score': (0, 100),
+    'attendance': (0, 100),
+    'sleep_hours': (0, 24),
+}
+
+CATEGORICAL_FEATURES = ('extracurricular', 'tutoring')
+
+# Column indexes of the continuous inputs (0, 1, 2 and 4)
+NUMERIC_COLUMNS = tuple(j for j, name in enumerate(FEATURE_NAMES)
+                        if name not in CATEGORICAL_FEATURES)
+
+
+class FeatureError(ValueError):
+    """Raised when a prediction input is missing or invalid"""
+
+
+class FeaturePipeline:
+    """Precompiled encoder for prediction inputs
+
+    Built once per model from its fitted LabelEncoders: each categorical value is
+    mapped to its code with a dict lookup and numeric values are range-checked
+    against the schema constraints.
+    """
+
+    def __init__(self, encoders):
+        self.codes = {
+            name: {str(label): float(code) for code, label in enumerate(encoders[name].classes_)}
+            for name in CATEGORICAL_FEATURES
+        }
+
+    def _encode(self, name, value):
+        if name in self.codes:
+            code = self.codes[name].get(value) if isinstance(value, str) else None
+            if code is None:
+                raise FeatureError(f'{name} must be one of: {", ".join(sorted(self.codes[name]))}')
+            return code
+
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise FeatureError(f'Invalid value for {name}')
+        low, high = FEATURE_RANGES[name]
+        # NaN compares False, so it is rejected here too
+        if not low <= number <= high:
+            raise FeatureError(f'{name} must be between {low} and {high}')
+        return number
+
+    def transform_one(self, data):
+        """Encode one input mapping (dict or request.form) into a (6,) feature row"""
+        missing = [name for name in FEATURE_NAMES if name not in data]
+        if missing:
+            raise FeatureError(f'Missing required fields: {", ".join(missing)}')
+
+        row = np.empty(len(FEATURE_NAMES), dtype=np.float64)
+        for j, name in enumerate(FEATURE_NAMES):
+            row[j] = self._encode(name, data[name])
+        return row
+
+    def transform(self, rows):
+        """Encode a list of input dicts into an (n, 6) matrix
+
+        Returns (X, errors): errors[i] is None for valid rows, otherwise a message.
+        Rows with an error may be partially filled and must be skipped.
+        """
+        n = len(rows)
+        X = np.full((n, len(FEATURE_NAMES)), np.nan, dtype=np.float64)
+        errors = [None] * n
+
+        for i, row in enumerate(rows):
+            if not isinstance(row, dict):
+                errors[i] = 'Record must be a JSON object'
+                continue
+            missing = [name for name in FEATURE_NAMES if name not in row]
+            if missing:
+                errors[i] = f'Missing required fields: {", ".join(missing)}'
+
+        # Fill one column at a time, then range-check numeric columns vectorized
+        for j, name in enumerate(FEATURE_NAMES):
+            column = X[:, j]
+            codes = self.codes.get(name)
+            for i, row in enumerate(rows):
+                if errors[i] is not None:
+                    continue
+                value = row[name]
+                if codes is not None:
+                    code = codes.get(value) if isinstance(value, str) else None
+                    if code is None:
+                        errors[i] = f'{name} must be one of: {", ".join(sorted(codes))}'
+                    else:
+                        column[i] = code
+                else:
+                    try:
+                        column[i] = float(value)
+                    except (TypeError, ValueError):
+                        errors[i] = f'Invalid value for {name}'
+
+            if codes is None:
+                low, high = FEATURE_RANGES[name]
+                out_of_range = ~((column >= low) & (column <= high))
+                for i in np.flatnonzero(out_of_range):
+                    if errors[i] is None:
+                        errors[i] = f'{name} must be between {low} and {high}'
+
+        return X, errors
@@ -0,0 +1,34 @@
+"""
+Exclusive inter-process file locks that work on POSIX and Windows
+fcntl.lockf where it exists, otherwise msvcrt.locking on the file's first byte.
+"""
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock(f):
+    """Take an exclusive lock on the open file f, waiting until it is granted"""
+    if fcntl is not None:
+        fcntl.lockf(f, fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK gives up after ten one-second attempts; keep waiting
+            continue
+
+
+def unlock(f):
+    if fcntl is not None:
+        fcntl.lockf(f, fcntl.LOCK_UN)
+        return
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,294 @@
+"""
+Compiled inference engine for the RandomForest grade model
+Flattens a fitted RandomForestClassifier into contiguous NumPy arrays,
+evaluates every tree for a whole batch at once and stores the arrays in a
+memory-mappable artifact that pre-forked workers share
+
+Run directly to check parity and latency against sklearn, or to export the
+memory-mappable artifact for an existing pickle:
+    python forest_engine.py check [models/performance_model.pkl]
+    python forest_engine.py export [models/performance_model.pkl]
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import struct
+import sys
+import time
+
+import numpy as np
+
+
+# Artifact layout (all little-endian):
+#   8s magic | uint32 format version | uint32 header length | JSON header
+#   then each array at a 64-byte aligned offset from the start of the data section
+FOREST_MAGIC = b'SPFOREST'
+FOREST_FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct('<8sII')
+_ALIGN = 64
+_ARRAY_FIELDS = ('feature', 'threshold', 'children', 'value', 'roots')
+
+
+class CompiledForest:
+    """Array-backed copy of a fitted RandomForestClassifier
+
+    All trees share one node table. Leaves point to themselves, so walking
+    `max_depth` steps from every root lands each (tree, row) pair on its leaf
+    without any per-node branching in Python.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, classes, max_depth):
+        self.feature = feature        # int32 (n_nodes,) split feature, 0 for leaves
+        self.threshold = threshold    # float64 (n_nodes,) split threshold, +inf for leaves
+        self.children = children      # int32 (n_nodes, 2) left/right child index
+        self.value = value            # float64 (n_nodes, n_classes) leaf class probabilities
+        self.roots = roots            # int32 (n_trees,) root node of each tree
+        self.classes = classes        # class labels, same order as the model's classes_
+        self.max_depth = int(max_depth)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def predict_proba(self, X):
+        """Return class probabilities for X (n_samples, n_features)"""
+        # sklearn evaluates splits on float32 inputs; do the same for identical routing
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n = X.shape[0]
+
+        rows = np.arange(n)
+        node = np.repeat(self.roots[:, None], n, axis=1)
+        for _ in range(self.max_depth):
+            go_right = X[rows, self.feature[node]] > self.threshold[node]
+            node = self.children[node, go_right.view(np.int8)]
+
+        # Sum in tree order like RandomForestClassifier.predict_proba
+        proba = self.value[node].sum(axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        """Return predicted class labels for X"""
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compile_forest(model):
+    """Flatten a fitted RandomForestClassifier into a CompiledForest"""
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(offset, offset + n_nodes, dtype=np.int32)
+
+        left = np.where(is_leaf, node_ids, tree.children_left + offset)
+        right = np.where(is_leaf, node_ids, tree.children_right + offset)
+
+        # Normalize the same way DecisionTreeClassifier.predict_proba does
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, None]
+        normalizer[normalizer == 0.0] = 1.0
+        value = value / normalizer
+
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        children.append(np.column_stack([left, right]).astype(np.int32))
+        values.append(value)
+        roots.append(offset)
+
+        max_depth = max(max_depth, tree.max_depth)
+        offset += n_nodes
+
+    return CompiledForest(
+        feature=np.ascontiguousarray(np.concatenate(features)),
+        threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+        children=np.ascontiguousarray(np.concatenate(children)),
+        value=np.ascontiguousarray(np.concatenate(values)),
+        roots=np.asarray(roots, dtype=np.int32),
+        classes=np.asarray(model.classes_),
+        max_depth=max_depth,
+    )
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def forest_path_for(model_path):
+    """Return the memory-mappable artifact path that sits next to model_path"""
+    return os.path.splitext(model_path)[0] + '.forest'
+
+
+def save_forest(path, forest, metadata=None):
+    """Write forest to path in the versioned, uncompressed artifact format"""
+    arrays = {}
+    for name in _ARRAY_FIELDS:
+        array = np.ascontiguousarray(getattr(forest, name))
+        arrays[name] = array.astype(array.dtype.newbyteorder('<'), copy=False)
+
+    header = {
+        'format_version': FOREST_FORMAT_VERSION,
+        'max_depth': forest.max_depth,
+        'classes': [str(c) for c in forest.classes],
+        'arrays': {},
+        'metadata': metadata or {},
+    }
+    offset = 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        header['arrays'][name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+        }
+        offset += array.nbytes
+
+    header_bytes = json.dumps(header, sort_keys=True).encode('utf-8')
+    data_start = _aligned(_PREAMBLE.size + len(header_bytes))
+
+    tmp_path = f'{path}.tmp.{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(FOREST_MAGIC, FOREST_FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header['arrays'][name]['offset'])
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    # Replacing (not rewriting) the file keeps pages mapped by running workers valid
+    os.replace(tmp_path, path)
+
+
+def read_forest_header(path):
+    """Return (header, data_start) for an artifact without touching the arrays"""
+    with open(path, 'rb') as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) != _PREAMBLE.size:
+            raise ValueError(f'{path}: truncated forest artifact')
+        magic, format_version, header_length = _PREAMBLE.unpack(preamble)
+        if magic != FOREST_MAGIC:
+            raise ValueError(f'{path}: not a forest artifact')
+        if format_version != FOREST_FORMAT_VERSION:
+            raise ValueError(f'{path}: unsupported forest format version {format_version}')
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    return header, _aligned(_PREAMBLE.size + header_length)
+
+
+def load_forest(path):
+    """Open an artifact with numpy.memmap and return (forest, metadata)
+
+    Nothing is deserialized: the arrays are read-only views of the file, so
+    every process that maps it shares the same physical pages.
+    """
+    header, data_start = read_forest_header(path)
+    arrays = {}
+    for name in _ARRAY_FIELDS:
+        spec = header['arrays'][name]
+        arrays[name] = np.memmap(path, dtype=np.dtype(spec['dtype']), mode='r',
+                                 offset=data_start + spec['offset'],
+                                 shape=tuple(spec['shape']))
+
+    forest = CompiledForest(
+        classes=np.array(header['classes']),
+        max_depth=header['max_depth'],
+        **arrays,
+    )
+    return forest, header['metadata']
+
+
+def export_forest(model_path, forest_path=None):
+    """Compile the pickled model at model_path and save it as a forest artifact"""
+    forest_path = forest_path or forest_path_for(model_path)
+    with open(model_path, 'rb') as f:
+        raw = f.read()
+    saved_data = pickle.loads(raw)
+    save_forest(forest_path, compile_forest(saved_data['model']),
+                artifact_metadata(saved_data['encoders'], raw))
+    return forest_path
+
+
+def artifact_metadata(encoders, pickle_bytes):
+    """Metadata stored with a forest artifact: encoder classes and source version"""
+    return {
+        'version': hashlib.sha256(pickle_bytes).hexdigest(),
+        'encoders': {name: [str(c) for c in encoder.classes_]
+                     for name, encoder in encoders.items()},
+    }
+
+
+def random_features(n, seed=0):
+    """Random feature rows spanning the valid input ranges"""
+    rng = np.random.RandomState(seed)
+    return np.column_stack([
+        rng.uniform(0, 24, n).round(1),     # study_hours
+        rng.uniform(0, 100, n).round(1),    # previous_score
+        rng.uniform(0, 100, n).round(1),    # attendance
+        rng.randint(0, 2, n),               # extracurricular (encoded)
+        rng.uniform(0, 24, n).round(1),     # sleep_hours
+        rng.randint(0, 2, n),               # tutoring (encoded)
+    ]).astype(np.float64)
+
+
+def check_parity(model, forest, X):
+    """Return the number of rows where the compiled forest disagrees with sklearn"""
+    return int(np.sum(forest.predict(X) != model.predict(X)))
+
+
+def _mean_latency(fn, X, repeat):
+    fn(X)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(X)
+    return (time.perf_counter() - start) / repeat
+
+
+def _main(argv):
+    command = argv[1] if len(argv) > 1 else 'check'
+    path = argv[2] if len(argv) > 2 else 'models/performance_model.pkl'
+
+    if command == 'export':
+        print(f"Wrote {export_forest(path)}")
+        return 0
+    if command != 'check':
+        print(f"Unknown command: {command} (expected 'check' or 'export')")
+        return 2
+
+    with open(path, 'rb') as f:
+        model = pickle.load(f)['model']
+
+    forest = compile_forest(model)
+    print(f"Compiled {forest.n_trees} trees, {forest.n_nodes} nodes, max depth {forest.max_depth}")
+
+    X = random_features(100000)
+    mismatches = check_parity(model, forest, X)
+    print(f"Parity on {len(X)} rows: {mismatches} mismatches")
+
+    single = X[:1]
+    sklearn_ms = _mean_latency(model.predict, single, 50) * 1000
+    compiled_ms = _mean_latency(forest.predict, single, 500) * 1000
+    print(f"Single-row latency: sklearn {sklearn_ms:.3f} ms, compiled {compiled_ms:.3f} ms "
+          f"({sklearn_ms / compiled_ms:.1f}x)")
+
+    forest_path = forest_path_for(path)
+    if os.path.exists(forest_path):
+        mapped, _ = load_forest(forest_path)
+        mapped_mismatches = check_parity(model, mapped, X)
+        print(f"Parity of {forest_path}: {mapped_mismatches} mismatches")
+        mismatches += mapped_mismatches
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv))
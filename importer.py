@@ -0,0 +1,351 @@
+"""
+Bulk import of students and performance records from CSV or NDJSON
+Files are parsed incrementally, validated row by row against the schema
+constraints and written in chunks: one multi-row INSERT and one commit per
+chunk, with a per-row rejection report
+"""
+
+import csv
+import io
+import json
+import os
+
+import numpy as np
+
+from analytics_summary import SummaryDelta
+from exporter import ExportError, parse_timestamp
+
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+IMPORT_MODES = ('upsert', 'insert')
+
+STUDENT_FIELDS = ('name', 'age', 'gender', 'email')
+STUDENT_GENDERS = ('Male', 'Female', 'Other')
+STUDENT_AGE_RANGE = (5, 100)
+GRADE_VALUES = ('A', 'B', 'C', 'D', 'F')
+
+
+class BulkImportError(ValueError):
+    """Raised when import parameters are invalid"""
+
+
+class ImportReport:
+    """Counts for an import plus the first `keep` rejected rows (all if keep is None)"""
+
+    def __init__(self, keep=1000):
+        self.keep = keep
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = 0
+        self.chunks = 0
+        self.rejections = []
+
+    def reject(self, line, error):
+        self.rejected += 1
+        if self.keep is None or len(self.rejections) < self.keep:
+            self.rejections.append({'line': line, 'error': error})
+
+    def as_dict(self):
+        return {
+            'processed': self.processed,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'rejected': self.rejected,
+            'chunks': self.chunks,
+            'rejections': sorted(self.rejections, key=lambda rejection: rejection['line']),
+            'rejections_truncated': self.rejected > len(self.rejections),
+        }
+
+
+def detect_format(fmt=None, filename=None, content_type=None):
+    """Pick csv or ndjson from an explicit format, a file extension or a content type"""
+    if fmt:
+        if fmt not in IMPORT_FORMATS:
+            raise BulkImportError(f'format must be one of: {", ".join(IMPORT_FORMATS)}')
+        return fmt
+    if filename:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == '.csv':
+            return 'csv'
+        if extension in ('.ndjson', '.jsonl'):
+            return 'ndjson'
+    if content_type and 'csv' in content_type:
+        return 'csv'
+    return 'ndjson'
+
+
+def iter_rows(stream, fmt):
+    """Yield (line, row, error) for each record in a binary stream
+
+    Rows are read one at a time; `row` is None when the line could not be parsed.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line, raw in enumerate(text, start=1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            yield line, json.loads(raw), None
+        except ValueError as e:
+            yield line, None, f'Invalid JSON: {e}'
+
+
+def _chunks(rows, chunk_size):
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def validate_student(row):
+    """Return ((name, age, gender, email), None) or (None, error) for one row"""
+    if not isinstance(row, dict):
+        return None, 'Record must be a JSON object'
+    missing = [field for field in STUDENT_FIELDS if _text(row.get(field)) in (None, '')]
+    if missing:
+        return None, f'Missing required fields: {", ".join(missing)}'
+
+    name = str(_text(row['name']))
+    if len(name) > 100:
+        return None, 'name must be at most 100 characters'
+
+    try:
+        age = int(str(_text(row['age'])))
+    except ValueError:
+        return None, 'Invalid value for age'
+    low, high = STUDENT_AGE_RANGE
+    if not low <= age <= high:
+        return None, f'age must be between {low} and {high}'
+
+    gender = _text(row['gender'])
+    if gender not in STUDENT_GENDERS:
+        return None, f'gender must be one of: {", ".join(STUDENT_GENDERS)}'
+
+    email = str(_text(row['email']))
+    if len(email) > 100 or '@' not in email:
+        return None, 'Invalid value for email'
+
+    return (name, age, gender, email), None
+
+
+def _existing_emails(cur, emails):
+    placeholders = ', '.join(['%s'] * len(emails))
+    cur.execute(f"SELECT email FROM students WHERE email IN ({placeholders})", list(emails))
+    # students.email uses a case-insensitive collation
+    return {row['email'].lower() for row in cur.fetchall()}
+
+
+def _write_chunk(conn, cur, sql, params, lines, report, summarize):
+    """executemany one chunk; on failure retry row by row to isolate bad rows
+
+    summarize(written) returns the SummaryDelta for the written indexes, which
+    is applied in the chunk's transaction. Returns the set of indexes into
+    params that could not be written.
+    """
+    try:
+        cur.executemany(sql, params)
+        summarize(range(len(params))).apply(cur)
+        conn.commit()
+        return set()
+    except Exception:
+        conn.rollback()
+
+    failed = set()
+    for i, values in enumerate(params):
+        try:
+            cur.execute(sql, values)
+        except Exception as e:
+            failed.add(i)
+            report.reject(lines[i], str(e))
+    summarize([i for i in range(len(params)) if i not in failed]).apply(cur)
+    conn.commit()
+    return failed
+
+
+def import_students(conn, rows, chunk_size=1000, mode='upsert', report=None):
+    """Import (line, row, error) tuples from iter_rows into students
+
+    mode 'upsert' updates name/age/gender of students whose email already
+    exists; mode 'insert' rejects them. `conn` must use DictCursor.
+    """
+    if mode not in IMPORT_MODES:
+        raise BulkImportError(f'mode must be one of: {", ".join(IMPORT_MODES)}')
+    report = report or ImportReport()
+    sql = "INSERT INTO students (name, age, gender, email) VALUES (%s, %s, %s, %s)"
+    if mode == 'upsert':
+        sql += " ON DUPLICATE KEY UPDATE name = VALUES(name), age = VALUES(age), gender = VALUES(gender)"
+
+    cur = conn.cursor()
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            report.chunks += 1
+            report.processed += len(chunk)
+            valid = []
+            for line, row, error in chunk:
+                values = None
+                if error is None:
+                    values, error = validate_student(row)
+                if error:
+                    report.reject(line, error)
+                else:
+                    valid.append((line, values))
+            if not valid:
+                continue
+
+            existing = _existing_emails(cur, {values[3] for _, values in valid})
+            params, lines, is_update = [], [], []
+            seen = set()
+            for line, values in valid:
+                key = values[3].lower()
+                already = key in existing or key in seen
+                if already and mode == 'insert':
+                    report.reject(line, 'Email already exists' if key in existing
+                                  else 'Duplicate email in file')
+                    continue
+                seen.add(key)
+                params.append(values)
+                lines.append(line)
+                is_update.append(already)
+            if not params:
+                continue
+
+            def summarize(written):
+                delta = SummaryDelta()
+                delta.add_students(sum(1 for i in written if not is_update[i]))
+                return delta
+
+            failed = _write_chunk(conn, cur, sql, params, lines, report, summarize)
+            for i, updated in enumerate(is_update):
+                if i in failed:
+                    continue
+                if updated:
+                    report.updated += 1
+                else:
+                    report.inserted += 1
+    finally:
+        cur.close()
+    return report
+
+
+def _optional_grade(row, field):
+    value = _text(row.get(field))
+    if value in (None, ''):
+        return None, None
+    if value not in GRADE_VALUES:
+        return None, f'{field} must be one of: {", ".join(GRADE_VALUES)}'
+    return value, None
+
+
+def import_records(conn, rows, pipeline, predict, chunk_size=1000, report=None):
+    """Import (line, row, error) tuples from iter_rows into performance_records
+
+    Inputs are validated with the model's FeaturePipeline. Rows without a
+    predicted_grade are predicted with `predict` (a feature matrix -> grades
+    function), one call per chunk. An optional created_at keeps historical
+    timestamps, so files from exporter.py can be imported as they are.
+    `conn` must use DictCursor.
+    """
+    report = report or ImportReport()
+    sql = """
+        INSERT INTO performance_records
+        (student_id, study_hours, previous_score, attendance_percentage,
+        extracurricular, sleep_hours, tutoring, predicted_grade, actual_grade, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, COALESCE(%s, CURRENT_TIMESTAMP))
+    """
+
+    cur = conn.cursor()
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            report.chunks += 1
+            report.processed += len(chunk)
+            parsed = []
+            for line, row, error in chunk:
+                if error:
+                    report.reject(line, error)
+                    continue
+                # Accept files written by the exporter, which uses the column name
+                if isinstance(row, dict) and 'attendance' not in row and 'attendance_percentage' in row:
+                    row['attendance'] = row['attendance_percentage']
+                parsed.append((line, row))
+            if not parsed:
+                continue
+
+            X, errors = pipeline.transform([row for _, row in parsed])
+            extras = [None] * len(parsed)
+            for i, (line, row) in enumerate(parsed):
+                if errors[i] is not None:
+                    continue
+                try:
+                    student_id = int(str(_text(row.get('student_id'))))
+                except ValueError:
+                    errors[i] = 'Invalid value for student_id'
+                    continue
+                predicted, errors[i] = _optional_grade(row, 'predicted_grade')
+                if errors[i] is None:
+                    actual, errors[i] = _optional_grade(row, 'actual_grade')
+                if errors[i] is None:
+                    try:
+                        created_at = parse_timestamp(_text(row.get('created_at')), 'created_at')
+                    except ExportError as e:
+                        errors[i] = str(e)
+                if errors[i] is None:
+                    extras[i] = (student_id, predicted, actual, created_at)
+
+            candidate_ids = sorted({extra[0] for extra in extras if extra})
+            if candidate_ids:
+                placeholders = ', '.join(['%s'] * len(candidate_ids))
+                cur.execute(f"SELECT id FROM students WHERE id IN ({placeholders})", candidate_ids)
+                existing_ids = {row['id'] for row in cur.fetchall()}
+                for i, extra in enumerate(extras):
+                    if extra and extra[0] not in existing_ids:
+                        errors[i] = 'Student not found'
+
+            for i, (line, _) in enumerate(parsed):
+                if errors[i] is not None:
+                    report.reject(line, errors[i])
+            valid = [i for i in range(len(parsed)) if errors[i] is None]
+            if not valid:
+                continue
+
+            grades = {}
+            to_predict = np.array([i for i in valid if extras[i][1] is None], dtype=np.intp)
+            if len(to_predict):
+                grades = dict(zip(to_predict.tolist(), (str(g) for g in predict(X[to_predict]))))
+
+            params, lines = [], []
+            for i in valid:
+                row = parsed[i][1]
+                student_id, predicted, actual, created_at = extras[i]
+                params.append((student_id, float(X[i, 0]), float(X[i, 1]), float(X[i, 2]),
+                               _text(row['extracurricular']), float(X[i, 4]), _text(row['tutoring']),
+                               predicted or grades[i], actual, created_at))
+                lines.append(parsed[i][0])
+
+            def summarize(written):
+                delta = SummaryDelta()
+                for i in written:
+                    values = params[i]
+                    delta.add_record(values[0], values[7], values[1], values[2], values[3],
+                                     values[5], created_at=values[9])
+                return delta
+
+            failed = _write_chunk(conn, cur, sql, params, lines, report, summarize)
+            report.inserted += len(params) - len(failed)
+    finally:
+        cur.close()
+    return report
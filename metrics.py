@@ -0,0 +1,368 @@
+"""
+Request latency and phase timing metrics in Prometheus text format
+Observations go into per-process histograms (a lock and a bisect each). Every
+process writes its totals to a JSON file in a shared directory at most once
+per flush interval, and /metrics sums the files of all workers. Files of
+exited processes are folded into one archive file, so totals survive worker
+restarts without the directory growing.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, request, before_render_template, template_rendered
+from flask.json.provider import DefaultJSONProvider
+
+from file_lock import lock, unlock
+
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_HISTOGRAMS = {
+    'http_request_duration_seconds': ('Request latency by endpoint, method and status',
+                                      REQUEST_BUCKETS),
+    'app_phase_duration_seconds': ('Time spent in one phase of request handling',
+                                   PHASE_BUCKETS),
+}
+
+_STATEMENT = re.compile(r'\s*(?:/\*.*?\*/\s*)?(\w+)', re.S)
+_TABLE = {
+    'SELECT': re.compile(r'\bFROM\s+`?(\w+)', re.I),
+    'DELETE': re.compile(r'\bFROM\s+`?(\w+)', re.I),
+    'INSERT': re.compile(r'\bINTO\s+`?(\w+)', re.I),
+    'UPDATE': re.compile(r'^\s*UPDATE\s+`?(\w+)', re.I),
+}
+_QUERY_NAMES_MAX = 1000
+
+_ARCHIVE_FILE = 'archive.json'
+_LOCK_FILE = '.lock'
+
+
+def query_name(sql):
+    """Label for a statement: its verb and first table, e.g. 'SELECT students'"""
+    match = _STATEMENT.match(sql)
+    verb = match.group(1).upper() if match else 'UNKNOWN'
+    table = _TABLE.get(verb)
+    table = table.search(sql) if table else None
+    return f'{verb} {table.group(1)}' if table else verb
+
+
+class Metrics:
+    """Histograms keyed by (metric, labels), aggregated across workers via `directory`
+
+    `gauges` and `counters`, if given, return this process's current
+    {name: (help, value)}. Both are written with the histograms. Gauges are
+    summed over live processes only; counters must only ever grow within a
+    process and keep the totals of exited ones. When disabled, observations
+    are dropped.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0, gauges=None, counters=None,
+                 enabled=True):
+        self.enabled = enabled
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.gauges = gauges
+        self.counters = counters
+        self._series = {}
+        self._counter_base = {}
+        self._query_names = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._last_flush = 0.0
+        self._dirty = False
+
+    def _claim(self):
+        # After a fork, carry on from whatever an earlier process with this pid
+        # wrote, so every file only ever grows
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        self._pid = pid
+        self._series = {}
+        self._counter_base = {}
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            previous = self._read(self._path(pid))
+            _merge(self._series, self._counter_base, previous)
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f'{pid}.json')
+
+    def observe(self, name, seconds, **labels):
+        """Add one observation to histogram `name`"""
+        if not self.enabled:
+            return
+        bounds = _HISTOGRAMS[name][1]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._claim()
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(bounds) + 1), 0.0, 0]
+            series[0][bisect_left(bounds, seconds)] += 1
+            series[1] += seconds
+            series[2] += 1
+            self._dirty = True
+
+    @contextmanager
+    def phase(self, phase, **labels):
+        """Time a block as one phase, e.g. with metrics.phase('encode'):"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('app_phase_duration_seconds', time.perf_counter() - start,
+                         phase=phase, **labels)
+
+    def observe_query(self, sql, seconds):
+        """Record one SQL statement's execution time under its query_name"""
+        name = self._query_names.get(sql)
+        if name is None:
+            name = query_name(sql)
+            if len(self._query_names) < _QUERY_NAMES_MAX:
+                self._query_names[sql] = name
+        self.observe('app_phase_duration_seconds', seconds, phase='sql', query=name)
+
+    @staticmethod
+    def _values(source):
+        if source is None:
+            return {}
+        return {name: value for name, (_, value) in source().items()}
+
+    def maybe_flush(self):
+        """Write this process's totals if the flush interval has passed"""
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self.directory:
+            return
+        gauges = self._values(self.gauges)
+        counters = self._values(self.counters)
+        with self._lock:
+            self._claim()
+            self._last_flush = time.monotonic()
+            if not self._dirty and not gauges and not counters:
+                return
+            for name, value in self._counter_base.items():
+                counters[name] = counters.get(name, 0) + value
+            data = {
+                'pid': self._pid,
+                'series': _dump_series(self._series),
+                'gauges': gauges,
+                'counters': counters,
+            }
+            self._dirty = False
+        path = self._path(data['pid'])
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _worker_files(self):
+        """(pid, filename) of every per-process file"""
+        found = []
+        for filename in os.listdir(self.directory):
+            stem, ext = os.path.splitext(filename)
+            if ext == '.json' and stem.isdigit():
+                found.append((int(stem), filename))
+        return found
+
+    def _archive_dead(self):
+        """Fold the files of exited processes into the archive file and delete them"""
+        if not any(not _alive(pid) for pid, _ in self._worker_files()):
+            return
+        with open(os.path.join(self.directory, _LOCK_FILE), 'a+b') as lock_file:
+            lock(lock_file)
+            try:
+                archive_path = os.path.join(self.directory, _ARCHIVE_FILE)
+                series, counters = {}, {}
+                _merge(series, counters, self._read(archive_path))
+                dead = []
+                # Re-list under the lock: another process may have archived them already
+                for pid, filename in self._worker_files():
+                    if pid == self._pid or _alive(pid):
+                        continue
+                    _merge(series, counters, self._read(os.path.join(self.directory, filename)))
+                    dead.append(filename)
+                if not dead:
+                    return
+                tmp = f'{archive_path}.tmp'
+                with open(tmp, 'w') as f:
+                    json.dump({'series': _dump_series(series), 'counters': counters}, f)
+                os.replace(tmp, archive_path)
+                for filename in dead:
+                    try:
+                        os.remove(os.path.join(self.directory, filename))
+                    except OSError:
+                        pass
+            finally:
+                unlock(lock_file)
+
+    def _collect(self):
+        """Sum histograms and counters of all processes; gauges only of live ones"""
+        if not self.directory:
+            with self._lock:
+                self._claim()
+                series = {key: [list(s[0]), s[1], s[2]] for key, s in self._series.items()}
+            return series, self._values(self.gauges), self._values(self.counters)
+
+        self._archive_dead()
+        series, gauges, counters = {}, {}, {}
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            data = self._read(os.path.join(self.directory, filename))
+            _merge(series, counters, data)
+            if _alive(data.get('pid')):
+                for name, value in data.get('gauges', {}).items():
+                    gauges[name] = gauges.get(name, 0) + value
+        return series, gauges, counters
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        gauges = self.gauges() if self.gauges is not None else {}
+        counters = self.counters() if self.counters is not None else {}
+        self.flush()
+        series, gauge_totals, counter_totals = self._collect()
+
+        lines = []
+        for name, (help_text, bounds) in _HISTOGRAMS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (metric, labels), (buckets, total, count) in sorted(series.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket in zip(bounds + (float('inf'),), buckets):
+                    cumulative += bucket
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {total!r}')
+                lines.append(f'{name}_count{_labels(labels)} {count}')
+
+        for kind, described, totals in (('gauge', gauges, gauge_totals),
+                                        ('counter', counters, counter_totals)):
+            for name, (help_text, _) in described.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name} {totals.get(name, 0)!r}')
+        return '\n'.join(lines) + '\n'
+
+
+def _merge(series, counters, data):
+    """Add the histograms and counters of one file's data into series and counters"""
+    for name, labels, buckets, total, count in data.get('series', []):
+        key = (name, tuple(tuple(label) for label in labels))
+        current = series.setdefault(key, [[0] * len(buckets), 0.0, 0])
+        current[0] = [a + b for a, b in zip(current[0], buckets)]
+        current[1] += total
+        current[2] += count
+    for name, value in data.get('counters', {}).items():
+        counters[name] = counters.get(name, 0) + value
+
+
+def _dump_series(series):
+    return [[name, list(labels), list(values[0]), values[1], values[2]]
+            for (name, labels), values in series.items()]
+
+
+def _alive(pid):
+    """Whether a process exists, without signalling it"""
+    if not pid:
+        return False
+    if os.name == 'nt':
+        # os.kill() terminates the process on Windows whatever the signal
+        return _alive_windows(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _alive_windows(pid):
+    import ctypes
+
+    process_query_limited_information = 0x1000
+    still_active = 259
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(process_query_limited_information, False, pid)
+    if not handle:
+        # Access denied means the process exists but belongs to someone else
+        return kernel32.GetLastError() == 5
+    try:
+        code = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == still_active
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def instrument_app(app, metrics):
+    """Time every request by endpoint, method and status, plus JSON and template rendering"""
+
+    @app.before_request
+    def start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            # Unmatched URLs share one label so that scanners cannot explode the series
+            metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                            endpoint=request.endpoint or 'unmatched', method=request.method,
+                            status=str(response.status_code))
+        metrics.maybe_flush()
+        return response
+
+    def start_render(sender, template, context, **extra):
+        g._metrics_render_started = time.perf_counter()
+
+    def record_render(sender, template, context, **extra):
+        started = g.pop('_metrics_render_started', None)
+        if started is not None:
+            metrics.observe('app_phase_duration_seconds', time.perf_counter() - started,
+                            phase='render', format='html')
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(record_render, app, weak=False)
+
+    class TimedJSONProvider(DefaultJSONProvider):
+        def response(self, *args, **kwargs):
+            with metrics.phase('render', format='json'):
+                return super().response(*args, **kwargs)
+
+    app.json = TimedJSONProvider(app)
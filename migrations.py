@@ -0,0 +1,162 @@
+"""
+Versioned schema migrations
+Each migration is idempotent (tables IF NOT EXISTS, indexes created only when
+missing, online where the server supports it) and recorded in
+schema_migrations once applied, so startup skips the DDL once the schema is
+current and databases created from database_schema.sql are adopted as they are.
+"""
+
+from analytics_summary import create_summary_table, rebuild_summary
+
+
+# Named lock so that workers starting together run the migrations once
+MIGRATION_LOCK = 'student_performance_db.migrations'
+MIGRATION_LOCK_TIMEOUT = 600
+
+_ER_NO_SUCH_TABLE = 1146
+
+_TABLE_OPTIONS = "ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci"
+
+
+def ensure_index(cur, table, name, columns):
+    """Create an index unless it already exists (MySQL has no CREATE INDEX IF NOT EXISTS)
+
+    The index is built in place without blocking reads or writes to the table.
+    """
+    cur.execute("""
+        SELECT COUNT(*) AS count FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, name))
+    if cur.fetchone()['count'] == 0:
+        cur.execute(f"ALTER TABLE {table} ADD INDEX {name} ({columns}), "
+                    "ALGORITHM=INPLACE, LOCK=NONE")
+
+
+def _create_core_tables(cur):
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            full_name VARCHAR(100) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) {_TABLE_OPTIONS}
+    """)
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS students (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            age INT NOT NULL,
+            gender VARCHAR(10) NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) {_TABLE_OPTIONS}
+    """)
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS performance_records (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            student_id INT NOT NULL,
+            study_hours FLOAT NOT NULL,
+            previous_score FLOAT NOT NULL,
+            attendance_percentage FLOAT NOT NULL,
+            extracurricular VARCHAR(10) NOT NULL,
+            sleep_hours FLOAT NOT NULL,
+            tutoring VARCHAR(10) NOT NULL,
+            predicted_grade VARCHAR(5),
+            actual_grade VARCHAR(5),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+        ) {_TABLE_OPTIONS}
+    """)
+
+
+def _keyset_pagination_indexes(cur):
+    ensure_index(cur, 'students', 'idx_students_created_id', 'created_at, id')
+    ensure_index(cur, 'performance_records', 'idx_records_created_id', 'created_at, id')
+
+
+def _analytics_summary(cur):
+    create_summary_table(cur)
+    # Always rebuild: database_schema.sql pre-creates the (zeroed) slot rows, so
+    # their presence says nothing about whether the totals match the tables.
+    # This runs once per database and the rebuild is idempotent.
+    rebuild_summary(cur)
+
+
+def _query_indexes(cur):
+    # The secondary indexes from database_schema.sql that are not redundant:
+    # idx_created_at equals idx_records_created_id (InnoDB appends the primary
+    # key), idx_student_grade also serves student_id lookups and the foreign
+    # key, and the UNIQUE constraints already index users.username/email and
+    # students.email
+    ensure_index(cur, 'students', 'idx_student_name', 'name')
+    ensure_index(cur, 'performance_records', 'idx_student_grade', 'student_id, predicted_grade')
+    ensure_index(cur, 'performance_records', 'idx_predicted_grade', 'predicted_grade')
+    ensure_index(cur, 'performance_records', 'idx_date_range', 'created_at, student_id')
+
+
+# (version, name, function) in the order they are applied; append only
+MIGRATIONS = [
+    (1, 'create_core_tables', _create_core_tables),
+    (2, 'keyset_pagination_indexes', _keyset_pagination_indexes),
+    (3, 'analytics_summary', _analytics_summary),
+    (4, 'query_indexes', _query_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(cur):
+    """Return the highest applied migration version (0 for a new database)"""
+    try:
+        cur.execute("SELECT MAX(version) AS version FROM schema_migrations")
+    except Exception as e:
+        if e.args[:1] == (_ER_NO_SUCH_TABLE,):
+            return 0
+        raise
+    return cur.fetchone()['version'] or 0
+
+
+def migrate(conn, target=LATEST_VERSION):
+    """Apply pending migrations up to target; returns the names applied
+
+    When the schema is already current this is a single SELECT.
+    """
+    cur = conn.cursor()
+    try:
+        if current_version(cur) >= target:
+            conn.commit()
+            return []
+
+        cur.execute("SELECT GET_LOCK(%s, %s) AS locked", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+        if not cur.fetchone()['locked']:
+            raise RuntimeError('Timed out waiting for another process to finish migrating')
+        try:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Re-read under the lock: another process may have migrated meanwhile
+            cur.execute("SELECT version FROM schema_migrations")
+            done = {row['version'] for row in cur.fetchall()}
+
+            applied = []
+            for version, name, migration in MIGRATIONS:
+                if version > target or version in done:
+                    continue
+                print(f"Applying migration {version}: {name}")
+                migration(cur)
+                cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                            (version, name))
+                conn.commit()
+                applied.append(name)
+            return applied
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cur.fetchall()
+    finally:
+        cur.close()
@@ -0,0 +1,158 @@
+"""
+Versioned model registry for the Student Performance Prediction System
+Every trained model is kept under models/versions/<version_id>/ and promoted
+by atomically replacing the live artifacts that the model holder watches
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import time
+
+from forest_engine import artifact_metadata, compile_forest, forest_path_for, save_forest
+from model_store import save_model_atomic
+
+
+class ModelRegistry:
+    """Directory of trained model versions plus the live MODEL_PATH artifacts"""
+
+    def __init__(self, root, model_path, keep=5):
+        self.root = root
+        self.model_path = model_path
+        self.forest_path = forest_path_for(model_path)
+        self.keep = keep
+
+    def _version_dir(self, version_id):
+        return os.path.join(self.root, version_id)
+
+    def save_version(self, model, encoders, metadata):
+        """Save a fitted model as a new version and return its metadata"""
+        payload = {'model': model, 'encoders': encoders}
+        # Creates root on the first save
+        staging = os.path.join(self.root, f'.staging-{os.getpid()}-{time.time_ns()}')
+        os.makedirs(staging)
+        raw = save_model_atomic(os.path.join(staging, 'performance_model.pkl'), payload)
+        forest_meta = artifact_metadata(encoders, raw)
+        save_forest(os.path.join(staging, 'performance_model.forest'),
+                    compile_forest(model), forest_meta)
+
+        digest = forest_meta['version']
+        version_id = time.strftime('%Y%m%d-%H%M%S', time.gmtime()) + '-' + digest[:8]
+        meta = dict(metadata, version_id=version_id, digest=digest, created_at=time.time())
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2, sort_keys=True)
+
+        # Publish the whole directory at once
+        os.replace(staging, self._version_dir(version_id))
+        return meta
+
+    def versions(self):
+        """Return metadata for all saved versions, newest first"""
+        result = []
+        if not os.path.isdir(self.root):
+            return result
+        for name in os.listdir(self.root):
+            if name.startswith('.'):
+                continue
+            meta = self.get(name)
+            if meta is not None:
+                result.append(meta)
+        result.sort(key=lambda meta: meta['created_at'], reverse=True)
+        return result
+
+    def get(self, version_id):
+        """Return metadata for one version, or None if it does not exist"""
+        path = os.path.join(self._version_dir(version_id), 'meta.json')
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            return None
+
+    def current(self):
+        """Return metadata for the version that is live at model_path, or None"""
+        try:
+            with open(self.model_path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except FileNotFoundError:
+            return None
+        for meta in self.versions():
+            if meta['digest'] == digest:
+                return meta
+        return None
+
+    def load_model(self, version_id):
+        """Unpickle the sklearn model saved for version_id"""
+        with open(os.path.join(self._version_dir(version_id), 'performance_model.pkl'), 'rb') as f:
+            return pickle.load(f)['model']
+
+    def promote(self, version_id):
+        """Make version_id the live model; running workers hot-reload it"""
+        if self.get(version_id) is None:
+            raise KeyError(f'Unknown model version: {version_id}')
+        version_dir = self._version_dir(version_id)
+        # Pickle first, forest last: the forest is only preferred once it is the newer file
+        for name, target in (('performance_model.pkl', self.model_path),
+                             ('performance_model.forest', self.forest_path)):
+            tmp_path = f'{target}.tmp.{os.getpid()}'
+            shutil.copyfile(os.path.join(version_dir, name), tmp_path)
+            os.replace(tmp_path, target)
+
+    def prune(self, current_digest=None):
+        """Delete all but the newest `keep` versions, never the live one"""
+        for meta in self.versions()[self.keep:]:
+            if meta['digest'] != current_digest:
+                shutil.rmtree(self._version_dir(meta['version_id']), ignore_errors=True)
+
+
+class RetrainJob:
+    """Runs `python training.py ...` in a child process, one job at a time
+
+    Training never runs on a request thread: the child fits and promotes the model
+    and writes its outcome to `status_path`, which status() reports.
+    """
+
+    def __init__(self, status_path):
+        self.status_path = status_path
+        self._process = None
+        self._command = None
+        self._started_at = None
+
+    @property
+    def running(self):
+        return self._process is not None and self._process.poll() is None
+
+    def start(self, args, env=None):
+        """Start the job; returns False if one is already running in this process"""
+        if self.running:
+            return False
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'training.py')
+        self._command = args[0]
+        self._started_at = time.time()
+        os.makedirs(os.path.dirname(self.status_path) or '.', exist_ok=True)
+        self._process = subprocess.Popen(
+            [sys.executable, script] + list(args) + ['--status-file', self.status_path],
+            env=dict(os.environ, **(env or {}))
+        )
+        return True
+
+    def status(self):
+        """Return a JSON-serializable description of the current or last job"""
+        status = {
+            'running': self.running,
+            'command': self._command,
+            'pid': self._process.pid if self._process else None,
+            'started_at': self._started_at,
+            'exit_code': self._process.poll() if self._process else None,
+            'result': None,
+        }
+        try:
+            with open(self.status_path) as f:
+                status['result'] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+        return status
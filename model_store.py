@@ -0,0 +1,390 @@
+"""
+Model store for the Student Performance Prediction System
+Keeps the trained model resident in memory, hot-reloads it when the
+artifact on disk changes, micro-batches concurrent predictions and caches
+their results
+"""
+
+import hashlib
+import os
+import pickle
+import queue
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from features import NUMERIC_COLUMNS, FeaturePipeline
+from forest_engine import compile_forest, load_forest, read_forest_header
+
+
+# Immutable view of one loaded artifact. Requests grab a single reference to
+# it, so a concurrent reload can never hand out a half-swapped model/encoders pair.
+# `model` is None when the snapshot was mapped from the forest artifact.
+ModelSnapshot = namedtuple('ModelSnapshot',
+                           ['model', 'encoders', 'pipeline', 'engine', 'version', 'source',
+                            'loaded_at'])
+
+
+def save_model_atomic(path, payload):
+    """Pickle payload to path via a temp file so readers never see a partial write
+
+    Returns the raw pickle bytes (their SHA-256 is the model version).
+    """
+    raw = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path = f'{path}.tmp.{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return raw
+
+
+def encoders_from_classes(classes_by_name):
+    """Rebuild fitted LabelEncoders from their stored class lists"""
+    from sklearn.preprocessing import LabelEncoder
+
+    encoders = {}
+    for name, classes in classes_by_name.items():
+        encoder = LabelEncoder()
+        encoder.classes_ = np.array(classes, dtype=object)
+        encoders[name] = encoder
+    return encoders
+
+
+class ModelHolder:
+    """Process-wide holder for the trained model and its encoders
+
+    The artifact is unpickled once and then served from memory. At most every
+    `check_interval` seconds the file's mtime/size is checked; if it changed,
+    the content hash decides whether a new artifact is actually loaded.
+
+    When `forest_path` is given and that memory-mappable artifact is at least as
+    new as the pickle, it is mapped instead, so pre-forked workers share one copy
+    of the tree arrays. The pickle remains the fallback.
+
+    `on_load(seconds)`, if given, is called with the duration of every load.
+    """
+
+    def __init__(self, path, check_interval=1.0, forest_path=None, on_load=None):
+        self.path = path
+        self.forest_path = forest_path
+        self.check_interval = check_interval
+        self.on_load = on_load
+        self._snapshot = None
+        self._stat = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return (model, encoders), or (None, None) if no artifact exists
+
+        When mapped from the forest artifact there is no sklearn model, and the
+        compiled engine (which has the same predict()) is returned in its place.
+        """
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return None, None
+        model = snapshot.model if snapshot.model is not None else snapshot.engine
+        return model, snapshot.encoders
+
+    def snapshot(self):
+        """Return the current ModelSnapshot, reloading it if the file changed"""
+        if self._snapshot is None or time.monotonic() - self._last_check >= self.check_interval:
+            self._refresh(force=False)
+        return self._snapshot
+
+    @property
+    def version(self):
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else None
+
+    def reload(self):
+        """Force a reload from disk and return the new snapshot"""
+        self._refresh(force=True)
+        return self._snapshot
+
+    def info(self):
+        """Return a JSON-serializable description of the loaded model"""
+        snapshot = self._snapshot
+        return {
+            'path': self.path,
+            'loaded': snapshot is not None,
+            'source': snapshot.source if snapshot else None,
+            'version': snapshot.version if snapshot else None,
+            'loaded_at': snapshot.loaded_at if snapshot else None,
+            'n_trees': snapshot.engine.n_trees if snapshot else None,
+            'n_nodes': snapshot.engine.n_nodes if snapshot else None,
+        }
+
+    def _refresh(self, force):
+        # Only one thread checks/loads at a time; the others keep serving the
+        # current snapshot instead of queueing behind the unpickle.
+        if not self._lock.acquire(blocking=force or self._snapshot is None):
+            return
+        try:
+            self._last_check = time.monotonic()
+            pickle_stat = _stat_or_none(self.path)
+            forest_stat = _stat_or_none(self.forest_path) if self.forest_path else None
+
+            use_forest = forest_stat is not None and (
+                pickle_stat is None or forest_stat.st_mtime_ns >= pickle_stat.st_mtime_ns)
+            st = forest_stat if use_forest else pickle_stat
+            if st is None:
+                return
+
+            stat_key = (use_forest, st.st_mtime_ns, st.st_size)
+            if not force and stat_key == self._stat:
+                return
+
+            started = time.perf_counter()
+            try:
+                if use_forest:
+                    try:
+                        self._load_forest(stat_key, force)
+                        return
+                    except (OSError, ValueError, KeyError) as e:
+                        print(f"Forest artifact unusable, falling back to pickle: {e}")
+                        if pickle_stat is None:
+                            return
+                self._load_pickle(force)
+            finally:
+                if self.on_load is not None:
+                    self.on_load(time.perf_counter() - started)
+        finally:
+            self._lock.release()
+
+    def _load_forest(self, stat_key, force):
+        header, _ = read_forest_header(self.forest_path)
+        version = header['metadata']['version']
+
+        current = self._snapshot
+        if (not force and current is not None and current.version == version
+                and current.source == 'mmap'):
+            self._stat = stat_key
+            return
+
+        engine, metadata = load_forest(self.forest_path)
+        encoders = encoders_from_classes(metadata['encoders'])
+        self._snapshot = ModelSnapshot(
+            model=None,
+            encoders=encoders,
+            pipeline=FeaturePipeline(encoders),
+            engine=engine,
+            version=version,
+            source='mmap',
+            loaded_at=time.time(),
+        )
+        self._stat = stat_key
+        print(f"Model mapped from {self.forest_path} (version {version[:12]})")
+
+    def _load_pickle(self, force):
+        # Hash and unpickle the same bytes so version and content always match
+        with open(self.path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            raw = f.read()
+        stat_key = (False, st.st_mtime_ns, st.st_size)
+        digest = hashlib.sha256(raw).hexdigest()
+
+        current = self._snapshot
+        if not force and current is not None and current.version == digest:
+            # Touched but not changed
+            self._stat = stat_key
+            return
+
+        saved_data = pickle.loads(raw)
+        model = saved_data['model']
+        encoders = saved_data['encoders']
+
+        # Build the new snapshot completely before publishing it
+        self._snapshot = ModelSnapshot(
+            model=model,
+            encoders=encoders,
+            pipeline=FeaturePipeline(encoders),
+            engine=compile_forest(model),
+            version=digest,
+            source='pickle',
+            loaded_at=time.time(),
+        )
+        self._stat = stat_key
+        print(f"Model loaded (version {digest[:12]})")
+
+
+def _stat_or_none(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+class _PendingPrediction:
+    """One request waiting on the batch worker"""
+
+    __slots__ = ('features', 'done', 'result', 'error')
+
+    def __init__(self, features):
+        self.features = features
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PredictionBatcher:
+    """Groups concurrent single-row predictions into one model call
+
+    Callers block in predict() while a background worker collects requests that
+    arrive within `window` seconds of the first one (or until `max_batch_size`
+    rows are queued), scores them as one matrix with `predict_fn` and hands
+    each row's result back to its caller.
+    """
+
+    def __init__(self, predict_fn, window=0.002, max_batch_size=64):
+        self.predict_fn = predict_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+
+    def predict(self, features, timeout=None):
+        """Score one feature row and return its prediction"""
+        self._ensure_worker()
+        pending = _PendingPrediction(features)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError('Timed out waiting for prediction')
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so pre-forked workers each start their own
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+                return
+            if self._worker_pid != pid:
+                self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, name='prediction-batcher', daemon=True)
+            self._worker_pid = pid
+            self._worker.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.predict_fn(np.vstack([p.features for p in batch]))
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.done.set()
+
+
+class PredictionCache:
+    """Bounded LRU cache of predictions keyed on (model version, feature row)
+
+    With `quantum` set, the continuous inputs are rounded to that step before
+    lookup (and before scoring), so near-identical inputs share an entry. The
+    encoded Yes/No columns are never rounded. Entries belong to
+    one model version; the cache empties itself when it sees a new version.
+    """
+
+    def __init__(self, maxsize=10000, quantum=None):
+        self.maxsize = maxsize
+        self.quantum = quantum
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def quantize(self, features):
+        """Return features with the continuous columns rounded to the cache quantum
+
+        Categorical columns are copied unchanged; with no quantum, features are
+        returned as they are.
+        """
+        if not self.quantum:
+            return features
+        columns = list(NUMERIC_COLUMNS)
+        quantized = np.array(features, dtype=np.float64)
+        quantized[..., columns] = np.round(quantized[..., columns] / self.quantum) * self.quantum
+        return quantized
+
+    def get(self, version, features):
+        """Return the cached prediction for features, or None"""
+        key = tuple(features.tolist())
+        with self._lock:
+            if version != self._version:
+                self._reset(version)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, version, features, value):
+        """Cache value for features; dropped if a newer version has been seen since"""
+        key = tuple(features.tolist())
+        with self._lock:
+            if self._version is None:
+                self._reset(version)
+            elif version != self._version:
+                # Only get() moves the cache to a new version, so a slow request
+                # scored by an older model cannot empty it
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return a JSON-serializable snapshot of the cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'quantum': self.quantum,
+                'model_version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _reset(self, version):
+        # Model artifact changed: every cached prediction is stale
+        self._entries.clear()
+        self._version = version
@@ -0,0 +1,81 @@
+"""
+Keyset pagination for the REST API
+Pages are walked newest first on (created_at, id) with opaque continuation
+tokens, so each page is one index range scan whatever the table size
+"""
+
+import base64
+import json
+from datetime import datetime
+
+
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor or limit is invalid"""
+
+
+def encode_cursor(created_at, row_id):
+    """Return an opaque token pointing just past the row (created_at, row_id)"""
+    if isinstance(created_at, datetime):
+        created_at = created_at.strftime(_TIMESTAMP_FORMAT)
+    raw = json.dumps([str(created_at), int(row_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Return the (created_at, id) pair stored in a token from encode_cursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        datetime.strptime(created_at, _TIMESTAMP_FORMAT)
+        if not isinstance(row_id, int) or isinstance(row_id, bool):
+            raise ValueError
+    except (TypeError, ValueError, UnicodeError):
+        raise CursorError('Invalid cursor')
+    return created_at, row_id
+
+
+def parse_limit(value, default, maximum):
+    """Parse the `limit` query parameter, clamped to 1..maximum"""
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise CursorError('limit must be an integer')
+    if limit < 1:
+        raise CursorError('limit must be at least 1')
+    return min(limit, maximum)
+
+
+def fetch_page(cur, select, alias, limit, cursor=None, where=None, params=()):
+    """Run one keyset page query and return (rows, next_cursor)
+
+    `select` is the SELECT ... FROM ... part of the query and `alias` the table
+    (or alias) whose created_at/id define the order. One extra row is fetched
+    to tell whether another page follows; next_cursor is None on the last page.
+    """
+    conditions = [where] if where else []
+    params = list(params)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Expanded form of (created_at, id) < (%s, %s) so MySQL uses a range scan
+        conditions.append(f"({alias}.created_at < %s OR ({alias}.created_at = %s AND {alias}.id < %s))")
+        params += [created_at, created_at, row_id]
+
+    query = select
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {alias}.created_at DESC, {alias}.id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    cur.execute(query, params)
+    rows = list(cur.fetchall())
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last['created_at'], last['id'])
+    return rows, next_cursor
@@ -0,0 +1,285 @@
+"""
+On-demand profiling of single requests
+A request is profiled when it carries a valid signed X-Profile-Token header,
+or when sampling has been switched on (for a share of requests, optionally
+one endpoint, for a limited time). A background thread samples the request
+thread's stack and the result is written as a speedscope or collapsed-stack
+file. Nothing is installed unless profiling is enabled.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+from flask import g, request
+
+
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_FORMATS = ('speedscope', 'collapsed')
+_EXTENSIONS = {'speedscope': '.speedscope.json', 'collapsed': '.collapsed'}
+_SAMPLING_FILE = 'sampling.json'
+_NAME = re.compile(r'^[\w.-]+$')
+
+
+class ProfilerError(ValueError):
+    """Raised for invalid profiling settings or profile names"""
+
+
+class StackSampler(threading.Thread):
+    """Sample one thread's stack every `interval` seconds until stop()"""
+
+    def __init__(self, thread_id, interval=0.001):
+        super().__init__(daemon=True, name='profile-sampler')
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._stop_event = threading.Event()
+        self._labels = {}
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (code.co_name, code.co_filename, code.co_firstlineno)
+        return label
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            key = tuple(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _frame_name(label):
+    name, filename, line = label
+    return f'{name} ({os.path.basename(filename)}:{line})'
+
+
+def collapsed_stacks(stacks):
+    """Brendan Gregg's collapsed format: 'root;child;leaf count' per line"""
+    return ''.join(f"{';'.join(_frame_name(label) for label in stack)} {count}\n"
+                   for stack, count in sorted(stacks.items()))
+
+
+def speedscope_profile(stacks, name, interval):
+    """Build a speedscope 'sampled' profile (https://www.speedscope.app)"""
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, count in stacks.items():
+        ids = []
+        for label in stack:
+            if label not in index:
+                index[label] = len(frames)
+                frames.append({'name': label[0], 'file': label[1], 'line': label[2]})
+            ids.append(index[label])
+        samples.append(ids)
+        weights.append(count * interval)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'student-performance profiler',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+    }
+
+
+class RequestProfiler:
+    """Decides which requests to profile, profiles them and manages the files"""
+
+    def __init__(self, directory, secret, interval=0.001, fmt='speedscope', keep=100):
+        if fmt not in PROFILE_FORMATS:
+            raise ProfilerError(f'format must be one of: {", ".join(PROFILE_FORMATS)}')
+        self.directory = directory
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.interval = interval
+        self.fmt = fmt
+        self.keep = keep
+        self._sampling = None
+        self._sampling_mtime = None
+        self._sampling_checked = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    # ---- tokens ----
+
+    def _signature(self, expires):
+        return hmac.new(self.secret, f'profile:{expires}'.encode(), hashlib.sha256).hexdigest()
+
+    def token(self, ttl=3600):
+        """Return a token valid for ttl seconds, for the X-Profile-Token header"""
+        expires = int(time.time() + ttl)
+        return f'{expires}.{self._signature(expires)}'
+
+    def verify(self, token):
+        expires, _, signature = (token or '').partition('.')
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+        return hmac.compare_digest(signature, self._signature(int(expires)))
+
+    # ---- sampling toggle, shared by all workers through a file ----
+
+    def set_sampling(self, sample_rate, endpoint=None, duration=600):
+        """Profile sample_rate of requests (to endpoint, if given) for duration seconds"""
+        if not 0 <= sample_rate <= 1:
+            raise ProfilerError('sample_rate must be between 0 and 1')
+        if duration <= 0:
+            raise ProfilerError('duration must be positive')
+        settings = {'sample_rate': sample_rate, 'endpoint': endpoint,
+                    'until': time.time() + duration}
+        path = os.path.join(self.directory, _SAMPLING_FILE)
+        tmp = f'{path}.tmp.{os.getpid()}'
+        with open(tmp, 'w') as f:
+            json.dump(settings, f)
+        os.replace(tmp, path)
+        self._sampling_checked = 0.0
+        return settings
+
+    def sampling(self):
+        """Current sampling settings, or None when sampling is off"""
+        now = time.monotonic()
+        if now - self._sampling_checked >= 1.0:
+            self._sampling_checked = now
+            path = os.path.join(self.directory, _SAMPLING_FILE)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                if mtime != self._sampling_mtime:
+                    with open(path) as f:
+                        self._sampling = json.load(f)
+                    self._sampling_mtime = mtime
+            except (OSError, ValueError):
+                self._sampling = None
+                self._sampling_mtime = None
+        settings = self._sampling
+        if not settings or not settings['sample_rate'] or settings['until'] < time.time():
+            return None
+        return settings
+
+    def should_profile(self):
+        token = request.headers.get(PROFILE_HEADER)
+        if token is not None:
+            return self.verify(token)
+        settings = self.sampling()
+        if settings is None:
+            return False
+        if settings['endpoint'] and settings['endpoint'] != request.endpoint:
+            return False
+        return random.random() < settings['sample_rate']
+
+    # ---- capture ----
+
+    def install(self, app, exclude=()):
+        """Register the request hooks on app; endpoints in exclude are never profiled"""
+        exclude = frozenset(exclude)
+
+        @app.before_request
+        def start_profile():
+            if request.endpoint not in exclude and self.should_profile():
+                sampler = StackSampler(threading.get_ident(), self.interval)
+                g._profile = {'sampler': sampler, 'started': time.perf_counter(),
+                              'name': self._new_name(), 'status': None}
+                sampler.start()
+
+        @app.after_request
+        def name_profile(response):
+            profile = g.get('_profile')
+            if profile is not None:
+                profile['status'] = response.status_code
+                response.headers['X-Profile-Id'] = profile['name']
+            return response
+
+        @app.teardown_request
+        def save_profile(exception):
+            profile = g.pop('_profile', None)
+            if profile is not None:
+                profile['sampler'].stop()
+                self._save(profile, time.perf_counter() - profile['started'])
+
+    def _new_name(self):
+        endpoint = re.sub(r'[^\w]', '_', request.endpoint or 'unmatched')
+        now = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now)) + f'{int(now * 1000) % 1000:03d}'
+        return f'{stamp}-{endpoint}-{uuid.uuid4().hex[:8]}'
+
+    def _save(self, profile, duration):
+        sampler = profile['sampler']
+        name = profile['name']
+        title = f'{request.method} {request.path}'
+        if self.fmt == 'speedscope':
+            body = json.dumps(speedscope_profile(sampler.stacks, title, self.interval))
+        else:
+            body = collapsed_stacks(sampler.stacks)
+        with open(os.path.join(self.directory, name + _EXTENSIONS[self.fmt]), 'w') as f:
+            f.write(body)
+        with open(os.path.join(self.directory, name + '.json'), 'w') as f:
+            json.dump({
+                'id': name,
+                'file': name + _EXTENSIONS[self.fmt],
+                'format': self.fmt,
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': request.endpoint,
+                'status': profile['status'],
+                'duration_seconds': round(duration, 6),
+                'samples': sampler.samples,
+                'interval_seconds': self.interval,
+                'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            }, f)
+        self._prune()
+
+    def _prune(self):
+        if not self.keep:
+            return
+        for meta in self.profiles()[self.keep:]:
+            for filename in (meta['id'] + '.json', meta['file']):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+    # ---- listing ----
+
+    def profiles(self):
+        """Metadata of the saved profiles, newest first"""
+        found = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json') or filename.endswith('.speedscope.json') \
+                    or filename == _SAMPLING_FILE:
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    found.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        found.sort(key=lambda meta: meta['id'], reverse=True)
+        return found
+
+    def path_for(self, filename):
+        """Absolute path of a saved profile file; ProfilerError if the name is invalid"""
+        if not _NAME.match(filename) or not os.path.isfile(os.path.join(self.directory, filename)):
+            raise ProfilerError('Profile not found')
+        return os.path.join(self.directory, filename)
@@ -0,0 +1,218 @@
+"""
+Conditional GET and response caching for read-only API endpoints
+Write routes bump per-resource version counters kept in a small memory-mapped
+file shared by all worker processes. Read endpoints derive their ETag from
+those counters, so If-None-Match is answered with 304, and unchanged bodies
+are served from memory, without touching the database.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+import numpy as np
+from flask import make_response, request
+
+from file_lock import lock, unlock
+
+
+# File layout: 8s magic | uint64 random epoch | float64 created_at, then one
+# (int64 version, float64 modified_at) pair per counter
+_MAGIC = b'SPVERS01'
+_HEADER = struct.Struct('<8sQd')
+
+# Named collection counters; per-student counters hash into STUDENT_SLOTS slots
+RESOURCES = ('students', 'records', 'analytics')
+STUDENT_SLOTS = 4096
+
+
+class ResourceVersions:
+    """Version counter per resource, shared between processes through mmap
+
+    Keys are 'students', 'records', 'analytics' or 'student:<id>'. Students share slots by
+    id modulo STUDENT_SLOTS; a collision only costs an extra cache miss.
+    """
+
+    def __init__(self, path):
+        # Resolved now, as the file is only opened on first use
+        self.path = os.path.abspath(path)
+        self._size = len(RESOURCES) + STUDENT_SLOTS
+        self._map = None
+        self._thread_lock = threading.Lock()
+
+    def _open(self):
+        # The file is created and mapped on first use, not at construction
+        if self._map is not None:
+            return
+        with self._thread_lock:
+            if self._map is None:
+                self._map_file()
+
+    def _map_file(self):
+        length = _HEADER.size + self._size * 16
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        with os.fdopen(fd, 'r+b') as f:
+            lock(f)
+            try:
+                f.seek(0)
+                header = f.read(_HEADER.size)
+                if os.fstat(f.fileno()).st_size != length or header[:8] != _MAGIC:
+                    # New epoch: ETags issued against an older file can never match
+                    f.truncate(0)
+                    f.truncate(length)
+                    f.seek(0)
+                    f.write(_HEADER.pack(_MAGIC, int.from_bytes(os.urandom(8), 'little'),
+                                         time.time()))
+                    f.flush()
+                mapped = mmap.mmap(f.fileno(), length)
+            finally:
+                unlock(f)
+
+        _, self._epoch, self._created_at = _HEADER.unpack_from(mapped, 0)
+        self._versions = np.ndarray(self._size, dtype=np.int64, buffer=mapped,
+                                    offset=_HEADER.size, strides=(16,))
+        self._modified = np.ndarray(self._size, dtype=np.float64, buffer=mapped,
+                                    offset=_HEADER.size + 8, strides=(16,))
+        self._map = mapped
+
+    @property
+    def epoch(self):
+        self._open()
+        return self._epoch
+
+    @property
+    def created_at(self):
+        self._open()
+        return self._created_at
+
+    def _index(self, key):
+        if key in RESOURCES:
+            return RESOURCES.index(key)
+        kind, _, value = key.partition(':')
+        if kind != 'student':
+            raise KeyError(f'Unknown resource: {key}')
+        return len(RESOURCES) + int(value) % STUDENT_SLOTS
+
+    def get(self, *keys):
+        """Return (versions, last_modified) for keys"""
+        self._open()
+        indexes = [self._index(key) for key in keys]
+        versions = tuple(int(self._versions[i]) for i in indexes)
+        modified = max([float(self._modified[i]) for i in indexes] + [self._created_at])
+        return versions, modified
+
+    def bump(self, *keys):
+        """Mark resources as changed; call after the write has committed
+
+        Returns {key: new version}.
+        """
+        indexes = [self._index(key) for key in keys]
+        versions = self._bump(indexes)
+        return {key: versions[i] for key, i in zip(keys, indexes)}
+
+    def bump_all(self):
+        """Mark every resource as changed (bulk writes)"""
+        self._bump(range(self._size))
+
+    def _bump(self, indexes):
+        self._open()
+        now = time.time()
+        # The file lock serializes processes, the thread lock this process's threads
+        with self._thread_lock, open(self.path, 'rb+') as f:
+            lock(f)
+            try:
+                versions = {}
+                for i in set(indexes):
+                    self._versions[i] += 1
+                    self._modified[i] = now
+                    versions[i] = int(self._versions[i])
+                return versions
+            finally:
+                unlock(f)
+
+    def etag(self, *keys):
+        versions, modified = self.get(*keys)
+        return f'{self.epoch:016x}-' + '.'.join(map(str, versions)), modified
+
+
+class ResponseCache:
+    """Per-process LRU of serialized GET responses, validated by ETag"""
+
+    def __init__(self, versions, maxsize=256):
+        self.versions = versions
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def conditional(self, *resources):
+        """Decorate a GET view whose output depends only on the given resources
+
+        Resources may reference view arguments, e.g. 'student:{student_id}'.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                keys = [resource.format(**kwargs) for resource in resources]
+                etag, modified = self.versions.etag(*keys)
+                last_modified = datetime.fromtimestamp(int(modified), tz=timezone.utc)
+
+                if etag in request.if_none_match:
+                    self.not_modified += 1
+                    response = make_response('', 304)
+                    return self._validators(response, etag, last_modified)
+
+                cache_key = request.full_path
+                with self._lock:
+                    entry = self._entries.get(cache_key)
+                    if entry is not None and entry[0] == etag:
+                        self._entries.move_to_end(cache_key)
+                        self.hits += 1
+                        response = make_response(entry[1], 200)
+                        response.mimetype = entry[2]
+                        return self._validators(response, etag, last_modified)
+                    self.misses += 1
+
+                response = make_response(view(**kwargs))
+                if response.status_code == 200 and self.maxsize > 0:
+                    with self._lock:
+                        self._entries[cache_key] = (etag, response.get_data(), response.mimetype)
+                        self._entries.move_to_end(cache_key)
+                        while len(self._entries) > self.maxsize:
+                            self._entries.popitem(last=False)
+                    self._validators(response, etag, last_modified)
+                return response
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _validators(response, etag, last_modified):
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        # Clients may keep the body but must revalidate before each use
+        response.cache_control.no_cache = True
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {
+            'size': size,
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+        }
@@ -0,0 +1,141 @@
+"""
+Per-process cache of student rows and their recent performance records
+Entries are tagged with the student's version from ResourceVersions, so a
+write in any worker invalidates them in every worker without a query
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Entry:
+    __slots__ = ('version', 'loaded_at', 'student', 'records')
+
+    def __init__(self, version, loaded_at):
+        self.version = version
+        self.loaded_at = loaded_at
+        self.student = None
+        self.records = None
+
+
+class StudentCache:
+    """Bounded LRU of student rows (and records lists) keyed by student id
+
+    `connection` returns the DB connection to load misses with. Entries expire
+    after `ttl` seconds, which bounds staleness for writes made outside the
+    app. Records are kept only for students with at most `max_records` of
+    them, so a cached list is always complete.
+    """
+
+    def __init__(self, versions, connection, maxsize=10000, ttl=60.0, max_records=50):
+        self.versions = versions
+        self.connection = connection
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_records = max_records
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _version(self, student_id):
+        (version,), _ = self.versions.get(f'student:{student_id}')
+        return version
+
+    def _lookup(self, student_id, version, field):
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if (entry is not None and entry.version == version
+                    and time.monotonic() - entry.loaded_at < self.ttl
+                    and getattr(entry, field) is not None):
+                self._entries.move_to_end(student_id)
+                self.hits += 1
+                return getattr(entry, field)
+            self.misses += 1
+            return None
+
+    def _store(self, student_id, version, field, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is None or entry.version != version:
+                entry = self._entries[student_id] = _Entry(version, time.monotonic())
+            setattr(entry, field, value)
+            self._entries.move_to_end(student_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, student_id):
+        """Return the student row as a dict, or None if there is no such student"""
+        # Read the version before the query: a write committed meanwhile bumps it
+        version = self._version(student_id)
+        student = self._lookup(student_id, version, 'student')
+        if student is None:
+            cur = self.connection().cursor()
+            cur.execute("SELECT * FROM students WHERE id = %s", (student_id,))
+            student = cur.fetchone()
+            cur.close()
+            if student is None:
+                return None
+            self._store(student_id, version, 'student', student)
+        return dict(student)
+
+    def records(self, student_id):
+        """Return the student's performance records, newest first"""
+        version = self._version(student_id)
+        records = self._lookup(student_id, version, 'records')
+        if records is None:
+            cur = self.connection().cursor()
+            cur.execute("""
+                SELECT * FROM performance_records
+                WHERE student_id = %s
+                ORDER BY created_at DESC
+            """, (student_id,))
+            records = list(cur.fetchall())
+            cur.close()
+            if len(records) <= self.max_records:
+                self._store(student_id, version, 'records', records)
+        return [dict(record) for record in records]
+
+    def revalidate(self, student_id, bumped, changes=None):
+        """Keep the cached student row across this process's own write
+
+        `bumped` is the result of ResourceVersions.bump for the write. If no
+        other write touched the student since the row was cached, the row is
+        re-tagged with the new version (with `changes` applied); the records
+        list is always dropped.
+        """
+        version = bumped[f'student:{student_id}']
+        with self._lock:
+            entry = self._entries.pop(student_id, None)
+            if entry is None or entry.version != version - 1 or entry.student is None:
+                return
+            fresh = self._entries[student_id] = _Entry(version, entry.loaded_at)
+            fresh.student = dict(entry.student, **(changes or {}))
+
+    def invalidate(self, student_id):
+        with self._lock:
+            self._entries.pop(student_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return a JSON-serializable snapshot of the cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'max_records': self.max_records,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,74 @@
+import importlib
+import os
+import re
+import sqlite3
+import sys
+import types
+from datetime import date
+
+import pytest
+
+# The application modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SqliteCursor:
+    """DictCursor-like cursor that runs the app's MySQL statements on sqlite"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cur = connection.cursor()
+
+    @staticmethod
+    def translate(sql):
+        sql = sql.replace('%s', '?').replace(' FOR UPDATE', '')
+        sql = sql.replace('INSERT IGNORE', 'INSERT OR IGNORE')
+        sql = sql.replace('ON DUPLICATE KEY UPDATE', 'ON CONFLICT DO UPDATE SET')
+        return re.sub(r'VALUES\((\w+)\)', r'excluded.\1', sql)
+
+    def execute(self, sql, params=()):
+        self.cur.execute(self.translate(sql), list(params))
+
+    def executemany(self, sql, rows):
+        self.cur.executemany(self.translate(sql), [list(row) for row in rows])
+
+    def _row(self, row):
+        row = dict(row)
+        # sqlite has no DATE type; MySQLdb returns datetime.date
+        if isinstance(row.get('day'), str):
+            row['day'] = date.fromisoformat(row['day'])
+        return row
+
+    def fetchone(self):
+        row = self.cur.fetchone()
+        return None if row is None else self._row(row)
+
+    def fetchall(self):
+        return [self._row(row) for row in self.cur.fetchall()]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sqlite_cursor():
+    """SqliteCursor over a fresh in-memory database (the sqlite connection is .connection)"""
+    connection = sqlite3.connect(':memory:')
+    connection.row_factory = sqlite3.Row
+    connection.execute('PRAGMA foreign_keys = ON')
+    yield SqliteCursor(connection)
+    connection.close()
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The app module, run from an empty directory with a stand-in MySQLdb
+
+    Callers replace the connections themselves; MySQLdb only has to import and
+    provide the cursor classes the app passes to conn.cursor().
+    """
+    monkeypatch.chdir(tmp_path)
+    cursors = types.SimpleNamespace(Cursor=object, DictCursor=object, SSDictCursor=object)
+    monkeypatch.setitem(sys.modules, 'MySQLdb', types.SimpleNamespace(cursors=cursors))
+    monkeypatch.setitem(sys.modules, 'MySQLdb.cursors', cursors)
+    return importlib.import_module('app')
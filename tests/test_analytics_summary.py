@@ -0,0 +1,155 @@
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from analytics_summary import (SUMMARY_SLOTS, SummaryDelta, bucket_start, create_summary_table,
+                               delete_record_tracked, delete_student_tracked, read_summary,
+                               read_timeseries, rebuild_summary, record_added, students_added)
+
+
+@pytest.fixture
+def db(sqlite_cursor):
+    conn, cur = sqlite_cursor.connection, sqlite_cursor
+    conn.execute("CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("""
+        CREATE TABLE performance_records (
+            id INTEGER PRIMARY KEY,
+            student_id INT NOT NULL REFERENCES students(id) ON DELETE CASCADE,
+            study_hours FLOAT, previous_score FLOAT, attendance_percentage FLOAT,
+            sleep_hours FLOAT, predicted_grade TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    create_summary_table(cur)
+    rebuild_summary(cur)
+    return conn, cur
+
+
+def stored(value):
+    # The FLOAT columns keep single precision, as in MySQL
+    return float(np.float32(value))
+
+
+def add_student(conn, cur):
+    student_id = conn.execute("INSERT INTO students (name) VALUES ('x')").lastrowid
+    students_added(cur)
+    return student_id
+
+
+def add_record(conn, cur, rng, student_id, created_at=None):
+    grade = rng.choice(['A', 'B', 'C', 'D', 'F', None, 'Z'])
+    values = [stored(rng.uniform(0, 24)), stored(rng.uniform(0, 100)),
+              stored(rng.uniform(0, 100)), stored(rng.uniform(0, 24))]
+    if created_at is None:
+        conn.execute("""INSERT INTO performance_records (student_id, study_hours, previous_score,
+                        attendance_percentage, sleep_hours, predicted_grade)
+                        VALUES (?, ?, ?, ?, ?, ?)""", [student_id] + values + [grade])
+        record_added(cur, student_id, grade, *values)
+    else:
+        conn.execute("""INSERT INTO performance_records (student_id, study_hours, previous_score,
+                        attendance_percentage, sleep_hours, predicted_grade, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                     [student_id] + values + [grade, created_at.strftime('%Y-%m-%d %H:%M:%S')])
+        delta = SummaryDelta()
+        delta.add_record(student_id, grade, *values, created_at=created_at)
+        delta.apply(cur)
+
+
+def rollup(cur):
+    cur.execute("SELECT * FROM analytics_daily ORDER BY student_id, day, slot")
+    rows = {}
+    for row in cur.fetchall():
+        key = (row.pop('student_id'), row.pop('day'))
+        row.pop('slot')
+        total = rows.setdefault(key, dict.fromkeys(row, 0))
+        for column, value in row.items():
+            total[column] += value
+    return {key: row for key, row in rows.items() if row['records']}
+
+
+def assert_same(incremental, rebuilt):
+    assert incremental.keys() == rebuilt.keys()
+    for key in rebuilt:
+        assert incremental[key] == pytest.approx(rebuilt[key], rel=1e-9, abs=1e-6), key
+
+
+def test_incremental_updates_match_a_rebuild(db):
+    conn, cur = db
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1, 9, 30)
+    students = [add_student(conn, cur) for _ in range(8)]
+    for i in range(300):
+        created_at = None if i % 5 == 0 else start + timedelta(hours=rng.randint(0, 24 * 60))
+        add_record(conn, cur, rng, rng.choice(students), created_at)
+
+    assert delete_student_tracked(cur, students[0]) is True
+    assert delete_student_tracked(cur, 999) is False
+    record_ids = [row[0] for row in conn.execute("SELECT id FROM performance_records LIMIT 20")]
+    for record_id in record_ids:
+        assert delete_record_tracked(cur, record_id)
+    assert not delete_record_tracked(cur, record_ids[0])
+
+    incremental = read_summary(cur)
+    incremental_rollup = rollup(cur)
+    cur.execute("SELECT COUNT(*) AS slots FROM analytics_summary WHERE total_records != 0")
+    assert cur.fetchone()['slots'] > 1
+
+    rebuild_summary(cur)
+    cur.execute("SELECT COUNT(*) AS slots FROM analytics_summary")
+    assert cur.fetchone()['slots'] == SUMMARY_SLOTS
+
+    rebuilt = read_summary(cur)
+    assert incremental['total_students'] == rebuilt['total_students'] == 7
+    count = conn.execute("SELECT COUNT(*) FROM performance_records").fetchone()[0]
+    assert incremental['total_predictions'] == rebuilt['total_predictions'] == count
+    assert incremental['grade_distribution'] == rebuilt['grade_distribution']
+    assert incremental['averages'] == pytest.approx(rebuilt['averages'])
+    assert_same(incremental_rollup, rollup(cur))
+
+
+def test_timeseries_buckets(db):
+    conn, cur = db
+    rng = random.Random(1)
+    students = [add_student(conn, cur) for _ in range(3)]
+    days = [datetime(2024, 2, 26, 8) + timedelta(days=offset) for offset in range(10)]
+    for day in days:
+        for _ in range(3):
+            add_record(conn, cur, rng, rng.choice(students), day)
+
+    daily = read_timeseries(cur, 'day')
+    assert [point['bucket'] for point in daily] == [day.date().isoformat() for day in days]
+    assert all(point['records'] == 3 for point in daily)
+
+    weekly = read_timeseries(cur, 'week', since=date(2024, 2, 27), until=date(2024, 3, 5))
+    assert [(point['bucket'], point['records']) for point in weekly] == [
+        ('2024-02-26', 18), ('2024-03-04', 3)]
+
+    monthly = read_timeseries(cur, 'month')
+    assert [(point['bucket'], point['records']) for point in monthly] == [
+        ('2024-02-01', 12), ('2024-03-01', 18)]
+
+    per_student = sum(point['records'] for student_id in students
+                      for point in read_timeseries(cur, 'month', student_id=student_id))
+    assert per_student == 30
+
+
+def test_rebuild_counts_days_with_only_ungraded_records(db):
+    conn, cur = db
+    student_id = add_student(conn, cur)
+    conn.execute("""INSERT INTO performance_records (student_id, study_hours, previous_score,
+                    attendance_percentage, sleep_hours, predicted_grade, created_at)
+                    VALUES (?, 5, 80, 90, 7, NULL, '2024-01-02 10:00:00')""", (student_id,))
+    rebuild_summary(cur)
+
+    assert read_summary(cur)['grade_distribution'] == [{'predicted_grade': None, 'count': 1}]
+    (point,) = read_timeseries(cur, 'day')
+    assert (point['bucket'], point['grade_distribution']) == ('2024-01-02', {'None': 1})
+
+
+def test_bucket_start():
+    day = date(2024, 3, 14)  # a Thursday
+    assert bucket_start(day, 'day') == day
+    assert bucket_start(day, 'week') == date(2024, 3, 11)
+    assert bucket_start(day, 'month') == date(2024, 3, 1)
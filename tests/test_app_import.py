@@ -0,0 +1,12 @@
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_app_writes_nothing(tmp_path):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    subprocess.run([sys.executable, '-c', 'import app'], cwd=tmp_path, env=env, check=True)
+    assert os.listdir(tmp_path) == []
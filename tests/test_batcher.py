@@ -0,0 +1,65 @@
+import threading
+
+import numpy as np
+import pytest
+
+from model_store import PredictionBatcher
+
+
+def run_concurrently(batcher, rows):
+    """predict() each row on its own thread; returns each caller's result or exception"""
+    outcomes = [None] * len(rows)
+    start = threading.Barrier(len(rows))
+
+    def call(i):
+        start.wait()
+        try:
+            outcomes[i] = batcher.predict(rows[i], timeout=5)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(rows))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_concurrent_rows_are_scored_together():
+    batches = []
+
+    def predict(X):
+        batches.append(len(X))
+        return X[:, 0] * 2
+
+    batcher = PredictionBatcher(predict, window=0.2, max_batch_size=8)
+    rows = [np.array([float(i), 0.0]) for i in range(8)]
+    assert run_concurrently(batcher, rows) == [2.0 * i for i in range(8)]
+    assert sum(batches) == 8 and len(batches) < 8
+
+
+def test_model_error_reaches_every_waiter():
+    error = RuntimeError('model exploded')
+    batches = []
+
+    def predict(X):
+        batches.append(len(X))
+        raise error
+
+    batcher = PredictionBatcher(predict, window=0.2, max_batch_size=8)
+    outcomes = run_concurrently(batcher, [np.zeros(2) for _ in range(8)])
+    assert all(outcome is error for outcome in outcomes)
+    assert sum(batches) == 8
+
+    # The worker survives and serves the next request
+    batcher.predict_fn = lambda X: X[:, 0]
+    assert batcher.predict(np.array([3.0, 0.0]), timeout=5) == 3.0
+
+
+def test_timeout():
+    release = threading.Event()
+    batcher = PredictionBatcher(lambda X: release.wait() and X[:, 0], window=0)
+    with pytest.raises(TimeoutError):
+        batcher.predict(np.zeros(2), timeout=0.05)
+    release.set()
@@ -0,0 +1,45 @@
+import pytest
+
+from bench_api import APP_DATABASE, SeedRefused, check_scratch_database, compare
+
+
+class FakeCursor:
+    def __init__(self, counts):
+        self.counts = counts
+        self.table = None
+
+    def execute(self, sql, args=None):
+        self.table = sql.split()[-1]
+        if self.table not in self.counts:
+            raise Exception(1146, f"Table '{self.table}' doesn't exist")
+
+    def fetchone(self):
+        return {'count': self.counts[self.table]}
+
+
+def test_application_database_is_refused():
+    with pytest.raises(SeedRefused):
+        check_scratch_database(FakeCursor({'students': 0, 'performance_records': 0}),
+                               APP_DATABASE, wipe=True)
+
+
+def test_database_with_rows_needs_yes_wipe():
+    cur = FakeCursor({'students': 3, 'performance_records': 0})
+    with pytest.raises(SeedRefused):
+        check_scratch_database(cur, 'bench_db')
+    check_scratch_database(cur, 'bench_db', wipe=True)
+
+
+def test_empty_or_new_database_is_accepted():
+    check_scratch_database(FakeCursor({'students': 0, 'performance_records': 0}), 'bench_db')
+    check_scratch_database(FakeCursor({}), 'bench_db')
+
+
+def test_compare_flags_regressions_in_the_right_direction():
+    base = {'scenarios': {'students': {'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0,
+                                       'throughput_rps': 100.0}}}
+    new = {'scenarios': {'students': {'p50_ms': 12.0, 'p95_ms': 19.0, 'p99_ms': 30.0,
+                                      'throughput_rps': 85.0}}}
+    _, regressions = compare(base, new, threshold=0.10)
+    assert {(scenario, metric) for scenario, metric, _ in regressions} == {
+        ('students', 'p50_ms'), ('students', 'throughput_rps')}
@@ -0,0 +1,171 @@
+import sys
+import types
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from columnar import ColumnarSnapshot, QueryError, parse_cohort_query
+from exporter import parse_timestamp
+
+
+def make_rows(n, seed=0, first_id=1):
+    """Rows in the snapshot's SELECT order"""
+    rng = np.random.RandomState(seed)
+    start = datetime(2024, 1, 1)
+    rows = []
+    for i in range(n):
+        rows.append((
+            first_id + i,
+            int(rng.randint(1, 40)),
+            round(float(rng.uniform(0, 24)), 1),
+            round(float(rng.uniform(0, 100)), 1),
+            round(float(rng.uniform(0, 100)), 1),
+            round(float(rng.uniform(0, 24)), 1),
+            int(rng.randint(5, 60)),
+            start + timedelta(hours=int(rng.randint(0, 24 * 200))),
+            str(rng.choice(['A', 'B', 'C', 'D', 'F'])),
+            [None, 'A', 'B'][rng.randint(3)],
+            str(rng.choice(['Yes', 'No'])),
+            str(rng.choice(['Yes', 'No'])),
+            str(rng.choice(['Male', 'Female', 'Other'])),
+        ))
+    return rows
+
+
+COLUMN_INDEX = {'study_hours': 2, 'attendance': 4, 'age': 6, 'predicted_grade': 8,
+                'actual_grade': 9, 'gender': 12}
+
+
+class FakeConnection:
+    """Serves `SELECT ... WHERE pr.id > %s ORDER BY pr.id LIMIT %s` from a list"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def cursor(self, cursorclass=None):
+        return self
+
+    def execute(self, sql, params):
+        self.queries += 1
+        watermark, limit = params
+        self.result = [row for row in self.rows if row[0] > watermark][:limit]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def mysqldb(monkeypatch):
+    # _load only needs MySQLdb.cursors.Cursor to pass to conn.cursor()
+    cursors = types.SimpleNamespace(Cursor=object)
+    monkeypatch.setitem(sys.modules, 'MySQLdb', types.SimpleNamespace(cursors=cursors))
+    monkeypatch.setitem(sys.modules, 'MySQLdb.cursors', cursors)
+
+
+def loaded(rows, **kwargs):
+    snapshot = ColumnarSnapshot(refresh_interval=0, **kwargs)
+    snapshot.maybe_refresh(FakeConnection(rows))
+    return snapshot
+
+
+def reference(rows, group_by, column, select=lambda row: True):
+    groups = {}
+    for row in rows:
+        if select(row):
+            key = tuple(row[COLUMN_INDEX[name]] for name in group_by)
+            groups.setdefault(key, []).append(np.float32(row[COLUMN_INDEX[column]]))
+    return {key: np.array(values, dtype=np.float64) for key, values in groups.items()}
+
+
+def test_grouped_aggregates_match_numpy():
+    rows = make_rows(3000)
+    snapshot = loaded(rows, chunk_size=700)
+    metrics = [('count', ''), ('sum', 'attendance'), ('mean', 'attendance'),
+               ('min', 'attendance'), ('max', 'attendance'), ('median', 'attendance'),
+               ('p10', 'attendance'), ('p90', 'attendance'), ('p100', 'attendance')]
+    groups, matched = snapshot.query(['gender', 'predicted_grade'], metrics)
+
+    expected = reference(rows, ['gender', 'predicted_grade'], 'attendance')
+    assert matched == len(rows)
+    assert len(groups) == len(expected)
+    for group in groups:
+        values = expected[(group['gender'], group['predicted_grade'])]
+        assert group['count'] == len(values)
+        for name, value in (('sum', values.sum()), ('mean', values.mean()),
+                            ('min', values.min()), ('max', values.max()),
+                            ('median', np.median(values)), ('p10', np.percentile(values, 10)),
+                            ('p90', np.percentile(values, 90)), ('p100', values.max())):
+            assert group[f'{name}_attendance'] == pytest.approx(value, abs=1e-3), name
+
+
+def test_filters_and_null_labels():
+    rows = make_rows(2000, seed=1)
+    snapshot = loaded(rows)
+    since, until = datetime(2024, 3, 1), datetime(2024, 5, 1)
+    filters = {'categorical': {'actual_grade': [None, 'A']},
+               'ranges': {'study_hours': (5, 20)},
+               'since': since, 'until': until}
+    groups, matched = snapshot.query(['actual_grade'], [('mean', 'age')], filters)
+
+    def select(row):
+        return (row[9] in (None, 'A') and 5 <= np.float32(row[2]) <= 20
+                and since <= row[7] < until)
+
+    expected = reference(rows, ['actual_grade'], 'age', select)
+    assert matched == sum(len(values) for values in expected.values())
+    assert {group['actual_grade']: group['count'] for group in groups} == {
+        key[0]: len(values) for key, values in expected.items()}
+    for group in groups:
+        assert group['mean_age'] == pytest.approx(expected[(group['actual_grade'],)].mean(), abs=1e-3)
+
+
+def test_age_bands_and_months():
+    rows = make_rows(500, seed=2)
+    groups, _ = loaded(rows).query(['age_band', 'month'], [], age_band_width=10)
+    counts = {}
+    for row in rows:
+        band = row[6] // 10 * 10
+        key = (f'{band}-{band + 9}', row[7].strftime('%Y-%m'))
+        counts[key] = counts.get(key, 0) + 1
+    assert {(g['age_band'], g['month']): g['count'] for g in groups} == counts
+
+
+def test_refresh_appends_new_rows_and_reloads_after_deletes():
+    rows = make_rows(100, seed=3)
+    conn = FakeConnection(rows)
+    snapshot = ColumnarSnapshot(refresh_interval=0, chunk_size=40)
+    snapshot.maybe_refresh(conn)
+    assert snapshot.info()['rows'] == 100
+
+    conn.rows = rows + make_rows(30, seed=4, first_id=101)
+    conn.queries = 0
+    snapshot.maybe_refresh(conn, expected_rows=130)
+    assert snapshot.info()['rows'] == 130
+    assert snapshot.info()['watermark'] == 130
+    # Only rows above the watermark are read: one chunk plus the empty final page
+    assert conn.queries == 2
+
+    conn.rows = conn.rows[10:]
+    snapshot.maybe_refresh(conn, expected_rows=120)
+    assert snapshot.info()['rows'] == 120
+    _, matched = snapshot.query([], [])
+    assert matched == 120
+
+
+def test_parse_cohort_query():
+    query = parse_cohort_query({'group_by': 'gender,age_band', 'metrics': 'count,p90:study_hours',
+                                'actual_grade': 'A,null', 'attendance_min': '50'}, parse_timestamp)
+    assert query['group_by'] == ['gender', 'age_band']
+    assert query['metrics'] == [('count', ''), ('p90', 'study_hours')]
+    assert query['filters']['categorical'] == {'actual_grade': ['A', None]}
+    assert query['filters']['ranges'] == {'attendance': (50.0, None)}
+
+    for args in ({'group_by': 'school'}, {'metrics': 'p101:age'}, {'metrics': 'mean:gender'},
+                 {'group_by': 'gender,gender'}, {'age_band_width': '0'}):
+        with pytest.raises(QueryError):
+            parse_cohort_query(args, parse_timestamp)
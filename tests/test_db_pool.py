@@ -0,0 +1,160 @@
+import threading
+import time
+
+import pytest
+
+from db_pool import ConnectionPool, PoolExhausted
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.closed = False
+        self.closed_under_lock = False
+        self.rollbacks = 0
+
+    def ping(self):
+        if self.closed:
+            raise Exception(2006, 'MySQL server has gone away')
+
+    def rollback(self):
+        if self.closed:
+            raise Exception(2006, 'MySQL server has gone away')
+        self.rollbacks += 1
+
+    def close(self):
+        # The pool swallows close() errors, so record the lock state instead of asserting
+        self.closed_under_lock = self.server.pool_locked()
+        self.closed = True
+
+
+class FakeServer:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.opened = []
+        self.pool = None
+
+    def connect(self):
+        assert not self.pool_locked(), 'connect() called with the pool lock held'
+        if self.fail:
+            raise Exception(2003, "Can't connect to MySQL server")
+        conn = FakeConnection(self)
+        self.opened.append(conn)
+        return conn
+
+    def pool_locked(self):
+        # Condition wraps an RLock; another thread cannot take it while it is held
+        result = []
+        thread = threading.Thread(target=lambda: result.append(self._try_lock()))
+        thread.start()
+        thread.join()
+        return not result[0]
+
+    def _try_lock(self):
+        if self.pool._cond.acquire(blocking=False):
+            self.pool._cond.release()
+            return True
+        return False
+
+
+def make_pool(server=None, **kwargs):
+    server = server or FakeServer()
+    pool = ConnectionPool(server.connect, **kwargs)
+    server.pool = pool
+    return server, pool
+
+
+def test_first_checkout_opens_min_size_connections():
+    server, pool = make_pool(min_size=3, max_size=5)
+    assert server.opened == []
+
+    entry = pool.acquire()
+    assert len(server.opened) == 3
+    stats = pool.stats()
+    assert (stats['size'], stats['in_use'], stats['idle'], stats['created']) == (3, 1, 2, 3)
+
+    pool.release(entry)
+    pool.acquire()
+    assert len(server.opened) == 3
+
+
+def test_min_size_is_capped_at_max_size():
+    server, pool = make_pool(min_size=8, max_size=2)
+    pool.acquire()
+    assert len(server.opened) == 2
+
+
+def test_failed_fill_frees_the_reserved_slots():
+    server, pool = make_pool(FakeServer(fail=True), min_size=3, max_size=3)
+    with pytest.raises(Exception):
+        pool.acquire()
+    assert pool.stats()['size'] == 0
+
+    server.fail = False
+    pool.acquire()
+    assert pool.stats()['size'] == 1
+
+
+def test_idle_connections_above_min_size_are_closed_outside_the_lock():
+    server, pool = make_pool(min_size=1, max_size=4, max_idle=0.01)
+    entries = [pool.acquire() for _ in range(3)]
+    for entry in entries:
+        pool.release(entry)
+    time.sleep(0.02)
+
+    pool.acquire()
+    closed = [conn for conn in server.opened if conn.closed]
+    assert len(closed) == 2
+    assert not any(conn.closed_under_lock for conn in closed)
+    stats = pool.stats()
+    assert (stats['size'], stats['discarded']) == (1, 2)
+
+
+def test_dead_connection_is_replaced_on_checkout():
+    server, pool = make_pool(min_size=1, max_size=2, health_check_interval=0)
+    entry = pool.acquire()
+    pool.release(entry)
+    entry.raw.closed = True
+
+    replacement = pool.acquire()
+    assert replacement is not entry
+    assert pool.stats()['discarded'] == 1
+
+
+def test_release_rolls_back_kept_connections():
+    _, pool = make_pool(min_size=1, max_size=1)
+    entry = pool.acquire()
+    pool.release(entry)
+    assert entry.raw.rollbacks == 1
+    assert pool.acquire() is entry
+
+
+def test_connection_that_cannot_roll_back_is_discarded():
+    server, pool = make_pool(min_size=1, max_size=1)
+    entry = pool.acquire()
+    entry.raw.closed = True
+    pool.release(entry)
+
+    stats = pool.stats()
+    assert (stats['size'], stats['idle'], stats['discarded']) == (0, 0, 1)
+    assert pool.acquire() is not entry
+    assert len(server.opened) == 2
+
+
+def test_checkout_times_out_when_exhausted():
+    _, pool = make_pool(min_size=1, max_size=1)
+    pool.acquire()
+    with pytest.raises(PoolExhausted):
+        pool.acquire(timeout=0.05)
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_waiting_checkout_gets_a_released_connection():
+    _, pool = make_pool(min_size=1, max_size=1)
+    entry = pool.acquire()
+    timer = threading.Timer(0.05, pool.release, (entry,))
+    timer.start()
+    try:
+        assert pool.acquire(timeout=2) is entry
+    finally:
+        timer.join()
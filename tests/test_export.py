@@ -0,0 +1,92 @@
+import json
+import os
+from datetime import datetime
+
+from db_pool import ConnectionPool
+
+
+def record(record_id):
+    return {'id': record_id, 'student_id': 1, 'student_name': 'Ada', 'student_email': 'ada@example.com',
+            'study_hours': 5.0, 'previous_score': 80.0, 'attendance_percentage': 90.0,
+            'extracurricular': 'Yes', 'sleep_hours': 7.0, 'tutoring': 'No',
+            'predicted_grade': 'B', 'actual_grade': None,
+            'created_at': datetime(2024, 1, record_id, 12, 0, 0)}
+
+
+class FakeServer:
+    """InnoDB-like REPEATABLE READ: a connection's first read in a transaction
+    takes a snapshot that later reads see until commit or rollback"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.connections = []
+
+    def connect(self):
+        conn = FakeConnection(self)
+        self.connections.append(conn)
+        return conn
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.snapshot = None
+
+    def cursor(self, cursorclass=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.snapshot = None
+
+    def rollback(self):
+        self.snapshot = None
+
+    def ping(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        if self.conn.snapshot is None:
+            self.conn.snapshot = list(self.conn.server.rows)
+        self.rows = list(self.conn.snapshot)
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def fetchall(self):
+        return self.fetchmany(len(self.rows))
+
+    def close(self):
+        pass
+
+
+def test_read_after_export_on_the_same_connection_sees_new_rows(app_module, monkeypatch):
+    server = FakeServer([record(1), record(2)])
+    pool = ConnectionPool(server.connect, min_size=1, max_size=1)
+    monkeypatch.setattr(app_module.mysql, '_pool', pool)
+    monkeypatch.setattr(app_module.mysql, '_pool_pid', os.getpid())
+
+    response = app_module.app.test_client().get('/api/records/export?format=ndjson')
+    lines = response.get_data(as_text=True).splitlines()
+    response.close()
+    assert response.status_code == 200
+    assert [json.loads(line)['id'] for line in lines] == [1, 2]
+
+    # Another client commits a record after the export finished
+    server.rows.append(record(3))
+
+    entry = pool.acquire()
+    assert len(server.connections) == 1 and entry.raw is server.connections[0]
+    cur = entry.raw.cursor()
+    cur.execute("SELECT * FROM performance_records")
+    assert [row['id'] for row in cur.fetchall()] == [1, 2, 3]
+    pool.release(entry)
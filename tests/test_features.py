@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from features import FEATURE_NAMES, FeatureError, FeaturePipeline
+from training import make_encoders
+
+
+VALID = {'study_hours': '5', 'previous_score': 80, 'attendance': 90.5,
+         'extracurricular': 'Yes', 'sleep_hours': 7, 'tutoring': 'No'}
+
+
+@pytest.fixture(scope='module')
+def pipeline():
+    return FeaturePipeline(make_encoders())
+
+
+def test_valid_row_is_encoded(pipeline):
+    np.testing.assert_array_equal(pipeline.transform_one(VALID), [5.0, 80.0, 90.5, 1.0, 7.0, 0.0])
+    X, errors = pipeline.transform([VALID, dict(VALID, tutoring='Yes')])
+    assert errors == [None, None]
+    np.testing.assert_array_equal(X[:, FEATURE_NAMES.index('tutoring')], [0.0, 1.0])
+
+
+@pytest.mark.parametrize('name, value, message', [
+    ('study_hours', 25, 'study_hours must be between 0 and 24'),
+    ('previous_score', -1, 'previous_score must be between 0 and 100'),
+    ('attendance', 100.01, 'attendance must be between 0 and 100'),
+    ('sleep_hours', 'nan', 'sleep_hours must be between 0 and 24'),
+    ('sleep_hours', 'seven', 'Invalid value for sleep_hours'),
+    ('study_hours', None, 'Invalid value for study_hours'),
+    ('extracurricular', 'yes', 'extracurricular must be one of: No, Yes'),
+    ('tutoring', 'Maybe', 'tutoring must be one of: No, Yes'),
+    ('tutoring', 1, 'tutoring must be one of: No, Yes'),
+])
+def test_invalid_values_are_rejected(pipeline, name, value, message):
+    row = dict(VALID, **{name: value})
+    with pytest.raises(FeatureError, match=f'^{message}$'):
+        pipeline.transform_one(row)
+
+    # The batch path reports the same error for that row only
+    X, errors = pipeline.transform([VALID, row, VALID])
+    assert errors == [None, message, None]
+
+
+def test_missing_fields_and_non_objects(pipeline):
+    row = {key: value for key, value in VALID.items() if key not in ('attendance', 'tutoring')}
+    with pytest.raises(FeatureError, match='^Missing required fields: attendance, tutoring$'):
+        pipeline.transform_one(row)
+    _, errors = pipeline.transform([row, ['not', 'a', 'dict']])
+    assert errors == ['Missing required fields: attendance, tutoring', 'Record must be a JSON object']
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_engine import compile_forest, load_forest, random_features, save_forest
+
+
+@pytest.fixture(scope='module')
+def model():
+    X = random_features(400, seed=7)
+    score = 0.4 * X[:, 0] + 0.5 * X[:, 1] + 0.3 * X[:, 2] + 5 * X[:, 3] + X[:, 4] + 5 * X[:, 5]
+    y = np.array(['F', 'D', 'C', 'B', 'A'])[np.digitize(score, np.percentile(score, [20, 40, 60, 80]))]
+    return RandomForestClassifier(n_estimators=12, random_state=3, n_jobs=1).fit(X, y)
+
+
+@pytest.fixture(scope='module')
+def forest(model):
+    return compile_forest(model)
+
+
+def boundary_features(model, seed=0):
+    """Rows that put one feature exactly on, just below and just above a split threshold"""
+    rng = np.random.RandomState(seed)
+    rows = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        for node in np.flatnonzero(tree.children_left != -1):
+            feature = tree.feature[node]
+            threshold = np.float32(tree.threshold[node])
+            for value in (threshold,
+                          np.nextafter(threshold, np.float32(-np.inf)),
+                          np.nextafter(threshold, np.float32(np.inf)),
+                          tree.threshold[node]):
+                row = random_features(1, seed=rng.randint(2**31))[0]
+                row[feature] = value
+                rows.append(row)
+    return np.array(rows)
+
+
+def test_predict_matches_sklearn_on_random_inputs(model, forest):
+    X = random_features(5000, seed=11)
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X))
+
+
+def test_predict_matches_sklearn_on_threshold_boundaries(model, forest):
+    X = boundary_features(model)
+    assert len(X) > 100
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X))
+
+
+def test_single_row(model, forest):
+    row = random_features(1, seed=5)[0]
+    np.testing.assert_array_equal(forest.predict(row), model.predict(row.reshape(1, -1)))
+
+
+def test_saved_artifact_matches_sklearn(model, forest, tmp_path):
+    path = str(tmp_path / 'model.forest')
+    save_forest(path, forest, {'version': 'abc'})
+    mapped, metadata = load_forest(path)
+
+    assert metadata == {'version': 'abc'}
+    assert mapped.n_trees == forest.n_trees
+    X = np.vstack([random_features(2000, seed=13), boundary_features(model, seed=1)])
+    np.testing.assert_array_equal(mapped.predict(X), model.predict(X))
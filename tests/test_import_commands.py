@@ -0,0 +1,31 @@
+from importer import ImportReport
+
+
+def test_import_records_without_a_model_fails_without_training(app_module, tmp_path, monkeypatch):
+    jobs = []
+    monkeypatch.setattr(app_module, 'start_training_job', lambda *args, **kwargs: jobs.append(args))
+    path = tmp_path / 'records.ndjson'
+    path.write_text('{"student_id": 1}\n')
+
+    result = app_module.app.test_cli_runner().invoke(args=['import-records', str(path)])
+
+    assert result.exit_code == 1
+    assert 'No trained model' in result.output
+    assert jobs == []
+
+
+def test_only_updates_invalidate_the_record_snapshot(app_module):
+    snapshot = app_module.record_snapshot
+    versions = app_module.resource_versions
+    report = ImportReport()
+    report.inserted = 3
+    before = versions.get('students')[0]
+
+    snapshot._invalidated = False
+    app_module.invalidate_after_import(report)
+    assert not snapshot._invalidated
+    assert versions.get('students')[0] > before
+
+    report.updated = 1
+    app_module.invalidate_after_import(report)
+    assert snapshot._invalidated
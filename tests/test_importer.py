@@ -0,0 +1,193 @@
+import copy
+import io
+
+import numpy as np
+import pytest
+
+from features import FeaturePipeline
+from importer import BulkImportError, import_records, import_students, iter_rows
+from training import make_encoders
+
+
+class FakeDatabase:
+    """Just enough of MySQL for the importer: students with a case-insensitive
+    unique email, performance_records, the summary totals and transactions.
+    Multi-row statements are atomic, like a multi-row INSERT."""
+
+    def __init__(self, students=(), fail_emails=(), fail_student_ids=()):
+        self.state = {'students': {}, 'records': [], 'summary': {'students': 0, 'records': 0}}
+        self.fail_emails = set()
+        for values in students:
+            self._insert_student(values, upsert=False)
+        self.committed = copy.deepcopy(self.state)
+        self.fail_emails = set(fail_emails)
+        self.fail_student_ids = set(fail_student_ids)
+        self.batches = 0
+        self.failed_batches = 0
+
+    # connection interface
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed = copy.deepcopy(self.state)
+
+    def rollback(self):
+        self.state = copy.deepcopy(self.committed)
+
+    def _insert_student(self, values, upsert):
+        name, age, gender, email = values
+        if email in self.fail_emails:
+            raise Exception(1406, "Data too long for column 'email'")
+        students = self.state['students']
+        key = email.lower()
+        if key in students:
+            if not upsert:
+                raise Exception(1062, f"Duplicate entry '{email}' for key 'email'")
+            students[key].update(name=name, age=age, gender=gender)
+        else:
+            students[key] = {'id': len(students) + 1, 'name': name, 'age': age,
+                             'gender': gender, 'email': email}
+
+    def _insert_record(self, values):
+        if values[0] in self.fail_student_ids:
+            raise Exception(1452, 'Cannot add or update a child row')
+        self.state['records'].append(values)
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        state = self.db.state
+        if sql.startswith('SELECT email FROM students'):
+            wanted = {email.lower() for email in params}
+            self.result = [{'email': row['email']} for key, row in state['students'].items()
+                           if key in wanted]
+        elif sql.startswith('SELECT id FROM students'):
+            ids = {row['id'] for row in state['students'].values()}
+            self.result = [{'id': i} for i in params if i in ids]
+        elif sql.startswith('INSERT INTO students'):
+            self.db._insert_student(params, upsert='ON DUPLICATE KEY UPDATE' in sql)
+        elif sql.startswith('INSERT INTO performance_records'):
+            self.db._insert_record(params)
+        elif sql.startswith('UPDATE analytics_summary'):
+            state['summary']['students'] += params[0]
+            state['summary']['records'] += params[1]
+        else:
+            raise AssertionError(f'unexpected query: {sql}')
+
+    def executemany(self, sql, rows):
+        if 'analytics_daily' in sql:
+            return
+        self.db.batches += 1
+        before = copy.deepcopy(self.db.state)
+        try:
+            for row in rows:
+                self.execute(sql, row)
+        except Exception:
+            self.db.state = before
+            self.db.failed_batches += 1
+            raise
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+def csv_rows(text):
+    return iter_rows(io.BytesIO(text.encode('utf-8')), 'csv')
+
+
+STUDENTS_CSV = """name,age,gender,email
+Alice Again,21,Female,alice@example.com
+Bob,19,Male,bob@example.com
+Bob Twice,20,Male,BOB@example.com
+Carol,200,Female,carol@example.com
+Dave,22,Other,dave@example.com
+"""
+
+
+def test_upsert_updates_existing_emails_and_counts_only_new_students():
+    db = FakeDatabase(students=[('Alice', 20, 'Female', 'alice@example.com')])
+    report = import_students(db, csv_rows(STUDENTS_CSV), chunk_size=10).as_dict()
+
+    assert (report['processed'], report['inserted'], report['updated'], report['rejected']) == (5, 2, 2, 1)
+    assert report['rejections'] == [{'line': 5, 'error': 'age must be between 5 and 100'}]
+    students = db.committed['students']
+    assert students['alice@example.com']['name'] == 'Alice Again'
+    assert students['bob@example.com']['name'] == 'Bob Twice'
+    assert sorted(students) == ['alice@example.com', 'bob@example.com', 'dave@example.com']
+    assert db.committed['summary']['students'] == 2
+
+
+def test_insert_mode_rejects_existing_and_repeated_emails():
+    db = FakeDatabase(students=[('Alice', 20, 'Female', 'alice@example.com')])
+    report = import_students(db, csv_rows(STUDENTS_CSV), mode='insert').as_dict()
+
+    assert (report['inserted'], report['updated'], report['rejected']) == (2, 0, 3)
+    errors = {r['line']: r['error'] for r in report['rejections']}
+    assert errors[2] == 'Email already exists'
+    assert errors[4] == 'Duplicate email in file'
+    assert db.committed['students']['bob@example.com']['name'] == 'Bob'
+    assert db.committed['summary']['students'] == 2
+
+
+def test_failed_chunk_is_retried_row_by_row():
+    db = FakeDatabase(fail_emails={'bob@example.com'})
+    report = import_students(db, csv_rows(STUDENTS_CSV), chunk_size=2).as_dict()
+
+    # Chunks: [Alice, Bob] fails and is retried, [Bob Twice, Carol], [Dave]
+    assert db.failed_batches == 1
+    assert report['chunks'] == 3
+    assert (report['inserted'], report['updated'], report['rejected']) == (3, 0, 2)
+    assert report['rejections'][0] == {'line': 3, 'error': str(Exception(1406, "Data too long for column 'email'"))}
+    assert sorted(db.committed['students']) == ['alice@example.com', 'bob@example.com', 'dave@example.com']
+    assert db.committed['students']['bob@example.com']['name'] == 'Bob Twice'
+    assert db.committed['summary']['students'] == 3
+
+
+def test_unknown_mode_is_refused():
+    with pytest.raises(BulkImportError):
+        import_students(FakeDatabase(), [], mode='replace')
+
+
+RECORDS_NDJSON = b"""{"student_id": 1, "study_hours": 5, "previous_score": 80, "attendance": 90, "extracurricular": "Yes", "sleep_hours": 7, "tutoring": "No"}
+{"student_id": 2, "study_hours": 5, "previous_score": 80, "attendance_percentage": 90, "extracurricular": "No", "sleep_hours": 7, "tutoring": "Yes", "predicted_grade": "B", "created_at": "2024-03-01 10:00:00"}
+not json
+{"student_id": 9, "study_hours": 5, "previous_score": 80, "attendance": 90, "extracurricular": "No", "sleep_hours": 7, "tutoring": "Yes"}
+{"student_id": 1, "study_hours": 50, "previous_score": 80, "attendance": 90, "extracurricular": "No", "sleep_hours": 7, "tutoring": "Yes"}
+{"student_id": 3, "study_hours": 1, "previous_score": 40, "attendance": 60, "extracurricular": "No", "sleep_hours": 5, "tutoring": "No"}
+"""
+
+
+def test_records_are_predicted_once_per_chunk_and_retried_on_failure():
+    db = FakeDatabase(students=[('A', 20, 'Male', 'a@example.com'), ('B', 20, 'Male', 'b@example.com'),
+                                ('C', 20, 'Male', 'c@example.com')],
+                      fail_student_ids={3})
+    calls = []
+
+    def predict(X):
+        calls.append(len(X))
+        return np.array(['A'] * len(X))
+
+    rows = iter_rows(io.BytesIO(RECORDS_NDJSON), 'ndjson')
+    report = import_records(db, rows, FeaturePipeline(make_encoders()), predict,
+                            chunk_size=10).as_dict()
+
+    assert calls == [2]
+    assert (report['processed'], report['inserted'], report['rejected']) == (6, 2, 4)
+    errors = {r['line']: r['error'] for r in report['rejections']}
+    assert errors[3].startswith('Invalid JSON')
+    assert errors[4] == 'Student not found'
+    assert errors[5].startswith('study_hours must be between')
+    assert 6 in errors
+    records = db.committed['records']
+    assert [(r[0], r[7]) for r in records] == [(1, 'A'), (2, 'B')]
+    assert records[1][9] is not None
+    assert db.committed['summary']['records'] == 2
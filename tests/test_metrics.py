@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+import metrics as metrics_module
+from metrics import Metrics, query_name
+
+
+def _value(text, name):
+    for line in text.splitlines():
+        if line.startswith(name + ' '):
+            return float(line.split()[1])
+    return None
+
+
+def test_query_name():
+    assert query_name('SELECT * FROM students WHERE id = %s') == 'SELECT students'
+    assert query_name('  INSERT INTO performance_records (a) VALUES (%s)') == 'INSERT performance_records'
+    assert query_name('UPDATE `students` SET name = %s') == 'UPDATE students'
+    assert query_name('/* note */ DELETE FROM students') == 'DELETE students'
+    assert query_name('COMMIT') == 'COMMIT'
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    for seconds in (0.001, 0.02, 0.02, 3.0):
+        metrics.observe('http_request_duration_seconds', seconds, endpoint='index',
+                        method='GET', status='200')
+    text = metrics.render()
+    labels = 'endpoint="index",method="GET",status="200"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1' in text
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.025"}} 3' in text
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4' in text
+    assert f'http_request_duration_seconds_count{{{labels}}} 4' in text
+
+
+def test_disabled_metrics_drop_observations():
+    metrics = Metrics(enabled=False)
+    metrics.observe('app_phase_duration_seconds', 0.1, phase='encode')
+    with metrics.phase('encode'):
+        pass
+    assert 'app_phase_duration_seconds_count' not in metrics.render()
+
+
+def test_gauges_and_counters_have_their_types(tmp_path):
+    metrics = Metrics(str(tmp_path),
+                      gauges=lambda: {'pool_idle': ('Idle connections', 2)},
+                      counters=lambda: {'pool_acquires_total': ('Checkouts', 5)})
+    text = metrics.render()
+    assert '# TYPE pool_idle gauge' in text
+    assert '# TYPE pool_acquires_total counter' in text
+    assert _value(text, 'pool_idle') == 2
+    assert _value(text, 'pool_acquires_total') == 5
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_exited_worker_keeps_counters_and_loses_gauges(tmp_path):
+    counts = {'acquires': 1}
+    metrics = Metrics(str(tmp_path),
+                      gauges=lambda: {'pool_idle': ('Idle connections', 1)},
+                      counters=lambda: {'pool_acquires_total': ('Checkouts', counts['acquires'])})
+    metrics.flush()
+
+    pid = os.fork()
+    if pid == 0:
+        counts['acquires'] = 10
+        metrics.observe('app_phase_duration_seconds', 0.01, phase='encode')
+        metrics.flush()
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.path.exists(tmp_path / f'{pid}.json')
+
+    text = metrics.render()
+    assert _value(text, 'pool_acquires_total') == 11
+    assert _value(text, 'pool_idle') == 1
+    assert 'app_phase_duration_seconds_count{phase="encode"} 1' in text
+    # The dead worker's file was folded into the archive
+    assert not os.path.exists(tmp_path / f'{pid}.json')
+    assert os.path.exists(tmp_path / 'archive.json')
+
+    # Totals stay put on later scrapes
+    text = metrics.render()
+    assert _value(text, 'pool_acquires_total') == 11
+    assert 'app_phase_duration_seconds_count{phase="encode"} 1' in text
+
+
+def test_restarted_pid_resumes_its_counters(tmp_path):
+    first = Metrics(str(tmp_path), counters=lambda: {'hits_total': ('Hits', 4)})
+    first.flush()
+    second = Metrics(str(tmp_path), counters=lambda: {'hits_total': ('Hits', 1)})
+    assert _value(second.render(), 'hits_total') == 5
+
+
+def test_alive_never_signals_on_windows(monkeypatch):
+    def kill(pid, sig):
+        raise AssertionError('os.kill must not be used on Windows')
+
+    monkeypatch.setattr(metrics_module.os, 'name', 'nt')
+    monkeypatch.setattr(metrics_module.os, 'kill', kill)
+    monkeypatch.setattr(metrics_module, '_alive_windows', lambda pid: pid == 42)
+    assert metrics_module._alive(42)
+    assert not metrics_module._alive(43)
+    assert not metrics_module._alive(None)
@@ -0,0 +1,81 @@
+from analytics_summary import SUMMARY_SLOTS
+from migrations import migrate
+
+
+class FakeCursor:
+    """Answers the queries migrate() and migration 3 make against a database
+    created from database_schema.sql: migrations 1-2 recorded, the 16 zeroed
+    slot rows present and performance_records already holding data"""
+
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, args=None):
+        sql = ' '.join(sql.split())
+        self.db.statements.append((sql, args))
+        if sql.startswith('SELECT MAX(version)'):
+            self.result = [{'version': max(self.db.versions)}]
+        elif sql.startswith('SELECT GET_LOCK'):
+            self.result = [{'locked': 1}]
+        elif sql.startswith('SELECT version FROM schema_migrations'):
+            self.result = [{'version': v} for v in self.db.versions]
+        elif sql.startswith('INSERT INTO schema_migrations'):
+            self.db.versions.append(args[0])
+        elif sql.startswith('SELECT COUNT(*) AS count FROM analytics_summary'):
+            self.result = [{'count': SUMMARY_SLOTS}]
+        elif sql.startswith('SELECT COUNT(*) AS count FROM students'):
+            self.result = [{'count': 3}]
+        elif sql.startswith('SELECT predicted_grade'):
+            self.result = [
+                {'predicted_grade': 'A', 'count': 2, 'sum_study_hours': 16.0,
+                 'sum_previous_score': 180.0, 'sum_attendance': 190.0, 'sum_sleep_hours': 15.0},
+                {'predicted_grade': 'C', 'count': 1, 'sum_study_hours': 3.0,
+                 'sum_previous_score': 60.0, 'sum_attendance': 70.0, 'sum_sleep_hours': 6.0},
+            ]
+        else:
+            self.result = []
+
+    def executemany(self, sql, rows):
+        self.db.statements.append((' '.join(sql.split()), rows))
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, versions):
+        self.versions = list(versions)
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+
+def test_analytics_migration_rebuilds_when_slot_rows_already_exist():
+    conn = FakeConnection(versions=[1, 2])
+    assert migrate(conn, target=3) == ['analytics_summary']
+    assert conn.versions == [1, 2, 3]
+
+    slot_zero = [args for sql, args in conn.statements
+                 if sql.startswith('UPDATE analytics_summary SET') and sql.endswith('WHERE slot = 0')]
+    assert len(slot_zero) == 1
+    totals = slot_zero[0]
+    # total_students, total_records, grade_a, grade_b, grade_c, ...
+    assert totals[:5] == [3, 3, 2, 0, 1]
+    assert any(sql.startswith('INSERT INTO analytics_daily') for sql, _ in conn.statements)
+
+
+def test_applied_migrations_are_not_rerun():
+    conn = FakeConnection(versions=[1, 2, 3])
+    assert migrate(conn, target=3) == []
+    assert len(conn.statements) == 1
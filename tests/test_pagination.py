@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+from pagination import CursorError, decode_cursor, encode_cursor, fetch_page, parse_limit
+
+
+@pytest.fixture
+def cur(sqlite_cursor):
+    conn = sqlite_cursor.connection
+    conn.execute("CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT, created_at TEXT)")
+    # Many rows share a timestamp, so the id tie-break decides the order
+    rows = [(i, f'student {i}', f'2024-01-{1 + i // 7:02d} 12:00:00') for i in range(1, 101)]
+    conn.executemany("INSERT INTO students VALUES (?, ?, ?)", rows)
+    return sqlite_cursor
+
+
+def walk(cur, limit, **kwargs):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = fetch_page(cur, "SELECT s.* FROM students s", 's', limit,
+                                  cursor=cursor, **kwargs)
+        pages.append([row['id'] for row in rows])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('limit', [1, 7, 10, 33, 100, 500])
+def test_pages_cover_every_row_once_newest_first(cur, limit):
+    pages = walk(cur, limit)
+    ids = [row_id for page in pages for row_id in page]
+    assert ids == list(range(100, 0, -1))
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+
+
+def test_where_clause_is_combined_with_the_cursor(cur):
+    pages = walk(cur, 4, where='s.id % 3 = %s', params=(0,))
+    ids = [row_id for page in pages for row_id in page]
+    assert ids == [i for i in range(100, 0, -1) if i % 3 == 0]
+
+
+def test_cursor_round_trip():
+    token = encode_cursor(datetime(2024, 5, 6, 7, 8, 9), 42)
+    assert '=' not in token
+    assert decode_cursor(token) == ('2024-05-06 07:08:09', 42)
+    assert decode_cursor(encode_cursor('2024-05-06 07:08:09', 42)) == ('2024-05-06 07:08:09', 42)
+
+
+@pytest.mark.parametrize('token', ['', 'not-a-cursor', encode_cursor('yesterday', 1)[:-2],
+                                   'WyIyMDI0LTAxLTAxIDAwOjAwOjAwIix0cnVlXQ'])
+def test_invalid_cursors_are_rejected(token):
+    with pytest.raises(CursorError):
+        decode_cursor(token)
+
+
+def test_parse_limit():
+    assert parse_limit(None, 20, 100) == 20
+    assert parse_limit('', 20, 100) == 20
+    assert parse_limit('5', 20, 100) == 5
+    assert parse_limit('1000', 20, 100) == 100
+    for value in ('0', '-3', 'ten'):
+        with pytest.raises(CursorError):
+            parse_limit(value, 20, 100)
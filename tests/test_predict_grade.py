@@ -0,0 +1,34 @@
+import types
+
+import numpy as np
+import pytest
+
+
+class FakeEngine:
+    def __init__(self, grade):
+        self.grade = grade
+
+    def predict(self, features):
+        return np.array([self.grade] * len(features))
+
+
+def model(version, grade):
+    return types.SimpleNamespace(version=version, model=None, engine=FakeEngine(grade))
+
+
+@pytest.mark.parametrize('microbatch', [False, True])
+def test_prediction_is_cached_under_the_model_that_scored_it(app_module, monkeypatch, microbatch):
+    monkeypatch.setitem(app_module.app.config, 'PREDICT_MICROBATCH_ENABLED', microbatch)
+    cache = app_module.PredictionCache()
+    monkeypatch.setattr(app_module, 'prediction_cache', cache)
+    # The model is replaced between the cache lookup and the scoring
+    snapshots = [model('v1', 'A'), model('v2', 'B')]
+    monkeypatch.setattr(app_module.model_holder, 'snapshot',
+                        lambda: snapshots.pop(0) if len(snapshots) > 1 else snapshots[0])
+    row = np.array([5.0, 80.0, 90.0, 1.0, 8.0, 1.0])
+
+    assert app_module.predict_grade(row) == 'B'
+    # v2's answer is not cached as v1's; the next lookup scores again and caches it
+    assert cache.stats()['size'] == 0
+    assert app_module.predict_grade(row) == 'B'
+    assert cache.get('v2', row) == 'B'
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from features import CATEGORICAL_FEATURES, FEATURE_NAMES, NUMERIC_COLUMNS
+from model_store import PredictionCache
+
+CATEGORICAL_COLUMNS = [FEATURE_NAMES.index(name) for name in CATEGORICAL_FEATURES]
+
+
+def test_numeric_columns_exclude_the_flags():
+    assert NUMERIC_COLUMNS == (0, 1, 2, 4)
+    assert CATEGORICAL_COLUMNS == [3, 5]
+
+
+@pytest.mark.parametrize('quantum', [0.5, 2, 5])
+def test_quantize_keeps_categorical_values(quantum):
+    cache = PredictionCache(quantum=quantum)
+    rng = np.random.RandomState(0)
+    for _ in range(200):
+        row = np.array([rng.uniform(0, 24), rng.uniform(0, 100), rng.uniform(0, 100),
+                        rng.randint(2), rng.uniform(0, 24), rng.randint(2)], dtype=np.float64)
+        quantized = cache.quantize(row)
+        np.testing.assert_array_equal(quantized[CATEGORICAL_COLUMNS], row[CATEGORICAL_COLUMNS])
+        steps = quantized[list(NUMERIC_COLUMNS)] / quantum
+        np.testing.assert_allclose(steps, np.round(steps))
+
+
+def test_quantize_rounds_numeric_columns():
+    cache = PredictionCache(quantum=5)
+    row = np.array([7.4, 83.0, 91.2, 1.0, 6.0, 1.0])
+    np.testing.assert_array_equal(cache.quantize(row), [5.0, 85.0, 90.0, 1.0, 5.0, 1.0])
+
+
+def test_quantize_does_not_modify_its_input():
+    cache = PredictionCache(quantum=2)
+    row = np.array([3.3, 50.0, 60.0, 1.0, 7.0, 0.0])
+    cache.quantize(row)
+    np.testing.assert_array_equal(row, [3.3, 50.0, 60.0, 1.0, 7.0, 0.0])
+
+
+def test_quantize_disabled_returns_features_unchanged():
+    row = np.array([3.3, 50.0, 60.0, 1.0, 7.0, 0.0])
+    assert PredictionCache().quantize(row) is row
+
+
+def test_yes_and_no_do_not_share_an_entry():
+    cache = PredictionCache(quantum=5)
+    yes = cache.quantize(np.array([5.0, 80.0, 90.0, 1.0, 8.0, 1.0]))
+    no = cache.quantize(np.array([5.0, 80.0, 90.0, 0.0, 8.0, 0.0]))
+    cache.put('v1', yes, 'A')
+    assert cache.get('v1', no) is None
+    assert cache.get('v1', yes) == 'A'
+
+
+def test_new_model_version_empties_the_cache():
+    cache = PredictionCache()
+    row = np.array([5.0, 80.0, 90.0, 1.0, 8.0, 1.0])
+    cache.put('v1', row, 'A')
+    assert cache.get('v2', row) is None
+    assert cache.stats()['size'] == 0
+    assert cache.stats()['model_version'] == 'v2'
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(maxsize=2)
+    rows = [np.array([float(i), 80.0, 90.0, 1.0, 8.0, 1.0]) for i in range(3)]
+    cache.put('v1', rows[0], 'A')
+    cache.put('v1', rows[1], 'B')
+    assert cache.get('v1', rows[0]) == 'A'
+    cache.put('v1', rows[2], 'C')
+    assert cache.get('v1', rows[1]) is None
+    assert cache.get('v1', rows[0]) == 'A'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_put_from_an_older_model_keeps_the_cache():
+    cache = PredictionCache()
+    rows = [np.array([float(i), 80.0, 90.0, 1.0, 8.0, 1.0]) for i in range(2)]
+    cache.put('v1', rows[0], 'A')
+    assert cache.get('v2', rows[0]) is None
+    cache.put('v2', rows[0], 'B')
+    cache.put('v1', rows[1], 'C')
+    assert cache.stats()['model_version'] == 'v2'
+    assert cache.get('v2', rows[0]) == 'B'
+    assert cache.get('v2', rows[1]) is None
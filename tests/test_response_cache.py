@@ -0,0 +1,168 @@
+import importlib
+import os
+import sys
+import types
+
+import pytest
+from flask import Flask, jsonify
+
+import file_lock
+import response_cache
+from response_cache import ResourceVersions, ResponseCache
+
+
+@pytest.fixture
+def versions(tmp_path):
+    return ResourceVersions(str(tmp_path / 'versions.bin'))
+
+
+@pytest.fixture
+def app(versions):
+    app = Flask(__name__)
+    cache = ResponseCache(versions, maxsize=2)
+    calls = {'students': 0, 'student': 0}
+
+    @app.route('/students')
+    @cache.conditional('students')
+    def students():
+        calls['students'] += 1
+        return jsonify(count=calls['students'])
+
+    @app.route('/students/<int:student_id>')
+    @cache.conditional('student:{student_id}')
+    def student(student_id):
+        calls['student'] += 1
+        if student_id == 404:
+            return jsonify(error='not found'), 404
+        return jsonify(id=student_id, call=calls['student'])
+
+    app.cache = cache
+    app.calls = calls
+    return app
+
+
+def test_bump_returns_new_versions(versions):
+    assert versions.get('students', 'records')[0] == (0, 0)
+    assert versions.bump('students', 'student:7') == {'students': 1, 'student:7': 1}
+    assert versions.get('students', 'records', 'student:7')[0] == (1, 0, 1)
+
+
+def test_etag_changes_only_with_its_resources(versions):
+    etag, _ = versions.etag('students')
+    versions.bump('records')
+    assert versions.etag('students')[0] == etag
+    versions.bump('students')
+    assert versions.etag('students')[0] != etag
+
+
+def test_analytics_counter_invalidates_only_analytics(versions):
+    analytics, _ = versions.etag('students', 'records', 'analytics')
+    students, _ = versions.etag('students')
+    versions.bump('analytics')
+    assert versions.etag('students', 'records', 'analytics')[0] != analytics
+    assert versions.etag('students')[0] == students
+
+
+def test_unknown_resource_is_rejected(versions):
+    with pytest.raises(KeyError):
+        versions.bump('teachers')
+
+
+def test_counters_are_shared_through_the_file(tmp_path):
+    path = str(tmp_path / 'versions.bin')
+    first, second = ResourceVersions(path), ResourceVersions(path)
+    assert first.epoch == second.epoch
+    first.bump('records')
+    assert second.get('records')[0] == (1,)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_bump_in_another_process_is_visible(versions):
+    pid = os.fork()
+    if pid == 0:
+        versions.bump('students')
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert versions.get('students')[0] == (1,)
+
+
+def test_corrupt_file_starts_a_new_epoch(tmp_path):
+    path = tmp_path / 'versions.bin'
+    path.write_bytes(b'not a version file')
+    versions = ResourceVersions(str(path))
+    assert versions.get('students')[0] == (0,)
+    assert ResourceVersions(str(path)).epoch == versions.epoch
+
+
+def test_if_none_match_returns_304(app):
+    client = app.test_client()
+    first = client.get('/students')
+    etag = first.headers['ETag']
+    second = client.get('/students', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+    assert app.calls['students'] == 1
+
+
+def test_unchanged_body_is_served_from_cache(app):
+    client = app.test_client()
+    assert client.get('/students').get_json() == {'count': 1}
+    assert client.get('/students').get_json() == {'count': 1}
+    assert app.calls['students'] == 1
+    assert app.cache.stats()['hits'] == 1
+
+
+def test_bump_invalidates_cached_body_and_etag(app, versions):
+    client = app.test_client()
+    etag = client.get('/students').headers['ETag']
+    versions.bump('students')
+    fresh = client.get('/students', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200
+    assert fresh.get_json() == {'count': 2}
+    assert fresh.headers['ETag'] != etag
+
+
+def test_student_bump_only_invalidates_that_student(app, versions):
+    client = app.test_client()
+    client.get('/students/1')
+    client.get('/students/2')
+    versions.bump('student:1')
+    assert client.get('/students/1').get_json()['call'] == 3
+    assert client.get('/students/2').get_json()['call'] == 2
+
+
+def test_errors_are_not_cached(app):
+    client = app.test_client()
+    assert client.get('/students/404').status_code == 404
+    assert client.get('/students/404').status_code == 404
+    assert app.calls['student'] == 2
+    assert app.cache.stats()['size'] == 0
+
+
+def test_least_recently_used_response_is_evicted(app):
+    client = app.test_client()
+    for student_id in (1, 2, 3):
+        client.get(f'/students/{student_id}')
+    assert app.cache.stats()['size'] == 2
+    client.get('/students/1')
+    assert app.calls['student'] == 4
+
+
+def test_module_works_without_fcntl(tmp_path, monkeypatch):
+    # Stand-in for Windows: no fcntl, byte-range locks through msvcrt
+    locks = []
+    msvcrt = types.SimpleNamespace(
+        LK_LOCK=1, LK_UNLCK=0,
+        locking=lambda fd, mode, nbytes: locks.append(mode))
+    monkeypatch.setitem(sys.modules, 'fcntl', None)
+    monkeypatch.setitem(sys.modules, 'msvcrt', msvcrt)
+    try:
+        assert importlib.reload(file_lock).fcntl is None
+        module = importlib.reload(response_cache)
+        versions = module.ResourceVersions(str(tmp_path / 'versions.bin'))
+        assert versions.bump('students') == {'students': 1}
+        assert locks == [1, 0, 1, 0]
+    finally:
+        monkeypatch.undo()
+        importlib.reload(file_lock)
+        importlib.reload(response_cache)
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from response_cache import ResourceVersions
+from student_cache import StudentCache
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Connection:
+    """The sqlite cursor's connection, counting queries"""
+
+    def __init__(self, cursor):
+        self.cur = cursor
+        self.queries = 0
+
+    def cursor(self):
+        self.queries += 1
+        return self.cur
+
+
+@pytest.fixture
+def db(sqlite_cursor):
+    sqlite_cursor.connection.execute("CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT)")
+    sqlite_cursor.connection.execute("""
+        CREATE TABLE performance_records (id INTEGER PRIMARY KEY, student_id INT, created_at TEXT)
+    """)
+    sqlite_cursor.connection.execute("INSERT INTO students VALUES (1, 'Ada')")
+    return Connection(sqlite_cursor)
+
+
+def bump_in_another_process(path, *keys):
+    code = f"from response_cache import ResourceVersions; ResourceVersions({path!r}).bump(*{keys!r})"
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+
+
+def test_entry_is_reloaded_after_another_worker_bumps_its_version(db, tmp_path):
+    path = str(tmp_path / 'versions.bin')
+    cache = StudentCache(ResourceVersions(path), lambda: db)
+
+    assert cache.get(1)['name'] == 'Ada'
+    assert cache.get(1)['name'] == 'Ada'
+    assert db.queries == 1
+
+    # Another worker edits the student and bumps its counter in the shared file
+    db.cur.connection.execute("UPDATE students SET name = 'Ada L.' WHERE id = 1")
+    bump_in_another_process(path, 'students', 'student:1')
+
+    assert cache.get(1)['name'] == 'Ada L.'
+    assert db.queries == 2
+    assert cache.get(1)['name'] == 'Ada L.'
+    assert db.queries == 2
+
+
+def test_other_students_and_collections_keep_their_entries(db, tmp_path):
+    path = str(tmp_path / 'versions.bin')
+    cache = StudentCache(ResourceVersions(path), lambda: db)
+    cache.get(1)
+    assert cache.records(1) == []
+
+    bump_in_another_process(path, 'students', 'records', 'student:2')
+
+    cache.get(1)
+    cache.records(1)
+    assert db.queries == 2
+    assert cache.stats()['hits'] == 2
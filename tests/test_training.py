@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+import training
+
+
+def test_second_job_leaves_the_running_jobs_status_alone(tmp_path):
+    model_path = str(tmp_path / 'performance_model.pkl')
+    status_path = tmp_path / 'retrain_status.json'
+    running = {'command': 'retrain', 'pid': 1, 'state': 'running'}
+    status_path.write_text(json.dumps(running))
+
+    lock = training._job_lock(str(tmp_path / 'training.lock'))
+    if lock is None:
+        pytest.skip('file locks are not supported here')
+    try:
+        code = training._main(['synthetic', '--model-path', model_path,
+                               '--versions-dir', str(tmp_path / 'versions'),
+                               '--status-file', str(status_path)])
+    finally:
+        lock.close()
+
+    assert code == 1
+    assert json.loads(status_path.read_text()) == running
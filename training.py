@@ -0,0 +1,358 @@
+"""
+Training data and model fitting for the Student Performance Prediction System
+The grade rule is expressed as vectorized NumPy so the synthetic training set
+can grow to millions of rows, and real labeled performance_records can be
+streamed out of MySQL in chunks
+
+Run as a separate process so training never blocks request threads:
+    python training.py synthetic --samples 500
+    python training.py retrain --chunk-size 10000
+    python training.py update --new-trees 10 --retire 10
+Database settings come from MYSQL_HOST, MYSQL_USER, MYSQL_PASSWORD and MYSQL_DB.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+
+GRADES = np.array(['A', 'B', 'C', 'D', 'F'])
+
+# Lower score bound for A, B, C, D (anything below the last is an F)
+GRADE_THRESHOLDS = (85, 70, 55, 40)
+
+
+def grade_scores(study_hours, previous_score, attendance, extracurricular, sleep_hours, tutoring):
+    """Weighted score behind the grade rule; the flags are 1 for 'Yes', 0 for 'No'"""
+    # Same terms in the same order as the original per-row rule, so results match exactly
+    return (
+        previous_score * 0.40 +      # 40% weightage - most important
+        attendance * 0.25 +          # 25% weightage
+        study_hours * 3.5 +          # Study hours impact
+        extracurricular * 5 +        # Bonus points
+        sleep_hours * 1.5 +          # Sleep impact
+        tutoring * 5                 # Tutoring bonus
+    )
+
+
+def scores_to_grades(scores):
+    """Map weighted scores to letter grades"""
+    # Count how many thresholds each score reaches: 4 -> A ... 0 -> F
+    reached = np.zeros(len(scores), dtype=np.intp)
+    for threshold in GRADE_THRESHOLDS:
+        reached += scores >= threshold
+    return GRADES[len(GRADE_THRESHOLDS) - reached]
+
+
+def generate_training_data(n_samples=500, seed=42):
+    """Generate a synthetic training set
+
+    Returns (X, y): X is a float32 (n_samples, 6) matrix in model column order with
+    the Yes/No flags already encoded (No=0, Yes=1), y the letter grades. The draws
+    follow the original generator, so the default arguments reproduce its data.
+    """
+    rng = np.random.RandomState(seed)
+    study_hours = rng.uniform(1, 10, n_samples)
+    previous_score = rng.uniform(40, 100, n_samples)
+    attendance = rng.uniform(50, 100, n_samples)
+    # choice(['Yes', 'No']) draws index 0 for 'Yes'
+    extracurricular = (rng.randint(0, 2, n_samples) == 0).astype(np.float64)
+    sleep_hours = rng.uniform(4, 10, n_samples)
+    tutoring = (rng.randint(0, 2, n_samples) == 0).astype(np.float64)
+
+    scores = grade_scores(study_hours, previous_score, attendance,
+                          extracurricular, sleep_hours, tutoring)
+    y = scores_to_grades(scores)
+
+    X = np.empty((n_samples, 6), dtype=np.float32)
+    for j, column in enumerate((study_hours, previous_score, attendance,
+                                extracurricular, sleep_hours, tutoring)):
+        X[:, j] = column
+    return X, y
+
+
+def fit_model(X, y, n_estimators=100, n_jobs=-1, random_state=42):
+    """Fit the RandomForest on all cores and return (model, report)"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state,
+                                   n_jobs=n_jobs)
+    start = time.perf_counter()
+    model.fit(X, y)
+    fit_seconds = time.perf_counter() - start
+
+    report = {
+        'n_samples': int(len(X)),
+        'n_estimators': n_estimators,
+        'fit_seconds': round(fit_seconds, 3),
+        'data_mb': round((X.nbytes + y.nbytes) / 2**20, 2),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    return model, report
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / 2**20 if sys.platform == 'darwin' else peak / 2**10, 1)
+
+
+def make_encoders():
+    """Fitted LabelEncoders for the Yes/No inputs (No=0, Yes=1)"""
+    from sklearn.preprocessing import LabelEncoder
+
+    return {
+        'extracurricular': LabelEncoder().fit(['No', 'Yes']),
+        'tutoring': LabelEncoder().fit(['No', 'Yes']),
+    }
+
+
+def train_synthetic(registry, n_samples=500, n_jobs=-1):
+    """Fit on synthetic data and save it as a new registry version"""
+    X, y = generate_training_data(n_samples)
+    model, report = fit_model(X, y, n_jobs=n_jobs)
+    return registry.save_version(model, make_encoders(), dict(report, source='synthetic'))
+
+
+def load_labeled_records(db_config, chunk_size=10000, since=None):
+    """Stream rows with an actual_grade out of performance_records
+
+    Reads in (created_at, id) keyset chunks, served by idx_created_at, so no
+    long-running result set is held open. With `since` (a [created_at, id] pair)
+    only records after that point are read. Returns (X, y, keys) in model column
+    order, oldest record first; keys[i] is the [created_at, id] of row i.
+    """
+    import MySQLdb
+
+    conn = MySQLdb.connect(**db_config)
+    X_chunks, y_chunks, keys = [], [], []
+    last_created_at, last_id = since if since else ('1970-01-01 00:00:00', 0)
+    try:
+        cur = conn.cursor()
+        while True:
+            cur.execute("""
+                SELECT id, created_at, study_hours, previous_score, attendance_percentage,
+                       extracurricular, sleep_hours, tutoring, actual_grade
+                FROM performance_records
+                WHERE actual_grade IS NOT NULL
+                  AND created_at >= %s
+                  AND (created_at > %s OR id > %s)
+                ORDER BY created_at, id
+                LIMIT %s
+            """, (last_created_at, last_created_at, last_id, chunk_size))
+            rows = cur.fetchall()
+            if not rows:
+                break
+
+            ids, created, study, previous, attendance, extra, sleep, tutor, grades = zip(*rows)
+            X_chunk = np.empty((len(rows), 6), dtype=np.float32)
+            X_chunk[:, 0] = study
+            X_chunk[:, 1] = previous
+            X_chunk[:, 2] = attendance
+            X_chunk[:, 3] = np.array(extra) == 'Yes'
+            X_chunk[:, 4] = sleep
+            X_chunk[:, 5] = np.array(tutor) == 'Yes'
+            X_chunks.append(X_chunk)
+            y_chunks.append(np.array(grades))
+            keys.extend([str(c), i] for c, i in zip(created, ids))
+            last_created_at, last_id = str(created[-1]), ids[-1]
+        cur.close()
+    finally:
+        conn.close()
+
+    if not X_chunks:
+        return np.empty((0, 6), dtype=np.float32), np.empty(0, dtype='<U1'), keys
+    return np.concatenate(X_chunks), np.concatenate(y_chunks), keys
+
+
+def holdout_accuracy(model, X, y):
+    """Fraction of rows in (X, y) that the model predicts correctly"""
+    if len(X) == 0:
+        return None
+    return round(float(np.mean(model.predict(X) == y)), 4)
+
+
+def train_from_records(registry, db_config, chunk_size=10000, n_jobs=-1,
+                       min_samples=50, holdout=0.2):
+    """Fit on labeled performance_records and save it as a new registry version
+
+    The newest `holdout` fraction of records is kept out of training and used to
+    report accuracy.
+    """
+    X, y, keys = load_labeled_records(db_config, chunk_size)
+    if len(X) < min_samples:
+        raise ValueError(f'Not enough labeled records to train: {len(X)} < {min_samples}')
+
+    split = int(len(X) * (1 - holdout))
+    model, report = fit_model(X[:split], y[:split], n_jobs=n_jobs)
+    report['holdout_samples'] = int(len(X) - split)
+    report['holdout_accuracy'] = holdout_accuracy(model, X[split:], y[split:])
+    # Incremental updates continue after the last record this model was fitted on
+    report['watermark'] = keys[split - 1]
+    return registry.save_version(model, make_encoders(), dict(report, source='records'))
+
+
+def add_trees(model, X, y, n_new_trees=10, retire=0, n_jobs=-1):
+    """Warm-start model with n_new_trees fitted on (X, y), dropping the `retire` oldest
+
+    Every new tree must know all of the model's classes, so classes missing from y
+    are added as zero-weight anchor rows that cannot influence any split.
+    """
+    unknown = np.setdiff1d(np.unique(y), model.classes_)
+    if len(unknown):
+        raise ValueError(f'New grades {", ".join(unknown)} need a full retrain')
+    missing = np.setdiff1d(model.classes_, y)
+
+    X_fit = np.vstack([X, np.zeros((len(missing), X.shape[1]), dtype=X.dtype)])
+    y_fit = np.concatenate([y, missing.astype(y.dtype)])
+    weights = np.concatenate([np.ones(len(X)), np.zeros(len(missing))])
+
+    if retire:
+        model.estimators_ = model.estimators_[min(retire, len(model.estimators_) - 1):]
+    model.set_params(warm_start=True, n_jobs=n_jobs,
+                     n_estimators=len(model.estimators_) + n_new_trees)
+    start = time.perf_counter()
+    model.fit(X_fit, y_fit, sample_weight=weights)
+    fit_seconds = time.perf_counter() - start
+    model.set_params(warm_start=False)
+    return fit_seconds
+
+
+def update_from_records(registry, db_config, n_new_trees=10, retire=0, chunk_size=10000,
+                        n_jobs=-1, min_samples=50, holdout=0.2):
+    """Add trees fitted on records created since the live model's watermark
+
+    Cost is proportional to the new records only. The newest `holdout` fraction
+    of them is used to report accuracy before and after the update; they are
+    trained on by the next update.
+    """
+    base = registry.current()
+    if base is None:
+        raise ValueError('The live model is not a registry version; run a full retrain first')
+    model = registry.load_model(base['version_id'])
+
+    X, y, keys = load_labeled_records(db_config, chunk_size, since=base.get('watermark'))
+    if len(X) < min_samples:
+        raise ValueError(f'Not enough new labeled records to update: {len(X)} < {min_samples}')
+
+    split = int(len(X) * (1 - holdout))
+    accuracy_before = holdout_accuracy(model, X[split:], y[split:])
+    fit_seconds = add_trees(model, X[:split], y[:split], n_new_trees, retire, n_jobs)
+
+    report = {
+        'base_version': base['version_id'],
+        'n_samples': int(split),
+        'n_estimators': len(model.estimators_),
+        'new_trees': n_new_trees,
+        'retired_trees': retire,
+        'fit_seconds': round(fit_seconds, 3),
+        'peak_rss_mb': peak_rss_mb(),
+        'holdout_samples': int(len(X) - split),
+        'holdout_accuracy_before': accuracy_before,
+        'holdout_accuracy': holdout_accuracy(model, X[split:], y[split:]),
+        'watermark': keys[split - 1],
+    }
+    return registry.save_version(model, make_encoders(), dict(report, source='incremental'))
+
+
+def db_config_from_env():
+    """MySQLdb connection settings from the MYSQL_* environment variables"""
+    return {
+        'host': os.environ.get('MYSQL_HOST', 'localhost'),
+        'user': os.environ.get('MYSQL_USER', 'root'),
+        'passwd': os.environ.get('MYSQL_PASSWORD', ''),
+        'db': os.environ.get('MYSQL_DB', 'student_performance_db'),
+    }
+
+
+def _job_lock(path):
+    """Hold an exclusive lock for the life of this process (None where unsupported)"""
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    lock_file = open(path, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        raise RuntimeError('Another training job is already running')
+    return lock_file
+
+
+def _write_status(path, status):
+    if not path:
+        return
+    tmp_path = f'{path}.tmp.{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(status, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _main(argv):
+    from model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description='Train and promote a new model version')
+    parser.add_argument('command', choices=['synthetic', 'retrain', 'update'])
+    parser.add_argument('--samples', type=int, default=500, help='synthetic training samples')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='rows per database read')
+    parser.add_argument('--min-samples', type=int, default=50, help='minimum labeled records')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='cores used for fitting')
+    parser.add_argument('--new-trees', type=int, default=10, help='trees added by an update')
+    parser.add_argument('--retire', type=int, default=0, help='oldest trees dropped by an update')
+    parser.add_argument('--model-path', default='models/performance_model.pkl')
+    parser.add_argument('--versions-dir', default='models/versions')
+    parser.add_argument('--keep', type=int, default=5, help='model versions to keep')
+    parser.add_argument('--no-promote', action='store_true', help='save without going live')
+    parser.add_argument('--status-file', default=None)
+    args = parser.parse_args(argv)
+
+    # Take the lock before touching the status file, so a job that loses the
+    # race leaves the running job's status alone
+    try:
+        lock = _job_lock(os.path.join(os.path.dirname(args.model_path) or '.', 'training.lock'))
+    except (RuntimeError, OSError) as e:
+        print(f"Training failed: {e}")
+        return 1
+
+    status = {'command': args.command, 'pid': os.getpid(), 'started_at': time.time(),
+              'state': 'running'}
+    _write_status(args.status_file, status)
+    try:
+        registry = ModelRegistry(args.versions_dir, args.model_path, keep=args.keep)
+        if args.command == 'synthetic':
+            meta = train_synthetic(registry, args.samples, args.n_jobs)
+        elif args.command == 'retrain':
+            meta = train_from_records(registry, db_config_from_env(), args.chunk_size,
+                                      args.n_jobs, args.min_samples)
+        else:
+            meta = update_from_records(registry, db_config_from_env(), args.new_trees,
+                                       args.retire, args.chunk_size, args.n_jobs,
+                                       args.min_samples)
+        if not args.no_promote:
+            registry.promote(meta['version_id'])
+            registry.prune(meta['digest'])
+        status.update(state='succeeded', version=meta, promoted=not args.no_promote)
+        print(f"Saved model version {meta['version_id']}")
+    except Exception as e:
+        status.update(state='failed', error=str(e))
+        print(f"Training failed: {e}")
+    status['finished_at'] = time.time()
+    _write_status(args.status_file, status)
+    if lock is not None:
+        lock.close()
+    return 0 if status['state'] == 'succeeded' else 1
+
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv[1:]))